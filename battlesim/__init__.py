@@ -1,2 +1,37 @@
-from .battle import Battle
-from .simevent import Action
+"""
+The battle simulator
+
+The exports are imported on first use, so importing battlesim does not
+import the battle engine, its dependencies or its game data until they
+are needed.
+"""
+import importlib
+
+_exports = {"Battle": ".battle", "Action": ".simevent", "Hook": ".hooks",
+            "Validation": ".hooks", "MatchupTable": ".matchup",
+            "get_matchup_table": ".matchup",
+            "LockstepBattles": ".lockstep", "BattleMetrics": ".metrics"}
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name):
+    try:
+        module_name = _exports[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{name!r}") from None
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except AttributeError as e:
+        # Raised as is, "from package import name" would report it as the
+        # export not existing rather than the import failing
+        raise ImportError(f"Importing {module_name} for {name} failed: "
+                          f"{e}") from e
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
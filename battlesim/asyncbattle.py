@@ -0,0 +1,94 @@
+"""
+Run battles on an asyncio event loop with awaitable decision hooks
+
+Each team is driven by a client with two coroutine methods, with the same
+arguments and results as the hook handlers of Battle:
+
+    async def choose_deployments(team_id, non_fielded_team, empty_positions)
+    async def choose_actions(team_id, oeo_requiring_actions)
+
+Waiting for a decision does not block the event loop, so one loop can
+drive many battles at once. A decision that is not made within the timeout
+is made by the battle's default policy instead.
+"""
+import asyncio
+import logging
+from .battle import Battle
+from .policy import FirstMovePolicy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBattle(Battle):
+    """
+    A Battle whose decisions are awaited from per-team clients
+
+    The battle loop is the same as Battle.run, so for the same decisions and
+    random draws the outcome is the same. Concurrent battles are only
+    reproducible when each is given its own random stream, otherwise they
+    share the random module.
+    """
+    # Makes decisions that time out, instantiated as (battle, team_id)
+    default_policy = FirstMovePolicy
+
+    async def run_async(self, clients, timeout=None):
+        """
+        Run the battle, awaiting each decision from the client of the team
+
+        :param clients: dict of team_id:client
+        :param timeout: seconds to wait for each decision before the \
+                        default policy makes it, None to wait indefinitely
+        :return: id of the victor
+        """
+        missing = [team_id for team_id in self.teams if team_id not in clients]
+        if missing:
+            raise Exception(f"No client for team(s) {missing}")
+        steps = self._steps()
+        decision = None
+        while True:
+            try:
+                request = steps.send(decision)
+            except StopIteration as stop:
+                return stop.value
+            decision = await self._decide_async(clients, timeout, *request)
+
+    async def _decide_async(self, clients, timeout, decision_type, team_id,
+                            args):
+        hook = getattr(clients[team_id], decision_type)
+        try:
+            return await asyncio.wait_for(hook(team_id, *args), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s did not make its %s decision within %ss, "
+                           "using the default", team_id, decision_type,
+                           timeout)
+            default = getattr(self.default_policy(self, team_id),
+                              decision_type)
+            return default(team_id, *args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise Exception(f"Exception in {decision_type} handler") from e
+
+
+class LocalClient(object):
+    """
+    Stand-in for a remote player that makes its decisions with a Policy,
+    after an optional delay
+    """
+    def __init__(self, policy, delay=0):
+        """
+        :param policy: Policy making the decisions
+        :param delay: seconds to wait before each decision
+        """
+        self._policy = policy
+        self._delay = delay
+
+    async def choose_deployments(self, team_id, non_fielded_team,
+                                 empty_positions):
+        await asyncio.sleep(self._delay)
+        return self._policy.choose_deployments(team_id, non_fielded_team,
+                                               empty_positions)
+
+    async def choose_actions(self, team_id, oeo_requiring_actions):
+        await asyncio.sleep(self._delay)
+        return self._policy.choose_actions(team_id, oeo_requiring_actions)
@@ -1,12 +1,16 @@
 import logging
 import itertools
-from operator import itemgetter
-from axel import Event
-from pqdict import PQDict
-from core import Oeo, Move
+import marshal
+import random
+import sys
+from collections import deque
+from core import Oeo, move_catalog
+from .hooks import Hook, Validation
 from .simevent import SimEvent, SimEventType
 from .field import Field
 from .damage import get_damage_function
+from .scheduler import EventScheduler
+from .speed import SpeedRanking
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +19,35 @@ class Battle(object):
     """
     Fight a battle between two teams of oeo
     """
-    _turn_stage_map = {8: '02', 7: '03', 6: '04', 5: '05', 4: '06',
-                       3: '07', 2: '08', 1: '09', 0: '10',
-                       -1: '11', -2: '12', -3: '13',  -4: '14',
-                       -5: '15', -6: '16', -7: '17'}
-
-    _turn_spi_map = {0: '01', 1: '02', 2: '03', 3: '04', 4: '05', 5: '06',
-                     6: '07', 7: '08', 8: '09', 9: '10', 10: '11', 11: '12'}
-
-    def __init__(self, oeos, a_id, a, a_max_fielded, b_id, b, b_max_fielded):
+    # BeginTurn happens before every action in a turn, whatever the action's
+    # priority
+    _begin_turn_stage = -sys.maxsize
+    # Decision types requested by the battle loop
+    choose_deployments_decision = "choose_deployments"
+    choose_actions_decision = "choose_actions"
+    # Number of the most recently processed events to keep in memory, the
+    # full history is written to the battle log if one is given
+    processed_history = 64
+    snapshot_version = 1
+    # Event types an action may have
+    _action_event_types = frozenset({SimEventType.UseMove,
+                                     SimEventType.UseItem,
+                                     SimEventType.Switch, SimEventType.Run})
+    # Looked up on the battle so that an instrumented battle can time the
+    # damage functions it uses
+    _get_damage_function = staticmethod(get_damage_function)
+
+    def __init__(self, oeos, a_id, a, a_max_fielded, b_id, b, b_max_fielded,
+                 battle_log=None, rng=None, validation=Validation.Full,
+                 metrics=None):
+        """
+        :param battle_log: BattleLogWriter to stream the battle's events to
+        :param rng: RandomStream or random.Random that every random draw of
+                    the battle is made from, the random module if None
+        :param validation: Validation of the decisions of the hooks
+        :param metrics: BattleMetrics to time the phases of run and count
+                        its events in, the battle is not instrumented if None
+        """
         assert all(isinstance(oeo, Oeo) for oeo in oeos.values()), \
             "oeos is not a dict of oeo_id:oeo"
         assert isinstance(a_id, str), "'a_id' is not a string"
@@ -43,19 +67,25 @@ class Battle(object):
         self._b = b
 
         self._turn_number = 0
+        # Set by BeginTurn until the actions for the turn have been chosen
+        self._actions_required = False
         self._field = Field(a_id, a_max_fielded, b_id, b_max_fielded)
-        self._pending_sim_events = PQDict()
-        self._processed_sim_events = []
+        self._pending_sim_events = EventScheduler()
+        self._processed_sim_events = deque(maxlen=self.processed_history)
+        self._battle_log = battle_log
+        self._rng = rng if rng is not None else random
+        self._validate = validation.enabled
 
+        # The Move objects are shared with every other battle in the process
         move_set = set()
-        for o in itertools.chain(self._oeo.values()):
-            for move in o.moves:
-                move_set.add(move)
-        moves = Move.load_moves(move_set)
-        self._moves = moves
+        for o in self._oeo.values():
+            move_set.update(o.moves)
+        self._moves = move_catalog.get_many(move_set)
 
-        # self._speed_priority_list = None
-        self._setup_axel_events()
+        self._speed_ranking = SpeedRanking(self._oeo)
+        self._setup_hooks()
+        if metrics is not None:
+            self._instrument(metrics)
 
     @property
     def teams(self):
@@ -65,41 +95,194 @@ class Battle(object):
     def field(self):
         return self._field
 
-    def _setup_axel_events(self):
+    @property
+    def oeo(self):
+        return self._oeo
+
+    @property
+    def turn_number(self):
+        return self._turn_number
+
+    def snapshot(self):
+        """
+        Capture the state of the battle as a compact bytes blob
+
+        The snapshot holds the oeo, the field, the turn and the pending
+        events. Shared data such as moves and species is referred to by name,
+        and event handlers, the battle log and the processed event history
+        are not included. A snapshot taken while the battle is waiting for a
+        decision resumes by requesting the outstanding decisions again.
+
+        The blob is written with marshal, so it can only be restored by the
+        same version of Python. The state of the battle's random stream is
+        not included, a restored battle draws from the stream it is given.
+
+        :rtype: bytes
         """
-        Initialise axel events
+        entries, sequence = self._pending_sim_events.state()
+        state = (self.snapshot_version, self._a_id, self._b_id,
+                 len(self._field[self._a_id]), len(self._field[self._b_id]),
+                 self._turn_number, self._actions_required,
+                 tuple(o.state() for o in self._oeo.values()),
+                 tuple(oeo_id in self._a for oeo_id in self._oeo),
+                 tuple(self._field[self._a_id].side),
+                 tuple(self._field[self._b_id].side),
+                 tuple((turn, stage, speed_rank, seq, event.event_type.value,
+                        tuple(event.data.items()))
+                       for turn, stage, speed_rank, seq, event in entries),
+                 sequence)
+        return marshal.dumps(state)
+
+    @classmethod
+    def restore(cls, blob, battle_log=None, rng=None):
+        """
+        Rebuild a battle from a snapshot
+
+        :param blob: bytes returned by snapshot
+        :param rng: random stream of the restored battle, as for __init__
+        :return: a new, independent Battle
+        """
+        state = marshal.loads(blob)
+        if state[0] != cls.snapshot_version:
+            raise Exception(f"Battle snapshot version {state[0]} is not "
+                            f"supported (expected {cls.snapshot_version})")
+        (_, a_id, b_id, a_max_fielded, b_max_fielded, turn_number,
+         actions_required, oeo_states, in_a, a_side, b_side, entries,
+         sequence) = state
+        oeos, a, b = {}, set(), set()
+        for oeo_state, oeo_in_a in zip(oeo_states, in_a):
+            oeo = Oeo.from_state(oeo_state)
+            oeos[oeo.oeo_id] = oeo
+            (a if oeo_in_a else b).add(oeo.oeo_id)
+        battle = cls(oeos, a_id, a, a_max_fielded, b_id, b, b_max_fielded,
+                     battle_log, rng)
+        battle._turn_number = turn_number
+        battle._actions_required = actions_required
+        for team_id, side in ((a_id, a_side), (b_id, b_side)):
+            for position, oeo_id in enumerate(side):
+                if oeo_id is not None:
+                    battle._field[team_id].deploy(oeo_id, position)
+        battle._pending_sim_events = EventScheduler.from_state(
+            [(turn, stage, speed_rank, seq,
+              SimEvent(SimEventType(event_type), **dict(data)))
+             for turn, stage, speed_rank, seq, event_type, data in entries],
+            sequence)
+        return battle
+
+    def clone(self, rng=None):
+        """
+        :param rng: random stream of the copy, as for __init__
+        :return: an independent copy of the battle's state, for forking
+        """
+        battle = self.restore(self.snapshot(), rng=rng)
+        battle._validate = self._validate
+        return battle
+
+    def _instrument(self, metrics):
+        """
+        Replace the methods of the battle loop on this battle with ones
+        wrapped in the timers and counters of metrics
+
+        Only the instance is changed, so a battle without metrics runs the
+        methods unwrapped.
+        """
+        from .metrics import TimedProxy
+        self.run = metrics.timed_run(self.run)
+        self._decide = metrics.timed_decisions(self._decide)
+        self._remove_unconscious_oeo = metrics.timed(
+            "withdrawals", self._remove_unconscious_oeo)
+        self._choose_deployments = metrics.timed_steps(
+            "deployments", self._choose_deployments)
+        self._choose_actions = metrics.timed_steps("actions",
+                                                   self._choose_actions)
+        self._process_begin_turn = metrics.timed_event(
+            self._process_begin_turn, "turns")
+        self._process_use_move = metrics.timed_event(self._process_use_move)
+
+        damage_functions = {}
+
+        def get_timed_damage_function(df_id):
+            function = damage_functions.get(df_id)
+            if function is None:
+                function = damage_functions[df_id] = metrics.timed(
+                    "damage", get_damage_function(df_id))
+            return function
+        self._get_damage_function = get_timed_damage_function
+        if self._battle_log is not None:
+            self._battle_log = TimedProxy(self._battle_log, metrics,
+                                          "battle_log")
+
+    def _setup_hooks(self):
+        """
+        Initialise the hooks
         """
         # sim_output_message(msg)
-        self.sim_output_message = Event()
+        self.sim_output_message = Hook("sim_output_message")
 
         # event_choose_deployments(team_id, non_fielded_team, empty_positions)
         # non_fielded_team: oeo from the team who are not on the field
         #                   but are conscious
         # empty_positions: empty positions on the field into which an oeo
         #                  could be deployed
-        self.event_choose_deployments = Event()
+        self.event_choose_deployments = Hook(
+            self.choose_deployments_decision)
 
         # event_choose_actions(team_id, oeo_requiring_actions)
         # oeo_requiring_actions: oeo that are on the field and need to select
         #                        an action for the current turn
-        self.event_choose_actions = Event()
+        self.event_choose_actions = Hook(self.choose_actions_decision)
 
     def run(self):
         """
-        Run the battle
+        Run the battle, calling the hooks for decisions
 
         :return: id of the victor
         :rtype: str
         """
-        logger.info(f"{self._a_id} vs {self._b_id}...")
-        ta = {oeo_id: self._oeo[oeo_id] for oeo_id in self._a}
-        tb = {oeo_id: self._oeo[oeo_id] for oeo_id in self._b}
-        logger.debug(f"{self._a_id}'s team:\n{ta}")
-        logger.debug(f"{self._b_id}'s team:\n{tb}")
+        steps = self._steps()
+        decision = None
+        while True:
+            try:
+                request = steps.send(decision)
+            except StopIteration as stop:
+                return stop.value
+            decision = self._decide(*request)
+
+    def _decide(self, decision_type, team_id, args):
+        """
+        Make a decision requested by _steps using the hook handlers
 
-        # Add the BEGIN_TURN SimEvent for turn 1
-        self._pending_sim_events.additem(SimEvent(SimEventType.BeginTurn), 1)
+        :return: the result of the first handler
+        """
+        if decision_type == self.choose_deployments_decision:
+            hook = self.event_choose_deployments
+        else:
+            hook = self.event_choose_actions
+        if not hook:
+            raise Exception(f"No handler for {decision_type}")
+        try:
+            return hook(team_id, *args)
+        except Exception as e:
+            raise Exception(f"Exception in {decision_type} handler") from e
+
+    def _steps(self):
+        """
+        The battle loop, as a generator that yields a request for every
+        decision it needs and is sent the decision back
 
+        Each request is a tuple of (decision type, team_id, arguments for the
+        decision handler). The battle loop is shared by every way of making
+        the decisions, e.g. run and AsyncBattle.run_async.
+
+        Decisions are only requested before the next event is processed,
+        and the decisions already applied are kept in the battle state, so a
+        battle restored from a snapshot resumes by requesting the decisions
+        that are still outstanding again.
+
+        :return: id of the victor
+        """
+        if self._turn_number == 0 and not self._pending_sim_events:
+            self._start()
         victor = None
 
         # While there are pending sim events, loop until we break when a
@@ -131,9 +314,9 @@ class Battle(object):
                 break
 
             # Let both sides choose oeo to deploy
-            self._choose_deployments()
-            logger.debug(f"{self._a_id}'s side: {self._field[self._a_id]}")
-            logger.debug(f"{self._b_id}'s side: {self._field[self._b_id]}")
+            yield from self._choose_deployments()
+            logger.debug("%s's side: %s", self._a_id, self._field[self._a_id])
+            logger.debug("%s's side: %s", self._b_id, self._field[self._b_id])
 
             # Check both sides of the field:
             # if team A side is empty, then end as win for team B
@@ -149,15 +332,24 @@ class Battle(object):
                 victor = self._a_id
                 break
 
+            # Choose the actions for the oeo on the field this turn, calculate
+            # the order in which the actions should occur, and add them to
+            # the pending sim events priority queue
+            if self._actions_required:
+                yield from self._choose_actions()
+                self._actions_required = False
+
             # Pop the next event to be processed, add it to the
             # processed events list, and process it
-            event, event_priority = self._pending_sim_events.popitem()
+            event, event_priority = self._pending_sim_events.pop()
             event_complete = 0
             event_type = event.event_type
+            outcome = {} if self._battle_log is not None else None
             if event_type is SimEventType.BeginTurn:
                 event_complete = self._process_begin_turn()
             elif event_type is SimEventType.UseMove:
-                event_complete = self._process_use_move(**event.data)
+                event_complete = self._process_use_move(outcome=outcome,
+                                                        **event.data)
             elif event_type is SimEventType.UseItem:
                 # event_complete = self._process_use_item
                 pass
@@ -172,47 +364,85 @@ class Battle(object):
 
             self._processed_sim_events.append((event_priority,
                                                event, event_complete))
-
-        logger.debug(f"Pending events: {self._pending_sim_events}")
-        logger.info(f"Processed events: {self._processed_sim_events}")
+            if self._battle_log is not None:
+                self._battle_log.event(self._turn_number, event_priority,
+                                       event, event_complete, outcome)
+
+        if self._battle_log is not None:
+            self._battle_log.battle_ended(self._turn_number, victor)
+        logger.debug("Pending events: %s", self._pending_sim_events)
+        logger.info("Processed events: %s", self._processed_sim_events)
         return victor
 
+    def _start(self):
+        """
+        Begin the battle by scheduling the BeginTurn SimEvent for turn 1
+        """
+        # Log messages in the battle loop are formatted lazily, or guarded
+        # when their arguments are costly to build, so that they cost next to
+        # nothing when their level is disabled
+        logger.info("%s vs %s...", self._a_id, self._b_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            ta = {oeo_id: self._oeo[oeo_id] for oeo_id in self._a}
+            tb = {oeo_id: self._oeo[oeo_id] for oeo_id in self._b}
+            logger.debug(f"{self._a_id}'s team:\n{ta}")
+            logger.debug(f"{self._b_id}'s team:\n{tb}")
+
+        if self._battle_log is not None:
+            self._battle_log.battle_started(
+                {team_id: (len(self._field[team_id]),
+                           [oeo_id for oeo_id in self._oeo if oeo_id in team])
+                 for team_id, team in self.teams.items()},
+                self._oeo.values())
+
+        # Add the BEGIN_TURN SimEvent for turn 1
+        self._pending_sim_events.push(SimEvent(SimEventType.BeginTurn), 1,
+                                      self._begin_turn_stage)
+
     def _process_begin_turn(self):
         # Increment the turn number and add the BeginTurn SimEvent
         # for the next turn
         self._turn_number += 1
-        logger.debug(f"Processing BeginTurn({self._turn_number}) SimEvent")
-        self._pending_sim_events.additem(SimEvent(SimEventType.BeginTurn),
-                                         self._turn_number + 1)
+        logger.debug("Processing BeginTurn(%s) SimEvent", self._turn_number)
+        self._pending_sim_events.push(SimEvent(SimEventType.BeginTurn),
+                                      self._turn_number + 1,
+                                      self._begin_turn_stage)
 
         # TODO: Update status conditions - burn, poison, landing from flight,
         # then remove unconscious oeo from field
 
-        # Choose the actions for the oeo on the field this turn, calculate the
-        # order in which the actions should occur, and add them to the pending
-        # sim events priority queue
-        self._choose_actions()
+        # Have the actions for the oeo on the field chosen before the next
+        # event is processed
+        self._actions_required = True
         return 1
 
-    def _process_use_move(self, user_id, move_id, target_id):
+    def _process_use_move(self, user_id, move_id, target_id, outcome=None):
+        """
+        :param outcome: dict to record the damage dealt, the target's HP \
+                        and the random draws in, if given
+        """
         logger.debug("Processing UseMove SimEvent")
         user, move, target = self._oeo[user_id], self._moves[move_id], \
             self._oeo[target_id]
         user_is_fielded = self._is_fielded(user_id)
         target_is_fielded = self._is_fielded(target_id)
         if user_is_fielded and target_is_fielded:
-            logger.info(f"{user_id} attacks {target_id} using {move_id}")
+            logger.info("%s attacks %s using %s", user_id, target_id, move_id)
             df_id = getattr(move, "df_id", "Standard")
-            damage_function = get_damage_function(df_id)
-            damage = damage_function(user, move, target)
+            damage_function = self._get_damage_function(df_id)
+            damage = damage_function(user, move, target, outcome,
+                                     rng=self._rng)
             hp = target.current_hp
             target.current_hp -= damage
-            logger.info(f"{target_id}'s HP = {hp}-{damage} "
-                        f"= {target.current_hp}")
+            if outcome is not None:
+                outcome.update(damage=damage, hp_before=hp,
+                               hp_after=target.current_hp)
+            logger.info("%s's HP = %s-%s = %s", target_id, hp, damage,
+                        target.current_hp)
             return 1
         else:
-            logger.debug(f"User on field = {user_is_fielded}, "
-                         f"Target on field = {target_is_fielded}")
+            logger.debug("User on field = %s, Target on field = %s",
+                         user_is_fielded, target_is_fielded)
             return -1
 
     def _process_use_item(self, item, target):
@@ -230,14 +460,13 @@ class Battle(object):
     def _calculate_event_priority(self, turn, priority, speed_priority):
         """
         :param turn: the turn in which the event is to be actioned
-        :param priority: the stage of the turn in which the event is \
-                         to be actioned
+        :param priority: the priority of the move, higher priority moves \
+                         are actioned earlier in the turn
         :param speed_priority: the speed_priority of the oeo undertaking \
                                the event
-        :return: the priority of the event to be actioned
+        :return: (turn, stage, speed_rank) for scheduling the event
         """
-        return float(f"{turn}.{self._turn_stage_map[priority]}"
-                     f"{self._turn_spi_map[speed_priority]}")
+        return turn, -priority, speed_priority
 
     def _remove_unconscious_oeo(self):
         """
@@ -248,17 +477,16 @@ class Battle(object):
                              if self._oeo[oeo_id].conscious is False]
             for oeo_id in oeo_to_remove:
                 self._field.withdraw(team_id, oeo_id)
+                if self._battle_log is not None:
+                    self._battle_log.withdrew(self._turn_number, team_id,
+                                              oeo_id)
 
     def _is_fielded(self, oeo_id):
         """
         :param oeo_id:
         :return: True if oeo_id is on the field else False
         """
-        if (oeo_id in self._field[self._a_id]) or \
-                (oeo_id in self._field[self._b_id]):
-            return True
-        else:
-            return False
+        return oeo_id in self._field
 
     def _choose_deployments(self):
         """
@@ -266,59 +494,71 @@ class Battle(object):
         """
         for team_id in [self._a_id, self._b_id]:
             empty_positions = self._field[team_id].empty_positions
-            logger.debug(f"Empty positions on {team_id}'s side: "
-                         f"{empty_positions}")
+            logger.debug("Empty positions on %s's side: %s", team_id,
+                         empty_positions)
             if empty_positions:
-                fielded = self._field[team_id].fielded
-                benched = [oeo_id for oeo_id in self.teams[team_id] if oeo_id
-                           not in fielded and self._oeo[oeo_id].conscious]
-                logger.debug(f"Benched on {team_id}'s side: {benched}")
+                fielded = self._field.fielded
+                # Iterate over self._oeo rather than the team set so that the
+                # order does not depend on string hash randomisation
+                team = self.teams[team_id]
+                benched = [oeo_id for oeo_id, oeo in self._oeo.items()
+                           if oeo_id in team and oeo_id not in fielded
+                           and oeo.conscious]
+                logger.debug("Benched on %s's side: %s", team_id, benched)
                 if benched:
-                    deployments = self._poll_deployments(team_id, benched,
-                                                         empty_positions)
-                    logger.debug(f"{team_id}'s oeo to deploy: {deployments}")
+                    deployments = yield from self._poll_deployments(
+                        team_id, benched, empty_positions)
+                    logger.debug("%s's oeo to deploy: %s", team_id,
+                                 deployments)
                     for position, oeo_id in deployments.items():
                         self._field.deploy(team_id, oeo_id, position)
+                        if self._battle_log is not None:
+                            self._battle_log.deployed(self._turn_number,
+                                                      team_id, oeo_id,
+                                                      position)
 
     def _poll_deployments(self, team_id, non_fielded_team, empty_positions):
         """
         Polls for deployments for team_id
         :return: dict of position:oeo_id
         """
-        logger.debug(f"Polling for deployments from {team_id}")
-        results = self.event_choose_deployments(team_id,
-                                                list(non_fielded_team),
-                                                empty_positions)
-        flag, result, handler = results[0]
-        if flag:
-            for position, oeo_id in result.items():
-                # Ensure that each oeo is only deployed to one
-                # field position at most
-                if list(result.values()).count(oeo_id) > 1:
-                    raise Exception(f"{oeo_id} can not be deployed to more "
-                                    "than one field position")
-                # Ensure 0 >= position < len(self._field[team_id])
-                if position < 0 or position >= len(self._field[team_id]):
-                    raise Exception(f"Position {position} is out of bounds"
-                                    f"(0-{len(self._field[team_id]) - 1})")
-                # Ensure oeo_id is in self.team[team_id]
-                if oeo_id not in self.teams[team_id]:
-                    raise Exception(f"{oeo_id} is not in {team_id}'s team")
-            return result
-        else:
-            raise Exception("Exception in choose_deployments handler") \
-                from result
+        logger.debug("Polling for deployments from %s", team_id)
+        result = yield (self.choose_deployments_decision, team_id,
+                        (list(non_fielded_team), empty_positions))
+        if self._validate:
+            self._validate_deployments(team_id, result)
+        return result
+
+    def _validate_deployments(self, team_id, deployments):
+        """
+        Check a dict of position:oeo_id in one pass over it
+        """
+        team = self._a if team_id == self._a_id else self._b
+        max_fielded = len(self._field[team_id])
+        deployed = set()
+        for position, oeo_id in deployments.items():
+            # Ensure that each oeo is only deployed to one
+            # field position at most
+            if oeo_id in deployed:
+                raise Exception(f"{oeo_id} can not be deployed to more "
+                                "than one field position")
+            deployed.add(oeo_id)
+            # Ensure 0 >= position < len(self._field[team_id])
+            if position < 0 or position >= max_fielded:
+                raise Exception(f"Position {position} is out of bounds"
+                                f"(0-{max_fielded - 1})")
+            # Ensure oeo_id is in self.team[team_id]
+            if oeo_id not in team:
+                raise Exception(f"{oeo_id} is not in {team_id}'s team")
 
     def _choose_actions(self):
         """
         Choose and schedule actions for oeo on the field
         """
-        # Create the speed_priority_list for this turn
-        oeo_against_speed = [(oeo_id, oeo.speed) for oeo_id, oeo
-                             in self._oeo.items()]
-        oeo_against_speed.sort(key=itemgetter(1), reverse=True)
-        logger.debug(f"Speed Priority List: {oeo_against_speed}")
-        speed_priority_list = [t[0] for t in oeo_against_speed]
+        # Bring the speed ranking up to date for this turn, it is only
+        # reordered for oeo whose speed has changed
+        self._speed_ranking.refresh()
+        logger.debug("Speed ranking: %s", self._speed_ranking)
 
         a_fielded = self._field[self._a_id].fielded
         b_fielded = self._field[self._b_id].fielded
@@ -328,29 +568,25 @@ class Battle(object):
         action_map = {oeo_id: None for oeo_id
                       in itertools.chain(a_fielded, b_fielded)}
         # todo: Update action_map from future_actions dictionary
-        logger.debug(f"Initial action map for turn {self._turn_number}: "
-                     f"{action_map}")
+        logger.debug("Initial action map for turn %s: %s",
+                     self._turn_number, action_map)
 
         # Call event_choose_actions for each team for oeo that do not have
         # an action to perform (action is None)
-        a_oeo_requiring_actions = [oeo_id for oeo_id, action
-                                   in action_map.items() if
-                                   (oeo_id in a_fielded) and (action is None)]
-        a_oeo_requiring_actions.sort(key=lambda x: self._oeo[x].speed,
-                                     reverse=True)
-        b_oeo_requiring_actions = [oeo_id for oeo_id, action
-                                   in action_map.items() if
-                                   (oeo_id in b_fielded) and (action is None)]
-        b_oeo_requiring_actions.sort(key=lambda x: self._oeo[x].speed,
-                                     reverse=True)
-        logger.debug(f"{self._a_id}'s oeo requiring actions: "
-                     f"{a_oeo_requiring_actions}")
-        logger.debug(f"{self._b_id}'s oeo requiring actions: "
-                     f"{b_oeo_requiring_actions}")
-        a_actions = self._poll_actions(self._a_id, a_oeo_requiring_actions)
-        b_actions = self._poll_actions(self._b_id, b_oeo_requiring_actions)
-        logger.info(f"{self._a_id}'s actions chosen: {a_actions}")
-        logger.info(f"{self._b_id}'s actions chosen: {b_actions}")
+        a_oeo_requiring_actions = self._speed_ranking.order(
+            oeo_id for oeo_id in a_fielded if action_map[oeo_id] is None)
+        b_oeo_requiring_actions = self._speed_ranking.order(
+            oeo_id for oeo_id in b_fielded if action_map[oeo_id] is None)
+        logger.debug("%s's oeo requiring actions: %s", self._a_id,
+                     a_oeo_requiring_actions)
+        logger.debug("%s's oeo requiring actions: %s", self._b_id,
+                     b_oeo_requiring_actions)
+        a_actions = yield from self._poll_actions(self._a_id,
+                                                  a_oeo_requiring_actions)
+        b_actions = yield from self._poll_actions(self._b_id,
+                                                  b_oeo_requiring_actions)
+        logger.info("%s's actions chosen: %s", self._a_id, a_actions)
+        logger.info("%s's actions chosen: %s", self._b_id, b_actions)
 
         # For each {oeo_id: action} in dictionary returned by the event
         # handlers, add it to the action map if the oeo does not already have
@@ -361,8 +597,8 @@ class Battle(object):
                 raise Exception(f"{oeo_id} already had an action "
                                 "for this turn")
             action_map[oeo_id] = action
-        logger.debug(f"Final action map for turn {self._turn_number}: "
-                     f"{action_map}")
+        logger.debug("Final action map for turn %s: %s", self._turn_number,
+                     action_map)
 
         # For each {oeo_id: action} in the action map add the SimEvent for
         # the action to the pending sim events queue
@@ -372,13 +608,13 @@ class Battle(object):
                     target = action.data["target_id"]
                     move_id = action.data["move_id"]
                     move_priority = self._moves[move_id].priority
-                    oeo_priority = speed_priority_list.index(oeo_id)
+                    oeo_priority = self._speed_ranking.rank(oeo_id)
                     s = SimEvent(SimEventType.UseMove, user_id=oeo_id,
                                  target_id=target, move_id=move_id)
                     ep = self._calculate_event_priority(self._turn_number,
                                                         move_priority,
                                                         oeo_priority)
-                    self._pending_sim_events.additem(s, ep)
+                    self._pending_sim_events.push(s, *ep)
 
                 if action.event_type == SimEventType.UseItem:
                     pass
@@ -388,27 +624,30 @@ class Battle(object):
         Polls for actions from team_id
         :return: dict of oeo_id:action
         """
-        logger.debug(f"Polling for actions from {team_id}")
-        results = self.event_choose_actions(team_id, oeo_requiring_actions)
-        flag, result, handler = results[0]
-        if flag:
-            for oeo_id, action in result.items():
-                # Ensure oeo is on the field
-                if not self._is_fielded(oeo_id):
-                    raise Exception(f"{oeo_id} is not on the field")
-                # Ensure oeo is in team_id
-                if oeo_id not in self.teams[team_id]:
-                    raise Exception(f"{oeo_id} is not on {team_id}'s side")
-                # Ensure action is SimEvent
-                if not isinstance(action, SimEvent):
-                    raise Exception("Action is not a SimEvent")
-                # Ensure action.event_type is UseMove, UseItem, Switch or Run
-                if action.event_type not in [SimEventType.UseMove,
-                                             SimEventType.UseItem,
-                                             SimEventType.Switch,
-                                             SimEventType.Run]:
-                    raise Exception("Action event type not UseMove, UseItem, "
-                                    "Switch or Run")
-            return result
-        else:
-            raise Exception("Exception in choose_actions handler") from result
+        logger.debug("Polling for actions from %s", team_id)
+        result = yield (self.choose_actions_decision, team_id,
+                        (oeo_requiring_actions,))
+        if self._validate:
+            self._validate_actions(team_id, result)
+        return result
+
+    def _validate_actions(self, team_id, actions):
+        """
+        Check a dict of oeo_id:action in one pass over it
+        """
+        team = self._a if team_id == self._a_id else self._b
+        field = self._field
+        for oeo_id, action in actions.items():
+            # Ensure oeo is on the field
+            if oeo_id not in field:
+                raise Exception(f"{oeo_id} is not on the field")
+            # Ensure oeo is in team_id
+            if oeo_id not in team:
+                raise Exception(f"{oeo_id} is not on {team_id}'s side")
+            # Ensure action is SimEvent
+            if not isinstance(action, SimEvent):
+                raise Exception("Action is not a SimEvent")
+            # Ensure action.event_type is UseMove, UseItem, Switch or Run
+            if action.event_type not in self._action_event_types:
+                raise Exception("Action event type not UseMove, UseItem, "
+                                "Switch or Run")
@@ -0,0 +1,224 @@
+"""
+Streaming battle log in newline-delimited JSON and replay from it
+
+A battle log is one JSON object per line. It starts with a "battle" record
+that holds the teams and the state of every oeo at the start of the battle.
+This is followed, in the order they happened, by "deploy" and "withdraw"
+records for changes to the field and "event" records for processed
+SimEvents with their outcomes. It ends with an "end" record that holds the
+victor. Records are written as they happen, so the memory used by a logged
+battle does not grow with its length.
+"""
+import json
+import logging
+from pathlib import Path
+from core import Oeo
+from .field import Field
+
+logger = logging.getLogger(__name__)
+
+log_version = 1
+
+
+class BattleLogWriter(object):
+    """
+    Appends battle log records to a file or text buffer as they happen
+    """
+    def __init__(self, file):
+        """
+        :param file: path of the file to write, or a text file object
+        """
+        if isinstance(file, (str, Path)):
+            self._file = open(file, "w", encoding="utf-8", newline="\n")
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._encode = json.JSONEncoder(separators=(",", ":"),
+                                        ensure_ascii=False).encode
+
+    def _write(self, record):
+        self._file.write(self._encode(record))
+        self._file.write("\n")
+
+    def battle_started(self, teams, oeos):
+        """
+        :param teams: dict of team_id:(max_fielded, list of oeo_id)
+        :param oeos: iterable of every Oeo in the battle
+        """
+        self._write({"type": "battle", "version": log_version,
+                     "teams": {team_id: {"max_fielded": max_fielded,
+                                         "oeo": oeo_ids}
+                               for team_id, (max_fielded, oeo_ids)
+                               in teams.items()},
+                     "oeo": [oeo.to_json_dict() for oeo in oeos]})
+
+    def deployed(self, turn, team_id, oeo_id, position):
+        self._write({"type": "deploy", "turn": turn, "team": team_id,
+                     "oeo_id": oeo_id, "position": position})
+
+    def withdrew(self, turn, team_id, oeo_id):
+        self._write({"type": "withdraw", "turn": turn, "team": team_id,
+                     "oeo_id": oeo_id})
+
+    def event(self, turn, key, event, status, outcome=None):
+        """
+        :param key: the key the event was scheduled with
+        :param event: the processed SimEvent
+        :param status: 1 if the event completed, -1 if it was skipped
+        :param outcome: dict of the results of the event, e.g. damage, \
+                        HP before and after and random draws
+        """
+        record = {"type": "event", "turn": turn, "key": list(key),
+                  "event": event.event_type.name, "data": event.data,
+                  "status": status}
+        if outcome:
+            record["outcome"] = outcome
+        self._write(record)
+
+    def battle_ended(self, turn, victor):
+        self._write({"type": "end", "turn": turn, "victor": victor})
+        self._file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_battle_log(file):
+    """
+    :param file: path of a battle log, or a text file object
+    :return: generator of the records in the battle log
+    """
+    if isinstance(file, (str, Path)):
+        with open(file, encoding="utf-8") as f:
+            yield from read_battle_log(f)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class ReplayState(object):
+    """
+    The state of a battle rebuilt from its log
+    """
+    __slots__ = ("turn_number", "oeo", "field", "victor")
+
+    def __init__(self, turn_number, oeo, field, victor):
+        self.turn_number = turn_number
+        # dict of oeo_id:Oeo
+        self.oeo = oeo
+        self.field = field
+        # team_id or "DRAW" if the battle had ended, otherwise None
+        self.victor = victor
+
+
+class BattleReplay(object):
+    """
+    Rebuilds the state of a logged battle at any turn without running the
+    decision callbacks again
+
+    The log is read again on every call rather than held in memory, so a
+    file object source must be seekable.
+    """
+    def __init__(self, file):
+        """
+        :param file: path of a battle log, or a seekable text file object
+        """
+        self._file = file
+        header = next(self._records(), None)
+        if header is None or header.get("type") != "battle":
+            raise Exception("Battle log does not start with a battle record")
+        if header["version"] != log_version:
+            raise Exception(f"Battle log version {header['version']} is not "
+                            f"supported (expected {log_version})")
+        self._header = header
+
+    def _records(self):
+        if not isinstance(self._file, (str, Path)):
+            self._file.seek(0)
+        return read_battle_log(self._file)
+
+    @property
+    def teams(self):
+        """
+        :return: dict of team_id:list of oeo_id
+        """
+        return {team_id: team["oeo"]
+                for team_id, team in self._header["teams"].items()}
+
+    def events(self, turn=None):
+        """
+        :param turn: only yield the events of this turn if given
+        :return: generator of the event records in the log
+        """
+        for record in self._records():
+            if record["type"] == "event" and \
+                    (turn is None or record["turn"] == turn):
+                yield record
+
+    def final_turn(self):
+        """
+        :return: the last turn that was played in the logged battle
+        """
+        last_turn = 0
+        for record in self._records():
+            last_turn = record.get("turn", last_turn)
+        return last_turn
+
+    def state_at(self, turn=None):
+        """
+        Rebuild the state of the battle at the end of a turn, including the
+        deployments made to replace oeo that fainted during it
+
+        :param turn: the turn, 0 for the state after the first deployments \
+                     and None for the end of the battle
+        :return: ReplayState
+        """
+        (a_id, a), (b_id, b) = self._header["teams"].items()
+        field = Field(a_id, a["max_fielded"], b_id, b["max_fielded"])
+        oeo = {o["oeo_id"]: Oeo.from_json_dict(o)
+               for o in self._header["oeo"]}
+        turn_number, victor = 0, None
+        for record in self._records():
+            record_type = record["type"]
+            if record_type == "battle":
+                continue
+            if turn is not None and record["turn"] > turn:
+                break
+            turn_number = record["turn"]
+            if record_type == "deploy":
+                field.deploy(record["team"], record["oeo_id"],
+                             record["position"])
+            elif record_type == "withdraw":
+                field.withdraw(record["team"], record["oeo_id"])
+            elif record_type == "event":
+                self._apply_event(oeo, record)
+            elif record_type == "end":
+                victor = record["victor"]
+            else:
+                raise Exception(f"Unknown battle log record type: "
+                                f"{record_type}")
+        return ReplayState(turn_number, oeo, field, victor)
+
+    @staticmethod
+    def _apply_event(oeo, record):
+        outcome = record.get("outcome")
+        if record["event"] == "UseMove" and record["status"] == 1 \
+                and outcome is not None:
+            target = oeo[record["data"]["target_id"]]
+            if target.current_hp != outcome["hp_before"]:
+                raise Exception(f"Battle log is inconsistent: "
+                                f"{target.oeo_id} had {target.current_hp} "
+                                f"HP, the log expected "
+                                f"{outcome['hp_before']}")
+            target.current_hp = outcome["hp_after"]
@@ -1,51 +1,75 @@
 import logging
 import math
 import random
-import json
-from pathlib import Path
-from core import Oeo, Element, Move, MoveCategory
+import numpy as np
+from core import Oeo, Move, MoveCategory, RandomStream, gamedata, species_registry
+from .effectiveness import EffectivenessTable
 
 logger = logging.getLogger(__name__)
 
 
-def get_damage_function(df_id):
-    if df_id == "Standard":
-        return calculate_standard_damage
+def get_damage_function(df_id, batch=False, expected=False, rolls=False):
+    """
+    :param df_id: id of the damage function
+    :param batch: return the batched version of the damage function
+    :param expected: return the version of the damage function that gives the mean damage over the random draws
+    :param rolls: return the version of the damage function that gives the damage of every random draw
+    :return: the damage function registered for df_id
+    """
+    if batch:
+        damage_functions = _batch_damage_functions
+    elif expected:
+        damage_functions = _expected_damage_functions
+    elif rolls:
+        damage_functions = _damage_rolls_functions
     else:
+        damage_functions = _damage_functions
+    try:
+        return damage_functions[df_id]
+    except KeyError:
         raise Exception("No other damage functions currently implemented")
 
 
-def calculate_standard_damage(user, move, target):
+def calculate_standard_damage(user, move, target, details=None, rng=None):
     """
     Calculates damage using the formula:
 
     Damage = ( ( 2 x user.lvl + 10 / 250 ) x ( user.att|sp.att / target.def|sp.def ) x move.power + 2 ) x Modifier
     Modifier = SameTypeAttackBonus x ElementEffectiveness x CriticalModifier x Other x (random(0.85, 1.05))
+
+    :param details: dict to record the modifiers and random draws of the calculation in, if given
+    :param rng: RandomStream or random.Random to draw the randomness factor from, the random module if None
     """
-    logger.debug("Calculating damage using standard formula...")
+    # Formatting the diagnostics is a large share of the cost of this function, so only do it when DEBUG is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Calculating damage using standard formula...")
     assert isinstance(user, Oeo), "user is not an Oeo"
     assert isinstance(move, Move), "move is not a Move"
     assert isinstance(target, Oeo), "target is not an Oeo"
 
-    stab = _same_type_attack_bonus(move.element, user.elements)
-    user_elements = "/".join([str(e.name) for e in user.elements])
-    logger.debug(f"STAB for {user_elements} Oeo using a {move.element.name} Move = {stab}")
+    stab, element_effectiveness = _stab_and_effectiveness(user, move, target)
+    if debug:
+        user_elements = "/".join([str(e.name) for e in user.elements])
+        logger.debug(f"STAB for {user_elements} Oeo using a {move.element.name} Move = {stab}")
 
-    element_effectiveness = _element_effectiveness(move.element, target.elements)
-    target_elements = "/".join([str(e.name) for e in target.elements])
-    logger.debug(f"Element Effectiveness of a {move.element.name} Move against a {target_elements} Oeo = {element_effectiveness}")
+    if debug:
+        target_elements = "/".join([str(e.name) for e in target.elements])
+        logger.debug(f"Element Effectiveness of a {move.element.name} Move against a {target_elements} Oeo = "
+                     f"{element_effectiveness}")
 
     critical_modifier = _critical_modifier(user, move, target)
-    logger.debug(f"Critical Modifier = {critical_modifier}")
-
     other = _other_modifiers(user, move, target)
-    logger.debug(f"Other Modifiers = {other}")
-
-    randomness_factor = _randomness_factor(0.85, 1.0)
-    logger.debug(f"Randomness Factor = {randomness_factor}")
+    randomness_factor = _randomness_factor(0.85, 1.0, rng)
+    if debug:
+        logger.debug(f"Critical Modifier = {critical_modifier}")
+        logger.debug(f"Other Modifiers = {other}")
+        logger.debug(f"Randomness Factor = {randomness_factor}")
 
     modifier = stab * element_effectiveness * critical_modifier * other * randomness_factor
-    logger.debug(f"Damage Modifier = {stab}*{element_effectiveness}*{critical_modifier}*{other}*{randomness_factor} = {modifier}")
+    if debug:
+        logger.debug(f"Damage Modifier = {stab}*{element_effectiveness}*{critical_modifier}*{other}*"
+                     f"{randomness_factor} = {modifier}")
 
     if move.category == MoveCategory.Physical:
         attack = user.attack
@@ -56,14 +80,135 @@ def calculate_standard_damage(user, move, target):
     else:
         raise Exception("Move is neither Physical nor Special - why is this function running?")
     raw_damage = ((2 * user.level + 10) / 250) * (attack / defence) * move.power + 2
-    logger.debug(f"Raw Damage = (2*{user.level}+10)/250*({attack}/{defence})*{move.power}+2 = {raw_damage}")
-
     damage = math.floor(raw_damage * modifier)
-    logger.debug(f"Damage = floor({raw_damage}*{modifier}) = {damage}")
+    if debug:
+        logger.debug(f"Raw Damage = (2*{user.level}+10)/250*({attack}/{defence})*{move.power}+2 = {raw_damage}")
+        logger.debug(f"Damage = floor({raw_damage}*{modifier}) = {damage}")
+    if details is not None:
+        details.update(stab=stab, effectiveness=element_effectiveness, critical=critical_modifier, other=other,
+                       random=randomness_factor, raw_damage=raw_damage)
 
     return damage
 
 
+def standard_damage_rolls(user, move, target):
+    """
+    Calculates the damage of every randomness factor calculate_standard_damage can draw, without drawing any
+
+    :return: tuple of the damage for each randomness factor, each equally likely
+    """
+    stab, element_effectiveness = _stab_and_effectiveness(user, move, target)
+    # Multiplied in the same order as calculate_standard_damage so the floored damage is identical
+    modifier = stab * element_effectiveness * _critical_modifier(user, move, target) * \
+        _other_modifiers(user, move, target)
+    if move.category == MoveCategory.Physical:
+        attack = user.attack
+        defence = target.defence
+    elif move.category == MoveCategory.Special:
+        attack = user.sp_attack
+        defence = target.sp_defence
+    else:
+        raise Exception("Move is neither Physical nor Special - why is this function running?")
+    raw_damage = ((2 * user.level + 10) / 250) * (attack / defence) * move.power + 2
+    return tuple(math.floor(raw_damage * (modifier * (r / 100))) for r in range(85, 101))
+
+
+def calculate_expected_standard_damage(user, move, target):
+    """
+    :return: the mean damage of calculate_standard_damage over its randomness factor
+    """
+    rolls = standard_damage_rolls(user, move, target)
+    return sum(rolls) / len(rolls)
+
+
+def calculate_standard_damage_batch(user_level, user_attack, user_sp_attack, user_elements,
+                                    move_power, move_category, move_element,
+                                    target_defence, target_sp_defence, target_elements, rng=None):
+    """
+    Calculates damage for many hits at once using the same formula as calculate_standard_damage
+
+    Elements are given as Element values in arrays of shape (hits, 2), with 0 where an oeo has a single element,
+    and move categories as MoveCategory values. Randomness factors are drawn from rng (the random module if None)
+    in hit order, so with the same seed the results match calling calculate_standard_damage for each hit in turn.
+    A RandomStream draws them all in one block.
+
+    :return: numpy array of the damage of each hit
+    """
+    if rng is None:
+        rng = random
+    user_level = np.asarray(user_level, dtype=np.int64)
+    move_power = np.asarray(move_power, dtype=np.int64)
+    move_category = np.asarray(move_category, dtype=np.int64)
+    move_element = np.asarray(move_element, dtype=np.int64)
+    user_elements = np.asarray(user_elements, dtype=np.int64).reshape(-1, 2)
+    target_elements = np.asarray(target_elements, dtype=np.int64).reshape(-1, 2)
+    hits = len(user_level)
+
+    physical = move_category == MoveCategory.Physical.value
+    special = move_category == MoveCategory.Special.value
+    if not np.all(physical | special):
+        raise Exception("Move is neither Physical nor Special - why is this function running?")
+
+    stab = np.where((user_elements == move_element[:, None]).any(axis=1), 1.5, 1.0)
+    element_effectiveness = _get_effectiveness_table().dual[move_element, target_elements[:, 0], target_elements[:, 1]]
+    # The critical and other modifiers are currently always 1
+    if isinstance(rng, RandomStream):
+        randomness_factor = rng.randints(85, 100, hits) / 100
+    else:
+        randomness_factor = np.fromiter((rng.randint(85, 100) for _ in range(hits)), dtype=np.int64,
+                                        count=hits) / 100
+    modifier = stab * element_effectiveness * randomness_factor
+
+    attack = np.where(physical, user_attack, user_sp_attack)
+    defence = np.where(physical, target_defence, target_sp_defence)
+    raw_damage = ((2 * user_level + 10) / 250) * (attack / defence) * move_power + 2
+
+    return np.floor(raw_damage * modifier).astype(np.int64)
+
+
+def batch_arguments(hits):
+    """
+    Build the keyword arguments for a batched damage function
+
+    :param hits: iterable of (user, move, target) tuples
+    :return: dict of arrays to pass to calculate_standard_damage_batch
+    """
+    hits = list(hits)
+    n = len(hits)
+    args = {"user_level": np.empty(n, dtype=np.int64), "user_attack": np.empty(n, dtype=np.int64),
+            "user_sp_attack": np.empty(n, dtype=np.int64), "user_elements": np.zeros((n, 2), dtype=np.int64),
+            "move_power": np.empty(n, dtype=np.int64), "move_category": np.empty(n, dtype=np.int64),
+            "move_element": np.empty(n, dtype=np.int64), "target_defence": np.empty(n, dtype=np.int64),
+            "target_sp_defence": np.empty(n, dtype=np.int64), "target_elements": np.zeros((n, 2), dtype=np.int64)}
+    for i, (user, move, target) in enumerate(hits):
+        args["user_level"][i] = user.level
+        args["user_attack"][i] = user.attack
+        args["user_sp_attack"][i] = user.sp_attack
+        args["user_elements"][i, :len(user.elements)] = [e.value for e in user.elements]
+        args["move_power"][i] = move.power
+        args["move_category"][i] = move.category.value
+        args["move_element"][i] = move.element.value
+        args["target_defence"][i] = target.defence
+        args["target_sp_defence"][i] = target.sp_defence
+        args["target_elements"][i, :len(target.elements)] = [e.value for e in target.elements]
+    return args
+
+
+def _stab_and_effectiveness(user, move, target):
+    """
+    :return: (stab, element effectiveness) of move from user on target, looked up in the matchup table if one has
+             been loaded and it covers them
+    """
+    table = _matchup_table
+    modifiers = None
+    if table is not None and table.generation == species_registry.generation:
+        modifiers = table.modifiers(user, move, target)
+    if modifiers is None:
+        return _same_type_attack_bonus(move.element, user.elements), \
+            _element_effectiveness(move.element, target.elements)
+    return modifiers
+
+
 def _same_type_attack_bonus(move_element, user_elements):
     stab = 1.0
     for element in user_elements:
@@ -73,11 +218,10 @@ def _same_type_attack_bonus(move_element, user_elements):
 
 
 def _element_effectiveness(move_element, target_elements):
-    effectiveness_adjustments = _element_effectiveness_map[move_element.name]
-    effectiveness = 1
-    for element in target_elements:
-        effectiveness *= effectiveness_adjustments.get(element.name, 1)
-    return effectiveness
+    table = _effectiveness_table
+    if table is None:
+        table = _get_effectiveness_table()
+    return table.effectiveness(move_element, target_elements)
 
 
 def _critical_modifier(user, move, target):
@@ -88,15 +232,41 @@ def _other_modifiers(user, move, target):
     return 1
 
 
-def _randomness_factor(a, b):
-    return random.randint(a * 100, b * 100) / 100
+def _randomness_factor(a, b, rng=None):
+    if rng is None:
+        rng = random
+    return rng.randint(round(a * 100), round(b * 100)) / 100
+
 
+def _load_effectiveness_table():
+    return EffectivenessTable.from_json_dict(gamedata.read_json("battle", "element_effectiveness"))
+
+
+def _get_effectiveness_table():
+    """
+    :return: the element effectiveness table, loading it on first use
+    """
+    global _effectiveness_table
+    if _effectiveness_table is None:
+        _effectiveness_table = _load_effectiveness_table()
+    return _effectiveness_table
+
+
+def use_matchup_table(table):
+    """
+    Look up the stab and element effectiveness in table, a MatchupTable loaded by matchup.get_matchup_table, or
+    compute them if None
+
+    The table is never loaded from here, so a missing, stale or unwritable cache does not affect the damage functions.
+    """
+    global _matchup_table
+    _matchup_table = table
 
-def _load_element_effectiveness_map():
-    p = Path("./data/battle/element_effectiveness.json")
-    with p.open() as f:
-        element_effectiveness_map = json.load(f)
-    return element_effectiveness_map
 
+_effectiveness_table = None
+_matchup_table = None
 
-_element_effectiveness_map = _load_element_effectiveness_map()
+_damage_functions = {"Standard": calculate_standard_damage}
+_batch_damage_functions = {"Standard": calculate_standard_damage_batch}
+_expected_damage_functions = {"Standard": calculate_expected_standard_damage}
+_damage_rolls_functions = {"Standard": standard_damage_rolls}
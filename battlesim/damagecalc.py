@@ -0,0 +1,160 @@
+"""
+Exact damage distributions and knock out chances, without sampling
+
+The damage of a hit is one of the equally likely outcomes of its damage
+function's random draw, e.g. the 16 randomness factors of the standard
+formula. Distributions are kept as integer counts of those outcomes, so
+every probability is exact until it is converted to a float. Moves always
+hit, as in Battle.
+"""
+from collections import Counter
+from fractions import Fraction
+from .damage import get_damage_function
+
+
+class DamageDistribution(object):
+    """
+    The distribution of the total damage of one or more hits, as the number
+    of equally likely outcomes giving each total
+    """
+    __slots__ = ("_counts", "_outcomes")
+
+    def __init__(self, counts, outcomes):
+        """
+        :param counts: dict of damage:number of outcomes dealing it
+        :param outcomes: total number of outcomes
+        """
+        assert sum(counts.values()) == outcomes, \
+            "counts do not add up to outcomes"
+        self._counts = dict(sorted(counts.items()))
+        self._outcomes = outcomes
+
+    @classmethod
+    def from_rolls(cls, rolls):
+        """
+        :param rolls: sequence of the damage of each equally likely draw
+        """
+        return cls(Counter(rolls), len(rolls))
+
+    @property
+    def counts(self):
+        return dict(self._counts)
+
+    @property
+    def outcomes(self):
+        return self._outcomes
+
+    @property
+    def min(self):
+        return next(iter(self._counts))
+
+    @property
+    def max(self):
+        return next(reversed(self._counts))
+
+    @property
+    def mean(self):
+        return sum(damage * count for damage, count
+                   in self._counts.items()) / self._outcomes
+
+    def pmf(self):
+        """
+        :return: dict of damage:probability in ascending order of damage
+        """
+        return {damage: count / self._outcomes
+                for damage, count in self._counts.items()}
+
+    def probability(self, damage):
+        """
+        :return: exact probability of dealing damage, as a Fraction
+        """
+        return Fraction(self._counts.get(damage, 0), self._outcomes)
+
+    def at_least(self, damage):
+        """
+        :return: exact probability of dealing damage or more, as a Fraction
+        """
+        return Fraction(sum(count for d, count in self._counts.items()
+                            if d >= damage), self._outcomes)
+
+    def __add__(self, other):
+        """
+        :return: the distribution of the total of independent hits from
+                 self and other
+        """
+        counts = {}
+        for a, a_count in self._counts.items():
+            for b, b_count in other._counts.items():
+                counts[a + b] = counts.get(a + b, 0) + a_count * b_count
+        return DamageDistribution(counts, self._outcomes * other._outcomes)
+
+    def hits(self, n):
+        """
+        :return: the distribution of the total damage of n independent hits
+        """
+        if n < 1:
+            raise ValueError(f"n must be at least 1, not {n}")
+        total = self
+        for _ in range(n - 1):
+            total = total + self
+        return total
+
+    def __repr__(self):
+        return "DamageDistribution(%r, %r)" % (self._counts, self._outcomes)
+
+
+def damage_distribution(user, move, target):
+    """
+    :return: DamageDistribution of one hit of move from user on target
+    """
+    rolls = get_damage_function(getattr(move, "df_id", "Standard"),
+                                rolls=True)
+    return DamageDistribution.from_rolls(rolls(user, move, target))
+
+
+def ko_chances(distribution, hp, max_hits=10):
+    """
+    Chance of knocking out a target with hp left in 1, 2, ... hits
+
+    Only the totals below hp are carried from hit to hit, so each hit costs
+    at most hp times the number of damage outcomes.
+
+    :param distribution: DamageDistribution of one hit
+    :param max_hits: most hits to consider
+    :return: list of the exact chance, as a Fraction, of a knock out within
+             each number of hits, ending early once a knock out is certain
+    """
+    if hp <= 0:
+        return [Fraction(1)]
+    hit = distribution.counts
+    # Outcomes leaving the target conscious, by the damage dealt so far
+    surviving = {0: 1}
+    outcomes = 1
+    chances = []
+    for _ in range(max_hits):
+        outcomes *= distribution.outcomes
+        next_surviving = {}
+        for dealt, count in surviving.items():
+            for damage, damage_count in hit.items():
+                total = dealt + damage
+                if total < hp:
+                    next_surviving[total] = next_surviving.get(total, 0) + \
+                        count * damage_count
+        surviving = next_surviving
+        chances.append(1 - Fraction(sum(surviving.values()), outcomes))
+        if not surviving:
+            break
+    return chances
+
+
+def ko_probability(user, move, target, hits=1, hp=None):
+    """
+    :param hits: number of hits of move on target
+    :param hp: HP of target, target.current_hp if None
+    :return: exact chance, as a Fraction, that move knocks target out within
+             hits hits
+    """
+    if hp is None:
+        hp = target.current_hp
+    chances = ko_chances(damage_distribution(user, move, target), hp, hits)
+    return chances[-1]
@@ -0,0 +1,92 @@
+import json
+import logging
+import numpy as np
+from core import Element
+
+logger = logging.getLogger(__name__)
+
+
+class EffectivenessTable(object):
+    """
+    Element effectiveness compiled into dense arrays indexed by Element value
+
+    Index 0 stands for "no element", so a single element oeo is looked up as
+    (element, 0) in the dual element table.
+    """
+    size = len(Element) + 1
+
+    def __init__(self, single):
+        assert single.shape == (self.size, self.size), \
+            f"single is not a {self.size}x{self.size} array"
+        # single[move element, target element]
+        self._single = single
+        # dual[move element, target element 1, target element 2]
+        self._dual = single[:, :, None] * single[:, None, :]
+        # Nested lists of floats are faster to index than numpy arrays for
+        # the scalar damage path
+        self._dual_rows = self._dual.tolist()
+
+    @property
+    def single(self):
+        return self._single
+
+    @property
+    def dual(self):
+        return self._dual
+
+    def effectiveness(self, move_element, target_elements):
+        """
+        :param move_element: Element of the move
+        :param target_elements: sequence of the target's Elements
+        :return: the combined effectiveness multiplier
+        """
+        row = self._dual_rows[move_element.value]
+        if len(target_elements) == 1:
+            return row[target_elements[0].value][0]
+        elif len(target_elements) == 2:
+            return row[target_elements[0].value][target_elements[1].value]
+        effectiveness = 1.0
+        for element in target_elements:
+            effectiveness *= row[element.value][0]
+        return effectiveness
+
+    @classmethod
+    def from_json_dict(cls, effectiveness_map):
+        """
+        Compile and validate a map of move element name to
+        {target element name: multiplier}
+
+        Every element must have a row, and every element name must be valid.
+        """
+        unknown = [name for name in effectiveness_map if name not in
+                   Element.__members__]
+        unknown += [name for adjustments in effectiveness_map.values()
+                    for name in adjustments if name not in
+                    Element.__members__]
+        if unknown:
+            logger.error(f"Unknown element(s) in element effectiveness: "
+                         f"{unknown}")
+            raise Exception(f"Unknown element(s) in element effectiveness: "
+                            f"{unknown}")
+        missing = [e.name for e in Element if e.name not in effectiveness_map]
+        if missing:
+            logger.error(f"Element effectiveness is missing rows for "
+                         f"{missing}")
+            raise Exception(f"Element effectiveness is missing rows for "
+                            f"{missing}")
+
+        single = np.ones((cls.size, cls.size))
+        for move_element, adjustments in effectiveness_map.items():
+            for element, adjustment in adjustments.items():
+                if not isinstance(adjustment, (int, float)) or adjustment < 0:
+                    raise Exception(f"Invalid effectiveness {adjustment!r} "
+                                    f"for {move_element} against {element}")
+                single[Element[move_element].value,
+                       Element[element].value] = adjustment
+        return cls(single)
+
+    @classmethod
+    def load(cls, path):
+        with path.open(encoding="utf-8") as f:
+            effectiveness_map = json.load(f)
+        return cls.from_json_dict(effectiveness_map)
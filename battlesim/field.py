@@ -6,10 +6,15 @@ logger = logging.getLogger(__name__)
 class Field(object):
     """
     Handles the field of battle
+
+    The field keeps an index of oeo_id to (team_id, position) for every
+    fielded oeo, shared with its sides, so that membership and position
+    queries do not scan the sides.
     """
     def __init__(self, a_id, a_max_fielded, b_id, b_max_fielded):
-        self._field = {a_id: Side(a_max_fielded),
-                       b_id: Side(b_max_fielded)}
+        self._locations = {}
+        self._field = {a_id: Side(a_max_fielded, a_id, self._locations),
+                       b_id: Side(b_max_fielded, b_id, self._locations)}
 
     def __getitem__(self, item):
         try:
@@ -18,31 +23,67 @@ class Field(object):
             logger.error(f"Team id:{item} not on field")
             raise Exception(f"Team id:{item} not on field") from e
 
+    def __contains__(self, oeo_id):
+        return oeo_id in self._locations
+
+    @property
+    def fielded(self):
+        """
+        :return: live set-like view of the oeo_id of every fielded oeo
+        """
+        return self._locations.keys()
+
+    def locate(self, oeo_id):
+        """
+        :return: (team_id, position) of a fielded oeo, or None if oeo_id is \
+                 not on the field
+        """
+        return self._locations.get(oeo_id)
+
     def deploy(self, team_id, oeo_id, position):
         try:
-            self._field[team_id].deploy(oeo_id, position)
-            logger.info(f"{team_id} deployed {oeo_id} to position {position}")
+            side = self._field[team_id]
         except KeyError as e:
             logger.error(f"Team id:{team_id} not on field")
             raise Exception(f"Team id:{team_id} not on field") from e
+        side.deploy(oeo_id, position)
+        logger.info("%s deployed %s to position %s", team_id, oeo_id, position)
 
     def withdraw(self, team_id, oeo_id):
         try:
-            position = self._field[team_id].index(oeo_id)
-            self._field[team_id].withdraw(oeo_id)
-            logger.info(f"{team_id} withdrew {oeo_id} from position {position}")
+            side = self._field[team_id]
         except KeyError as e:
             logger.error(f"Team id:{team_id} not on field")
             raise Exception(f"Team id:{team_id} not on field") from e
+        position = side.withdraw(oeo_id)
+        logger.info("%s withdrew %s from position %s", team_id, oeo_id,
+                    position)
 
 
 class Side(object):
     """
     Handles a side on the field of battle
+
+    Empty positions are tracked in a bitmask and the fielded oeo in the
+    location index, so every query is O(1). The fielded and empty_positions
+    tuples are rebuilt only after the side changes.
     """
-    def __init__(self, max_fielded):
+    __slots__ = ("_max_fielded", "_team_id", "_side", "_locations", "_empty",
+                 "_fielded", "_empty_positions")
+
+    def __init__(self, max_fielded, team_id=None, locations=None):
+        """
+        :param locations: dict of oeo_id:(team_id, position) shared with the \
+                          other side of the field
+        """
         self._max_fielded = max_fielded
+        self._team_id = team_id
         self._side = [None for _ in range(max_fielded)]
+        self._locations = locations if locations is not None else {}
+        # Bit n is set when position n is empty
+        self._empty = (1 << max_fielded) - 1
+        self._fielded = ()
+        self._empty_positions = tuple(range(max_fielded))
 
     def __len__(self):
         return self._max_fielded
@@ -50,8 +91,15 @@ class Side(object):
     def __iter__(self):
         return iter(self._side)
 
+    def __contains__(self, oeo_id):
+        location = self._locations.get(oeo_id)
+        return location is not None and location[0] == self._team_id
+
     def index(self, oeo_id):
-        return self._side.index(oeo_id)
+        location = self._locations.get(oeo_id)
+        if location is None or location[0] != self._team_id:
+            raise ValueError(f"{oeo_id} is not on this side")
+        return location[1]
 
     @property
     def side(self):
@@ -59,24 +107,59 @@ class Side(object):
 
     @property
     def fielded(self):
-        return [oeo_id for oeo_id in self._side if oeo_id is not None]
+        """
+        :return: tuple of the fielded oeo_id in position order
+        """
+        return self._fielded
 
     @property
     def empty_positions(self):
-        return [index for index, oeo_id in enumerate(self._side) if oeo_id is None]
+        """
+        :return: tuple of the empty positions in order
+        """
+        return self._empty_positions
+
+    @property
+    def empty_mask(self):
+        """
+        :return: int with bit n set when position n is empty
+        """
+        return self._empty
 
     def is_empty(self):
-        if all((True if oeo_id is None else False) for oeo_id in self._side):
-            return True
-        else:
-            return False
+        return self._empty == (1 << self._max_fielded) - 1
 
     def deploy(self, oeo_id, position):
+        if not 0 <= position < self._max_fielded:
+            raise IndexError(f"Position {position} is out of bounds "
+                             f"(0-{self._max_fielded - 1})")
+        if oeo_id in self._locations:
+            raise Exception(f"{oeo_id} is already on the field")
+        replaced = self._side[position]
+        if replaced is not None:
+            del self._locations[replaced]
         self._side[position] = oeo_id
+        self._locations[oeo_id] = (self._team_id, position)
+        self._empty &= ~(1 << position)
+        self._changed()
 
     def withdraw(self, oeo_id):
-        position = self._side.index(oeo_id)
+        """
+        :return: the position oeo_id was withdrawn from
+        """
+        position = self.index(oeo_id)
+        del self._locations[oeo_id]
         self._side[position] = None
+        self._empty |= 1 << position
+        self._changed()
+        return position
+
+    def _changed(self):
+        self._fielded = tuple(oeo_id for oeo_id in self._side
+                              if oeo_id is not None)
+        self._empty_positions = tuple(position for position
+                                      in range(self._max_fielded)
+                                      if self._empty >> position & 1)
 
     def __str__(self):
         return "%s" % self._side
@@ -0,0 +1,72 @@
+"""
+Direct-call hooks for the decisions a battle needs
+
+A Hook holds handlers added with += and removed with -=, as the axel events
+it replaces did, but calls them directly on the calling thread and returns
+the result of the first handler itself rather than a tuple of
+(flag, result, handler) per handler.
+"""
+from enum import Enum, unique
+
+
+@unique
+class Validation(Enum):
+    """
+    How thoroughly a battle checks the decisions returned by its hooks
+    """
+    # Check every decision
+    Full = 1
+    # Check every decision unless Python is run with -O, like an assert
+    Debug = 2
+    # Trust every decision
+    Off = 3
+
+    def __repr__(self):
+        return "Validation.%s" % self.name
+
+    @property
+    def enabled(self):
+        """
+        :return: True if decisions are to be checked
+        """
+        return self is Validation.Full or \
+            (self is Validation.Debug and __debug__)
+
+
+class Hook(object):
+    """
+    Handlers called in the order they were added
+    """
+    __slots__ = ("_name", "_handlers")
+
+    def __init__(self, name):
+        self._name = name
+        self._handlers = []
+
+    def __iadd__(self, handler):
+        self._handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self._handlers.remove(handler)
+        return self
+
+    def __len__(self):
+        return len(self._handlers)
+
+    def __call__(self, *args):
+        """
+        Call every handler with args
+
+        :return: the result of the first handler
+        """
+        handlers = self._handlers
+        if not handlers:
+            raise Exception(f"No handler for {self._name}")
+        result = handlers[0](*args)
+        for handler in handlers[1:]:
+            handler(*args)
+        return result
+
+    def __repr__(self):
+        return "Hook(%r, %r)" % (self._name, self._handlers)
@@ -0,0 +1,520 @@
+"""
+Host many battles in one process, stepping each one as its decisions arrive
+
+Usage: python -m battlesim.host [--host ADDRESS] [--port N]
+                                [--max-battles N] [--max-memory MB]
+
+The server speaks newline-delimited JSON over TCP, one response per
+request:
+
+    {"op": "create", "teams": {team_id: team definition, ...}, "seed": N}
+    {"op": "pending", "battle_id": ...}
+    {"op": "decide", "battle_id": ..., "team": team_id, "decision": {...}}
+    {"op": "remove", "battle_id": ...}
+    {"op": "stats"}
+
+Team definitions are as for battlesim.runner, and the seed is optional. A
+battle created with a seed draws from its own RandomStream, so it plays out
+the same for the same decisions. A deployment decision is
+{position: oeo_id} and an action decision is
+{oeo_id: {"move": move_id, "target": oeo_id}}.
+
+A decision that is not valid for the request it answers is rejected with
+an error and the battle keeps waiting for that decision.
+
+A create request is checked before its battle is built: the host must
+have room for another battle and each team at most max_team_size oeo of at
+most max_moves moves, with 1 to max_fielded of them fielded at once.
+
+With --max-memory, a battle is only admitted if the host's battles fit in
+the limit, and the battles are measured again every remeasure_turns turns
+as they grow. A battle that grows past the limit is ended with an out of
+memory error, which pending reports.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import sys
+from collections import deque
+from enum import Enum
+from types import ModuleType
+from core import Move, RandomStream, SpeciesBase
+from .battle import Battle
+from .runner import build_team
+from .simevent import Action, SimEvent, SimEventType
+
+logger = logging.getLogger(__name__)
+
+
+def battle_memory(battle):
+    """
+    Estimate the bytes held by a battle's own state
+
+    The objects shared between battles, such as moves, species base data,
+    enums and modules (the random module is the default random stream), are
+    not counted.
+
+    :return: approximate size in bytes
+    """
+    seen = set()
+    size = 0
+    stack = [battle]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or \
+                isinstance(obj, (type, ModuleType, Enum, Move, SpeciesBase)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    value = getattr(obj, name, None)
+                    if value is not None:
+                        stack.append(value)
+    return size
+
+
+class HostedBattle(object):
+    """
+    A battle held by a BattleHost with its suspended battle loop
+    """
+    __slots__ = ("battle_id", "battle", "steps", "request", "victor",
+                 "memory", "measured_turn", "error")
+
+    def __init__(self, battle_id, battle):
+        self.battle_id = battle_id
+        self.battle = battle
+        self.steps = battle._steps()
+        # (decision type, team_id, args) awaiting a decision, None when the
+        # battle has ended
+        self.request = None
+        self.victor = None
+        self.memory = 0
+        # Turn number of the battle when memory was measured
+        self.measured_turn = None
+        # The exception that ended the battle loop, e.g. an invalid decision
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.request is None
+
+
+class BattleHost(object):
+    """
+    Keeps many battles resident and advances each one when the decision it
+    is waiting for is submitted
+    """
+    # Limits of the team definitions of create, checked before building
+    max_team_size = 6
+    max_moves = 4
+    max_fielded = 3
+    # Turns between measurements of a battle's memory, measuring walks the
+    # battle's whole object graph
+    remeasure_turns = 8
+
+    def __init__(self, max_battles=10000, max_memory=None):
+        """
+        :param max_battles: most battles hosted at once
+        :param max_memory: most bytes of battle state hosted at once, \
+                           unlimited if None. Battles are measured again \
+                           every remeasure_turns turns and one that grows \
+                           past the limit is ended
+        """
+        self._max_battles = max_battles
+        self._max_memory = max_memory
+        self._battles = {}
+        self._memory = 0
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._battles)
+
+    def __contains__(self, battle_id):
+        return battle_id in self._battles
+
+    def __getitem__(self, battle_id):
+        try:
+            return self._battles[battle_id]
+        except KeyError:
+            raise KeyError(f"No battle {battle_id} is hosted") from None
+
+    @property
+    def memory(self):
+        """
+        :return: bytes of battle state hosted, as measured on admission and,
+                 when there is a memory limit, again every remeasure_turns
+                 turns
+        """
+        return self._memory
+
+    def add(self, battle, battle_id=None):
+        """
+        Admit a battle and run it to its first decision
+
+        :return: battle_id
+        """
+        self._check_room()
+        memory = battle_memory(battle)
+        if self._max_memory is not None and \
+                self._memory + memory > self._max_memory:
+            raise Exception(f"Host is out of memory ({self._memory} of "
+                            f"{self._max_memory} bytes used)")
+        if battle_id is None:
+            battle_id = str(next(self._ids))
+        if battle_id in self._battles:
+            raise Exception(f"Battle {battle_id} is already hosted")
+        hosted = HostedBattle(battle_id, battle)
+        hosted.memory = memory
+        hosted.measured_turn = battle.turn_number
+        self._battles[battle_id] = hosted
+        self._memory += memory
+        self._advance(hosted, None)
+        return battle_id
+
+    def create(self, teams, battle_id=None, rng=None):
+        """
+        Build and admit a battle between two team definitions
+
+        :param teams: dict of team_id:team definition as for battlesim.runner
+        :param rng: RandomStream for the ivs and the battle's draws, the \
+                    random module if None
+        :return: battle_id
+        """
+        # Checked before anything is built, as the definitions may come
+        # from a remote client
+        self._check_room()
+        self._check_teams(teams)
+        (a_id, a_def), (b_id, b_def) = teams.items()
+        a_oeo = build_team(a_id, a_def, rng)
+        b_oeo = build_team(b_id, b_def, rng)
+        battle = Battle({**a_oeo, **b_oeo}, a_id, set(a_oeo),
+                        a_def["max_fielded"], b_id, set(b_oeo),
+                        b_def["max_fielded"], rng=rng)
+        return self.add(battle, battle_id)
+
+    def _check_room(self):
+        if len(self._battles) >= self._max_battles:
+            raise Exception(f"Host is full ({self._max_battles} battles)")
+        if self._max_memory is not None and \
+                self._memory >= self._max_memory:
+            raise Exception(f"Host is out of memory ({self._memory} of "
+                            f"{self._max_memory} bytes used)")
+
+    def _check_teams(self, teams):
+        """
+        Raise if teams is not two team definitions within the host's limits
+        """
+        if not isinstance(teams, dict) or len(teams) != 2:
+            raise Exception("teams does not contain two team definitions")
+        for team_id, definition in teams.items():
+            oeo = definition.get("oeo") if isinstance(definition, dict) \
+                else None
+            if not isinstance(oeo, list) or \
+                    not 1 <= len(oeo) <= self.max_team_size:
+                raise Exception(f"Team {team_id} must have 1 to "
+                                f"{self.max_team_size} oeo")
+            max_fielded = definition.get("max_fielded")
+            if not isinstance(max_fielded, int) or \
+                    not 1 <= max_fielded <= self.max_fielded:
+                raise Exception(f"Team {team_id}'s max_fielded must be 1 to "
+                                f"{self.max_fielded}")
+            for o in oeo:
+                moves = o.get("moves") if isinstance(o, dict) else None
+                if not isinstance(moves, list) or \
+                        not 1 <= len(moves) <= self.max_moves:
+                    raise Exception(f"Each of team {team_id}'s oeo must "
+                                    f"have 1 to {self.max_moves} moves")
+
+    def pending(self, battle_id):
+        """
+        :return: (decision type, team_id, args) the battle is waiting for, \
+                 or None if it has ended
+        """
+        return self[battle_id].request
+
+    def waiting(self):
+        """
+        :return: list of (battle_id, request) of the battles waiting for a \
+                 decision
+        """
+        return [(battle_id, hosted.request) for battle_id, hosted
+                in self._battles.items() if hosted.request is not None]
+
+    def submit(self, battle_id, team_id, decision):
+        """
+        Give a battle the decision it is waiting for and run it to its next
+        decision or its end
+
+        A decision that is not valid for the request is rejected before it
+        reaches the battle, which keeps waiting for the decision.
+
+        :return: the next request, or None if the battle has ended
+        """
+        hosted = self[battle_id]
+        if hosted.request is None:
+            raise Exception(f"Battle {battle_id} has ended") from hosted.error
+        if hosted.request[1] != team_id:
+            raise Exception(f"Battle {battle_id} is waiting for "
+                            f"{hosted.request[1]}, not {team_id}")
+        self._check_decision(hosted, decision)
+        self._advance(hosted, decision)
+        return hosted.request
+
+    def remove(self, battle_id):
+        """
+        :return: the removed HostedBattle
+        """
+        hosted = self._battles.pop(battle_id)
+        self._memory -= hosted.memory
+        return hosted
+
+    def stats(self):
+        finished = sum(1 for hosted in self._battles.values()
+                       if hosted.finished)
+        return {"battles": len(self._battles), "finished": finished,
+                "memory": self._memory,
+                "memory_per_battle": self._memory / len(self._battles)
+                if self._battles else 0}
+
+    @staticmethod
+    def _check_decision(hosted, decision):
+        """
+        Raise if decision does not answer the battle's request, so that it
+        is rejected rather than ending the battle loop
+        """
+        battle = hosted.battle
+        decision_type, team_id, args = hosted.request
+        if not isinstance(decision, dict):
+            raise Exception(f"Invalid decision: {decision!r} is not a dict")
+        if decision_type == Battle.choose_deployments_decision:
+            benched, empty_positions = args
+            if len(set(decision.values())) != len(decision):
+                raise Exception("Invalid decision: an oeo can not be "
+                                "deployed to more than one position")
+            for position, oeo_id in decision.items():
+                if position not in empty_positions:
+                    raise Exception(f"Invalid decision: position {position} "
+                                    f"is not one of the empty positions "
+                                    f"{empty_positions}")
+                if oeo_id not in benched:
+                    raise Exception(f"Invalid decision: {oeo_id} is not one "
+                                    f"of {team_id}'s benched oeo {benched}")
+        else:
+            oeo_requiring_actions, = args
+            for oeo_id, action in decision.items():
+                if oeo_id not in oeo_requiring_actions:
+                    raise Exception(f"Invalid decision: {oeo_id} is not one "
+                                    f"of the oeo requiring actions "
+                                    f"{oeo_requiring_actions}")
+                if not isinstance(action, SimEvent) or \
+                        action.event_type is not SimEventType.UseMove:
+                    raise Exception(f"Invalid decision: the action of "
+                                    f"{oeo_id} is not a move")
+                if action.data["move_id"] not in battle.oeo[oeo_id].moves:
+                    raise Exception(f"Invalid decision: {oeo_id} does not "
+                                    f"know {action.data['move_id']}")
+                if action.data["target_id"] not in battle.oeo:
+                    raise Exception(f"Invalid decision: "
+                                    f"{action.data['target_id']} is not in "
+                                    f"the battle")
+
+    def _advance(self, hosted, decision):
+        try:
+            hosted.request = hosted.steps.send(decision)
+        except StopIteration as stop:
+            hosted.request = None
+            hosted.victor = stop.value
+        except Exception as e:
+            # The battle loop can not be resumed after raising
+            hosted.request = None
+            hosted.error = e
+            raise
+        else:
+            # Battles grow as they run, e.g. their processed event history,
+            # so they are measured again every few turns to keep to the limit
+            if self._max_memory is not None and \
+                    hosted.battle.turn_number - hosted.measured_turn >= \
+                    self.remeasure_turns:
+                self._measure(hosted)
+
+    def _measure(self, hosted):
+        """
+        Update the memory of a battle, ending it if the host no longer fits
+        in its limit
+        """
+        memory = battle_memory(hosted.battle)
+        self._memory += memory - hosted.memory
+        hosted.memory = memory
+        hosted.measured_turn = hosted.battle.turn_number
+        if self._max_memory is not None and self._memory > self._max_memory:
+            hosted.steps.close()
+            hosted.request = None
+            hosted.error = Exception(f"Host is out of memory "
+                                     f"({self._memory} of {self._max_memory}"
+                                     f" bytes used)")
+            logger.warning("Ended battle %s: %s", hosted.battle_id,
+                           hosted.error)
+
+
+class PolicyClient(object):
+    """
+    In-process stand-in for the players of hosted battles, deciding for
+    every waiting battle with a Policy per team
+    """
+    def __init__(self, host, policy_class):
+        self._host = host
+        self._policy_class = policy_class
+        self._policies = {}
+
+    def decide_all(self):
+        """
+        Submit one decision to every battle waiting for one
+
+        :return: number of decisions submitted
+        """
+        waiting = self._host.waiting()
+        for battle_id, (decision_type, team_id, args) in waiting:
+            key = (battle_id, team_id)
+            if key not in self._policies:
+                self._policies[key] = self._policy_class(
+                    self._host[battle_id].battle, team_id)
+            decide = getattr(self._policies[key], decision_type)
+            self._host.submit(battle_id, team_id, decide(team_id, *args))
+        return len(waiting)
+
+    def run(self):
+        """
+        Decide for every hosted battle until they have all ended
+
+        :return: number of decisions submitted
+        """
+        decisions = 0
+        while True:
+            count = self.decide_all()
+            if not count:
+                return decisions
+            decisions += count
+
+
+def _decision_from_json(decision_type, decision):
+    if decision_type == Battle.choose_deployments_decision:
+        return {int(position): oeo_id for position, oeo_id
+                in decision.items()}
+    return {oeo_id: Action.use_move(action["move"], action["target"])
+            for oeo_id, action in decision.items()}
+
+
+def _request_to_json(request):
+    if request is None:
+        return None
+    decision_type, team_id, args = request
+    return {"decision": decision_type, "team": team_id, "args": args}
+
+
+def handle_request(host, request):
+    """
+    :param request: dict of a protocol request
+    :return: dict of the response
+    """
+    op = request.get("op")
+    try:
+        if op == "create":
+            seed = request.get("seed")
+            battle_id = host.create(request["teams"],
+                                    request.get("battle_id"),
+                                    RandomStream(seed)
+                                    if seed is not None else None)
+            return {"ok": True, "battle_id": battle_id,
+                    "pending": _request_to_json(host.pending(battle_id))}
+        elif op == "pending":
+            hosted = host[request["battle_id"]]
+            return {"ok": True, "pending": _request_to_json(hosted.request),
+                    "victor": hosted.victor,
+                    "error": str(hosted.error) if hosted.error else None}
+        elif op == "decide":
+            hosted = host[request["battle_id"]]
+            if hosted.request is None:
+                raise Exception(f"Battle {hosted.battle_id} has ended")
+            decision = _decision_from_json(hosted.request[0],
+                                           request["decision"])
+            pending = host.submit(hosted.battle_id, request["team"], decision)
+            return {"ok": True, "pending": _request_to_json(pending),
+                    "victor": hosted.victor,
+                    "error": str(hosted.error) if hosted.error else None}
+        elif op == "remove":
+            hosted = host.remove(request["battle_id"])
+            return {"ok": True, "victor": hosted.victor}
+        elif op == "stats":
+            return {"ok": True, **host.stats()}
+        else:
+            raise Exception(f"Unknown op: {op!r}")
+    except Exception as e:
+        logger.debug("Request %s failed", request, exc_info=True)
+        return {"ok": False, "error": str(e)}
+
+
+async def serve(host, address="127.0.0.1", port=0):
+    """
+    Start serving host over newline-delimited JSON on TCP
+
+    :return: the asyncio Server
+    """
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e}"}
+                else:
+                    response = handle_request(host, request)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    return await asyncio.start_server(handle_connection, address, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Host battles over newline-delimited JSON on TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-battles", type=int, default=10000)
+    parser.add_argument("--max-memory", type=int,
+                        help="most MB of battle state to host")
+    args = parser.parse_args()
+
+    host = BattleHost(args.max_battles, args.max_memory * 1024 * 1024
+                      if args.max_memory else None)
+
+    async def run():
+        server = await serve(host, args.host, args.port)
+        address = server.sockets[0].getsockname()
+        print(f"Hosting battles on {address[0]}:{address[1]}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Many battles between the same two teams advanced together in lockstep
+
+LockstepBattles keeps the state of K battles in NumPy arrays, one row per
+battle, and advances every unfinished battle one turn per step: the speed
+ordering of the turn's moves, their damage, fainting, deployments and the
+checks for the end of the battle are each a handful of array operations
+over all of the battles rather than Python code per battle and per oeo.
+
+The rules are those of Battle.run with UseMove actions only, and damage
+comes from the batched damage function of battlesim.damage, so the
+outcomes follow the same distribution as running each battle with Battle.
+The decisions are made by vectorized versions of the scripted policies in
+battlesim.policy, named as they are there. The random draws come from one
+stream for all of the battles, so a battle does not make the same draws as
+Battle would with the same seed.
+"""
+import numpy as np
+from core import MoveCategory, RandomStream, Stats, move_catalog, \
+    species_registry
+from core.move import MoveCatalog
+from .damage import get_damage_function
+
+# Stat columns, in the order of Stats
+hp_stat, attack_stat, defence_stat, sp_attack_stat, sp_defence_stat, \
+    speed_stat = range(6)
+draw = 2
+
+
+def _stats(base, ivs, evs, level):
+    """
+    calculate_hp_stat and calculate_stat over arrays of [..., stat], in the
+    same floating point arithmetic so that the results are identical
+
+    :return: int64 array of the stats
+    """
+    stats = np.floor(((ivs + 2 * base + evs / 4) * level[..., None]) / 100
+                     + 5)
+    stats[..., hp_stat] = np.floor(((ivs[..., hp_stat] + 2 * base[..., hp_stat]
+                                     + evs[..., hp_stat] / 4 + 100) * level)
+                                   / 100 + 10)
+    return stats.astype(np.int64)
+
+
+class LockstepBattles(object):
+    """
+    K battles between the oeo of two team definitions, each with their own
+    ivs where the definitions do not give them
+    """
+    policies = ("first", "random")
+
+    def __init__(self, teams, policy_names, battles, rng=None):
+        """
+        :param teams: dict of team_id:team definition, as for the runner
+        :param policy_names: dict of team_id:name of the policy for that team
+        :param battles: number of battles, K
+        :param rng: RandomStream to draw the ivs and every random draw of the
+                    battles from, a freshly seeded one if None
+        """
+        assert len(teams) == 2, "teams does not contain two team definitions"
+        unknown = [name for name in policy_names.values()
+                   if name not in self.policies]
+        if unknown:
+            raise Exception(f"Lockstep battles have no policies named "
+                            f"{unknown}, choose from {list(self.policies)}")
+        self._rng = rng if rng is not None else RandomStream()
+        self._team_ids = tuple(teams)
+        self._random_policy = tuple(policy_names[team_id] == "random"
+                                    for team_id in self._team_ids)
+        definitions = [o for team in teams.values() for o in team["oeo"]]
+        counts = [len(team["oeo"]) for team in teams.values()]
+        # Oeo are columns, team A's then team B's, in definition order
+        self._team_columns = ((0, counts[0]), (counts[0], sum(counts)))
+        k, n = battles, sum(counts)
+
+        moves = move_catalog.get_many(sorted({m for o in definitions
+                                              for m in o["moves"]}))
+        move_ids = {name: i for i, name in enumerate(moves)}
+        if any(m.category not in (MoveCategory.Physical, MoveCategory.Special)
+               for m in moves.values()):
+            raise Exception("Lockstep battles only support Physical and "
+                            "Special moves")
+        self._power = np.array([m.power for m in moves.values()])
+        self._category = np.array([m.category.value for m in moves.values()])
+        self._move_element = np.array([m.element.value
+                                       for m in moves.values()])
+        # Lower keys act earlier, as for the stage of a UseMove event
+        self._priority_key = np.array([MoveCatalog.max_priority - m.priority
+                                       for m in moves.values()])
+        self._moves = np.zeros((n, max(len(o["moves"]) for o in definitions)),
+                               dtype=np.int64)
+        self._move_counts = np.array([len(o["moves"]) for o in definitions])
+        for column, o in enumerate(definitions):
+            self._moves[column, :len(o["moves"])] = [move_ids[m]
+                                                     for m in o["moves"]]
+        df_ids = {getattr(m, "df_id", "Standard") for m in moves.values()}
+        if len(df_ids) != 1:
+            raise Exception("Lockstep battles need every move to use the "
+                            "same damage function")
+        self._damage_function = get_damage_function(df_ids.pop(), batch=True)
+
+        bases = [species_registry.get(o["species"]) for o in definitions]
+        self._level = np.array([o["level"] for o in definitions])
+        self._elements = np.zeros((n, 2), dtype=np.int64)
+        for column, base in enumerate(bases):
+            self._elements[column, :len(base.elements)] = \
+                [e.value for e in base.elements]
+        ivs = np.empty((k, n, 6), dtype=np.int64)
+        evs = np.zeros((k, n, 6), dtype=np.int64)
+        for column, o in enumerate(definitions):
+            if "ivs" in o:
+                ivs[:, column] = tuple(Stats.from_dict(o["ivs"]))
+            else:
+                ivs[:, column] = self._rng.randints(0, 31, k * 6) \
+                    .reshape(k, 6)
+            if "evs" in o:
+                evs[:, column] = tuple(Stats.from_dict(o["evs"]))
+        base_stats = np.array([tuple(base.base_stats) for base in bases])
+        self._stats = _stats(base_stats, ivs, evs, self._level)
+        self._hp = self._stats[:, :, hp_stat].copy()
+
+        # Rank 0 is the fastest, ties going to the earlier column as in
+        # SpeedRanking
+        order = np.argsort(-self._stats[:, :, speed_stat], axis=1,
+                           kind="stable")
+        self._rank = np.empty((k, n), dtype=np.int64)
+        np.put_along_axis(self._rank, order, np.arange(n)[None, :], axis=1)
+
+        # The column of the oeo in each position of each side, -1 if empty
+        self._field = tuple(np.full((k, team["max_fielded"]), -1,
+                                    dtype=np.int64) for team in teams.values())
+        self._fielded = np.zeros((k, n), dtype=bool)
+        self._active = np.ones(k, dtype=bool)
+        # 0 for team A, 1 for team B, draw for a draw, -1 while unfinished
+        self._victor = np.full(k, -1, dtype=np.int8)
+        self._turns = np.zeros(k, dtype=np.int64)
+        self._skipped = 0
+
+        self._settle(np.arange(k))
+
+    @property
+    def battles(self):
+        return len(self._active)
+
+    @property
+    def running(self):
+        """
+        :return: number of battles that have not ended
+        """
+        return int(self._active.sum())
+
+    @property
+    def turns(self):
+        """
+        :return: array of the turn number each battle is on, or ended on
+        """
+        return self._turns
+
+    @property
+    def hp(self):
+        """
+        :return: array of [battle, oeo] HP, the oeo of team A then team B
+        """
+        return self._hp
+
+    @property
+    def full_hp(self):
+        return self._stats[:, :, hp_stat]
+
+    @property
+    def skipped(self):
+        """
+        :return: number of moves not made as their user or target had left
+                 the field
+        """
+        return self._skipped
+
+    def victors(self):
+        """
+        :return: list of the team_id of the victor of each battle, "DRAW" for
+                 a draw or None if it has not ended
+        """
+        names = {0: self._team_ids[0], 1: self._team_ids[1], draw: "DRAW",
+                 -1: None}
+        return [names[v] for v in self._victor.tolist()]
+
+    def damage_dealt(self):
+        """
+        :return: dict of team_id:array of the damage dealt to the opposing
+                 team in each battle
+        """
+        lost = self.full_hp - self._hp
+        (a_start, a_stop), (b_start, b_stop) = self._team_columns
+        return {self._team_ids[0]: lost[:, b_start:b_stop].sum(axis=1),
+                self._team_ids[1]: lost[:, a_start:a_stop].sum(axis=1)}
+
+    def run(self):
+        """
+        Step until every battle has ended
+
+        :return: list of the victor of each battle, as for victors
+        """
+        while self.step():
+            pass
+        return self.victors()
+
+    def step(self):
+        """
+        Play one turn of every battle that has not ended
+
+        :return: number of battles that have not ended
+        """
+        rows = np.flatnonzero(self._active)
+        if not len(rows):
+            return 0
+        self._turns[rows] += 1
+        users, moves, targets = self._choose_actions(rows)
+
+        # Each battle's moves in the order of their events: by move
+        # priority, then the speed rank of their user, empty positions last
+        fielded = users >= 0
+        safe_users = np.where(fielded, users, 0)
+        keys = np.where(fielded, self._priority_key[moves] *
+                        self._rank.shape[1] +
+                        self._rank[rows[:, None], safe_users],
+                        np.iinfo(np.int64).max)
+        order = np.argsort(keys, axis=1, kind="stable")
+        users = np.take_along_axis(users, order, axis=1)
+        moves = np.take_along_axis(moves, order, axis=1)
+        targets = np.take_along_axis(targets, order, axis=1)
+
+        for event in range(users.shape[1]):
+            user, move, target = users[:, event], moves[:, event], \
+                targets[:, event]
+            scheduled = self._active[rows] & (user >= 0)
+            valid = scheduled & \
+                self._fielded[rows, np.maximum(user, 0)] & \
+                self._fielded[rows, np.maximum(target, 0)] & (target >= 0)
+            self._skipped += int((scheduled & ~valid).sum())
+            if not valid.any():
+                continue
+            battles = rows[valid]
+            user, move, target = user[valid], move[valid], target[valid]
+            stats = self._stats
+            damage = self._damage_function(
+                user_level=self._level[user],
+                user_attack=stats[battles, user, attack_stat],
+                user_sp_attack=stats[battles, user, sp_attack_stat],
+                user_elements=self._elements[user],
+                move_power=self._power[move],
+                move_category=self._category[move],
+                move_element=self._move_element[move],
+                target_defence=stats[battles, target, defence_stat],
+                target_sp_defence=stats[battles, target, sp_defence_stat],
+                target_elements=self._elements[target], rng=self._rng)
+            hp = np.maximum(self._hp[battles, target] - damage, 0)
+            self._hp[battles, target] = hp
+            fainted = battles[hp == 0]
+            if len(fainted):
+                self._settle(fainted)
+        return self.running
+
+    def _choose_actions(self, rows):
+        """
+        :return: arrays of [battle, position] of the user, move and target
+                 of each position of the field, team A's then team B's, -1
+                 for empty positions
+        """
+        users, moves, targets = [], [], []
+        for team in (0, 1):
+            field = self._field[team][rows]
+            opponents = self._field[1 - team][rows]
+            random_policy = self._random_policy[team]
+            occupied = field >= 0
+            column = np.where(occupied, field, 0)
+            if random_policy:
+                u = self._rng.randoms(2 * field.size).reshape(2, *field.shape)
+                choice = (u[0] * self._move_counts[column]).astype(np.int64)
+            else:
+                choice = np.zeros(field.shape, dtype=np.int64)
+            moves.append(self._moves[column, choice])
+            # The chosen index into the opposing oeo on the field, in
+            # position order
+            available = (opponents >= 0)
+            if random_policy:
+                index = (u[1] * available.sum(axis=1)[:, None]) \
+                    .astype(np.int64)
+            else:
+                index = np.zeros(field.shape, dtype=np.int64)
+            position = (np.cumsum(available, axis=1)[:, None, :] >
+                        index[:, :, None]).argmax(axis=2)
+            targets.append(np.take_along_axis(opponents, position, axis=1))
+            users.append(field)
+        return np.hstack(users), np.hstack(moves), np.hstack(targets)
+
+    def _settle(self, rows):
+        """
+        Withdraw the unconscious oeo of the battles in rows from the field,
+        end those battles that are over and let the others deploy, as Battle
+        does before each event
+        """
+        rows = rows[self._active[rows]]
+        if not len(rows):
+            return
+        hp, fielded = self._hp, self._fielded
+        for field in self._field:
+            side = field[rows]
+            occupied = side >= 0
+            fainted = occupied & (np.take_along_axis(
+                hp[rows], np.where(occupied, side, 0), axis=1) <= 0)
+            if fainted.any():
+                battle, position = np.nonzero(fainted)
+                fielded[rows[battle], side[battle, position]] = False
+                side[fainted] = -1
+                field[rows] = side
+
+        conscious = hp[rows] > 0
+        (a_start, a_stop), (b_start, b_stop) = self._team_columns
+        a_conscious = conscious[:, a_start:a_stop].any(axis=1)
+        b_conscious = conscious[:, b_start:b_stop].any(axis=1)
+        ended = np.full(len(rows), -1, dtype=np.int8)
+        ended[~b_conscious] = 0
+        ended[~a_conscious] = 1
+        ended[~a_conscious & ~b_conscious] = draw
+        self._end(rows, ended)
+
+        rows = rows[ended < 0]
+        for team in (0, 1):
+            self._deploy(team, rows)
+        ended = np.full(len(rows), -1, dtype=np.int8)
+        ended[(self._field[1][rows] < 0).all(axis=1)] = 0
+        ended[(self._field[0][rows] < 0).all(axis=1)] = 1
+        self._end(rows, ended)
+
+    def _end(self, rows, victors):
+        over = victors >= 0
+        self._victor[rows[over]] = victors[over]
+        self._active[rows[over]] = False
+
+    def _deploy(self, team, rows):
+        """
+        Fill the empty positions of team's side in the battles in rows with
+        its conscious oeo that are not on the field, chosen by its policy
+        """
+        field = self._field[team]
+        empty = field[rows] < 0
+        start, stop = self._team_columns[team]
+        benched = (self._hp[rows, start:stop] > 0) & \
+            ~self._fielded[rows, start:stop]
+        need = empty.any(axis=1) & benched.any(axis=1)
+        if not need.any():
+            return
+        rows, empty, benched = rows[need], empty[need], benched[need]
+        # The order the policy deploys the benched oeo in: their order in
+        # the team, or a random one as for random.sample
+        if self._random_policy[team]:
+            keys = self._rng.randoms(benched.size).reshape(benched.shape)
+        else:
+            keys = np.broadcast_to(np.arange(stop - start, dtype=float),
+                                   benched.shape)
+        order = np.argsort(np.where(benched, keys, np.inf), axis=1,
+                           kind="stable") + start
+        available = benched.sum(axis=1)
+        taken = np.zeros(len(rows), dtype=np.int64)
+        for position in range(field.shape[1]):
+            put = np.flatnonzero(empty[:, position] & (taken < available))
+            if not len(put):
+                continue
+            column = order[put, taken[put]]
+            field[rows[put], position] = column
+            self._fielded[rows[put], column] = True
+            taken[put] += 1
+
+    def __repr__(self):
+        return "LockstepBattles(%r, %d battles, %d running)" % \
+               (self._team_ids, self.battles, self.running)
@@ -0,0 +1,590 @@
+"""
+Species x move x species matchup table, precomputed from the game data
+
+For every (attacker species, move, defender species) the table holds the
+same type attack bonus and element effectiveness of the standard damage
+formula, and at each reference level the range of damage a newly created
+attacker can deal to a newly created defender of the same level: any IVs,
+no EVs and any randomness factor.
+
+The table is built from the game data read through gamedata, and cached
+on disk next to it with the hash of each species, move and the element
+effectiveness table it was built from. When a species or move changes,
+only the matchups involving that species or move are recomputed. A species
+or move that is not valid is left out of the table.
+
+Building and loading the table is an explicit step: the damage functions
+only look up the table that get_matchup_table has loaded, and compute the
+modifiers themselves until then, e.g. in the runner without --matchups.
+
+Update the cache from the repository root using python -m battlesim.matchup
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+from collections import namedtuple
+from pathlib import Path
+import numpy as np
+from core import Element, MoveCategory, gamedata, species_registry
+from core.move import MoveCatalog
+from core.species import SpeciesRegistry
+from . import damage as damage_functions
+from .effectiveness import EffectivenessTable
+
+logger = logging.getLogger(__name__)
+
+cache_path = gamedata.data_root / "matchups.cache"
+cache_version = 2
+reference_levels = (5, 25, 50, 75, 100)
+max_iv = 31
+# Attackers whose damage is computed at once, bounding the memory used
+attacker_chunk = 16
+
+Matchup = namedtuple("Matchup", "attacker move defender stab effectiveness "
+                                "min_damage max_damage min_hp max_hp")
+
+_effectiveness_key = ("battle", "element_effectiveness")
+_matchup_table = None
+
+
+class MatchupTable(object):
+    """
+    Dense arrays indexed by the sorted species and move names:
+
+    stab[attacker, move], effectiveness[move, defender],
+    damage[attacker, move, defender, level, (min, max)] and
+    hp[species, level, (min, max)]
+    """
+    __slots__ = ("_species", "_moves", "_levels", "_species_index",
+                 "_move_index", "_level_index", "_species_elements",
+                 "_stab", "_effectiveness", "_damage", "_hp", "_modifier",
+                 "_stab_rows", "_effectiveness_rows", "_generation")
+
+    def __init__(self, species, moves, levels, species_elements,
+                 move_elements, stab, effectiveness, damage, hp):
+        """
+        :param species_elements: dict of species:tuple of its Elements
+        :param move_elements: dict of move name:its Element
+        """
+        self._species = tuple(species)
+        self._moves = tuple(moves)
+        self._levels = tuple(levels)
+        self._species_index = {name: i for i, name in enumerate(species)}
+        self._move_index = {name: i for i, name in enumerate(moves)}
+        self._level_index = {level: i for i, level in enumerate(levels)}
+        self._species_elements = species_elements
+        self._stab = stab
+        self._effectiveness = effectiveness
+        self._damage = damage
+        self._hp = hp
+        self._modifier = None
+        # Dicts of floats are faster to index by name than the arrays for
+        # the scalar damage path
+        self._stab_rows = {attacker: dict(zip(moves, row)) for attacker, row
+                           in zip(species, stab.tolist())}
+        self._effectiveness_rows = {
+            move: (move_elements[move], dict(zip(species, row)))
+            for move, row in zip(moves, effectiveness.tolist())}
+        self._generation = None
+
+    @property
+    def species(self):
+        return self._species
+
+    @property
+    def moves(self):
+        return self._moves
+
+    @property
+    def levels(self):
+        return self._levels
+
+    @property
+    def stab(self):
+        return self._stab
+
+    @property
+    def effectiveness(self):
+        return self._effectiveness
+
+    @property
+    def modifier(self):
+        """
+        :return: array of stab x effectiveness indexed by
+                 [attacker, move, defender]
+        """
+        if self._modifier is None:
+            self._modifier = self._stab[:, :, None] * \
+                self._effectiveness[None, :, :]
+        return self._modifier
+
+    @property
+    def damage(self):
+        return self._damage
+
+    @property
+    def hp(self):
+        return self._hp
+
+    @property
+    def generation(self):
+        """
+        :return: the species_registry generation the table was checked
+                 against, None if it was not
+        """
+        return self._generation
+
+    def elements(self, species):
+        """
+        :return: tuple of the Elements of species in the table
+        """
+        return self._species_elements[species]
+
+    def modifiers(self, user, move, target):
+        """
+        :return: (stab, element effectiveness) of move from user on target,
+                 None if the table does not cover them
+        """
+        try:
+            element, row = self._effectiveness_rows[move.name]
+            # A move of the same name from another catalog may differ
+            if element is move.element:
+                return self._stab_rows[user.species][move.name], \
+                    row[target.species]
+        except KeyError:
+            pass
+        return None
+
+    def damage_range(self, attacker, move, defender, level):
+        """
+        :return: (min, max) damage of move from a newly created attacker
+                 species on a newly created defender species, both at level
+        """
+        low, high = self._damage[self._species_index[attacker],
+                                 self._move_index[move],
+                                 self._species_index[defender],
+                                 self._level(level)]
+        return int(low), int(high)
+
+    def hp_range(self, species, level):
+        """
+        :return: (min, max) full HP of a newly created species at level
+        """
+        low, high = self._hp[self._species_index[species], self._level(level)]
+        return int(low), int(high)
+
+    def matchups(self, level):
+        """
+        :return: generator of a Matchup for every (attacker, move, defender)
+                 at level
+        """
+        level = self._level(level)
+        stab = self._stab.tolist()
+        effectiveness = self._effectiveness.tolist()
+        damage = self._damage[:, :, :, level].tolist()
+        hp = self._hp[:, level].tolist()
+        for a, attacker in enumerate(self._species):
+            for m, move in enumerate(self._moves):
+                for d, defender in enumerate(self._species):
+                    yield Matchup(attacker, move, defender, stab[a][m],
+                                  effectiveness[m][d], *damage[a][m][d],
+                                  *hp[d])
+
+    def _level(self, level):
+        try:
+            return self._level_index[level]
+        except KeyError:
+            raise Exception(f"Level {level} is not one of the reference "
+                            f"levels {self._levels}") from None
+
+    def _drop_modifiers(self, species):
+        """
+        Stop the scalar damage path using the table for species
+        """
+        for name in species:
+            self._stab_rows.pop(name, None)
+            for _, row in self._effectiveness_rows.values():
+                row.pop(name, None)
+
+    def __repr__(self):
+        return "MatchupTable(%d species, %d moves, levels %r)" % \
+               (len(self._species), len(self._moves), self._levels)
+
+
+def _read_entries(root):
+    """
+    Read the game data the table is built from through gamedata, so that
+    the package's data comes from its bundle when there is one
+
+    :param root: directory holding oeo, moves and battle, the package's
+                 data directory if None
+    :return: dict of (category, name):data
+    """
+    def directory(category):
+        return root / category if root is not None else None
+
+    entries = {_effectiveness_key: gamedata.read_json(
+        *_effectiveness_key, directory("battle"))}
+    for category in ("oeo", "moves"):
+        for name in gamedata.list_names(category, directory(category)):
+            if category == "moves" and name in MoveCatalog.templates:
+                continue
+            try:
+                entries[category, name] = gamedata.read_json(
+                    category, name, directory(category))
+            except Exception as e:
+                logger.warning(f"Leaving {category}/{name} out of the "
+                               f"matchup table: {e}")
+    return entries
+
+
+def _hash_entry(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode(
+        "utf-8")).hexdigest()
+
+
+def _species_record(name, data):
+    base = SpeciesRegistry.from_json_dict(name, data)
+    return tuple(e.value for e in base.elements), tuple(base.base_stats)
+
+
+def _move_record(name, data):
+    move = MoveCatalog.validate(name, data)
+    return move.element.value, move.category.value, move.power
+
+
+def _damage_path(path):
+    return path.with_name(path.name + ".npy")
+
+
+def _read_cache(path, levels):
+    """
+    :return: the cache at path with its damage array memory mapped, or None
+             if there is no usable cache for levels
+    """
+    try:
+        cache = pickle.loads(path.read_bytes())
+        damage_path = _damage_path(path)
+        stat = damage_path.stat()
+        if cache.get("version") != cache_version or \
+                cache["levels"] != levels:
+            return None
+        if cache["damage_signature"] != (stat.st_size, stat.st_mtime_ns):
+            logger.warning(f"Ignoring matchup cache {path} as "
+                           f"{damage_path} does not match it")
+            return None
+        cache["damage"] = np.load(damage_path, mmap_mode="r")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable matchup cache {path}: {e}")
+        return None
+    return cache
+
+
+def _write_cache(path, cache, damage):
+    damage_path = _damage_path(path)
+    try:
+        if damage is not None:
+            tmp = damage_path.with_name(f"{damage_path.name}.{os.getpid()}"
+                                        f".tmp")
+            with tmp.open("wb") as f:
+                np.save(f, damage)
+            os.replace(tmp, damage_path)
+        stat = damage_path.stat()
+        cache = dict(cache, damage_signature=(stat.st_size,
+                                              stat.st_mtime_ns))
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(cache,
+                                     protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not write matchup cache {path}: {e}")
+
+
+def _new_stat(base, iv, level, hp=False):
+    """
+    calculate_stat or calculate_hp_stat with no EVs, in the same floating
+    point arithmetic so that the results are identical
+    """
+    if hp:
+        return np.floor(((iv + 2 * base + 0 / 4 + 100) * level) / 100 + 10)
+    return np.floor(((iv + 2 * base + 0 / 4) * level) / 100 + 5)
+
+
+class _Builder(object):
+    """
+    The species and move data of a table as arrays, to compute any block of
+    its matchups from
+    """
+    def __init__(self, species, moves, species_records, move_records,
+                 effectiveness_table, levels):
+        self.elements = np.zeros((len(species), 2), dtype=np.int64)
+        self.base = np.empty((len(species), 6), dtype=np.int64)
+        for i, name in enumerate(species):
+            elements, base_stats = species_records[name]
+            self.elements[i, :len(elements)] = elements
+            self.base[i] = base_stats
+        records = [move_records[name] for name in moves]
+        self.move_element = np.array([r[0] for r in records], dtype=np.int64)
+        self.category = np.array([r[1] for r in records], dtype=np.int64)
+        self.power = np.array([r[2] for r in records], dtype=np.int64)
+        self.levels = np.array(levels, dtype=np.int64)
+
+        self.stab = np.where((self.elements[:, None, :] ==
+                              self.move_element[None, :, None]).any(axis=2),
+                             1.5, 1.0)
+        self.effectiveness = effectiveness_table.dual[
+            self.move_element[:, None], self.elements[None, :, 0],
+            self.elements[None, :, 1]]
+        hp = self.base[:, 0, None]
+        self.hp = np.stack([_new_stat(hp, 0, self.levels, True),
+                            _new_stat(hp, max_iv, self.levels, True)],
+                           axis=-1).astype(np.int32)
+
+    def damage(self, attackers, moves, defenders):
+        """
+        :return: int32 array of [attacker, move, defender, level, (min, max)]
+                 damage for the given species and move indices
+        """
+        attackers, moves = np.asarray(attackers), np.asarray(moves)
+        defenders = np.asarray(defenders)
+        physical = self.category[moves] == MoveCategory.Physical.value
+        special = self.category[moves] == MoveCategory.Special.value
+        levels = self.levels
+        # Columns of base: hp attack defence sp_attack sp_defence speed
+        attack_column = np.where(physical, 1, 3)
+        defence_column = np.where(physical, 2, 4)
+        attack = self.base[attackers[:, None], attack_column[None, :],
+                           None]
+        defence = self.base[defenders[None, :], defence_column[:, None],
+                            None]
+        modifier = self.stab[attackers[:, None], moves[None, :]][:, :, None] \
+            * self.effectiveness[moves[:, None], defenders[None, :]][None]
+        power = self.power[moves][None, :, None, None]
+        level_factor = (2 * levels + 10) / 250
+
+        damage = np.zeros((len(attackers), len(moves), len(defenders),
+                           len(levels), 2), dtype=np.int32)
+        # Least damage from the weakest attacker on the toughest defender
+        # with the lowest randomness factor, most the other way around
+        for i, (attack_iv, defence_iv, r) in enumerate(((0, max_iv, 85),
+                                                        (max_iv, 0, 100))):
+            a = _new_stat(attack, attack_iv, levels)[:, :, None, :]
+            d = _new_stat(defence, defence_iv, levels)[None, :, :, :]
+            # Multiplied in the same order as calculate_standard_damage so
+            # the floored damage is identical
+            raw_damage = level_factor * (a / d) * power + 2
+            damage[..., i] = np.floor(raw_damage *
+                                      (modifier * (r / 100))[..., None])
+        # Status moves deal no damage
+        damage[:, ~(physical | special)] = 0
+        return damage
+
+    def fill(self, damage, attackers, moves, defenders):
+        """
+        Compute the damage of the given indices into damage, a few attackers
+        at a time
+        """
+        moves, defenders = list(moves), list(defenders)
+        attackers = list(attackers)
+        if not (attackers and moves and defenders):
+            return 0
+        for start in range(0, len(attackers), attacker_chunk):
+            chunk = attackers[start:start + attacker_chunk]
+            damage[np.ix_(chunk, moves, defenders)] = \
+                self.damage(chunk, moves, defenders)
+        return len(attackers) * len(moves) * len(defenders)
+
+
+def load_matchup_table(root=None, path=None, levels=reference_levels):
+    """
+    Load the matchup table for the game data under root from the cache at
+    path, recomputing the matchups of any species or move that has changed
+    since the cache was written, and update the cache if it can be written
+
+    :param root: directory holding oeo, moves and battle, the package's
+                 data directory if None
+    :param path: path of the cache, cache_path if None
+    :return: MatchupTable
+    """
+    root = Path(root) if root is not None else None
+    path = Path(path) if path is not None else cache_path
+    levels = tuple(levels)
+    cache = _read_cache(path, levels)
+    known = cache["hashes"] if cache is not None else {}
+    entries = _read_entries(root)
+    hashes = {key: _hash_entry(data) for key, data in entries.items()}
+
+    def unchanged(key):
+        return cache is not None and known.get(key) == hashes[key]
+
+    records = {"oeo": {}, "moves": {}}
+    changed = {"oeo": set(), "moves": set()}
+    for key, data in entries.items():
+        category, name = key
+        if category not in records:
+            continue
+        if unchanged(key):
+            records[category][name] = cache["records"][category][name]
+            continue
+        try:
+            records[category][name] = _species_record(name, data) \
+                if category == "oeo" else _move_record(name, data)
+        except Exception as e:
+            # An invalid species or move is not covered by the table, so
+            # the damage functions compute its modifiers if it is used
+            logger.warning(f"Leaving {category}/{name} out of the matchup "
+                           f"table: {e}")
+            del hashes[key]
+            continue
+        changed[category].add(name)
+    if unchanged(_effectiveness_key):
+        single = cache["effectiveness"]
+    else:
+        single = EffectivenessTable.from_json_dict(
+            entries[_effectiveness_key]).single
+
+    species, moves = sorted(records["oeo"]), sorted(records["moves"])
+    builder = _Builder(species, moves, records["oeo"], records["moves"],
+                       EffectivenessTable(single), levels)
+    reusable = unchanged(_effectiveness_key) and \
+        not changed["oeo"] and not changed["moves"] and \
+        cache["species"] == species and cache["moves"] == moves
+    if reusable:
+        damage = cache["damage"]
+        write_damage = False
+    else:
+        shape = (len(species), len(moves), len(species), len(levels), 2)
+        if unchanged(_effectiveness_key):
+            old_species = {name: i for i, name in enumerate(cache["species"])}
+            old_moves = {name: i for i, name in enumerate(cache["moves"])}
+            changed_species = [i for i, name in enumerate(species)
+                               if name in changed["oeo"] or
+                               name not in old_species]
+            changed_moves = [i for i, name in enumerate(moves)
+                             if name in changed["moves"] or
+                             name not in old_moves]
+            if cache["species"] == species and cache["moves"] == moves:
+                # Only the contents of files changed, so the indices of the
+                # unchanged matchups are the same
+                damage = np.array(cache["damage"])
+            else:
+                # Gather the unchanged matchups into their new indices
+                damage = np.zeros(shape, dtype=np.int32)
+                kept_species = [(i, old_species[name]) for i, name
+                                in enumerate(species) if name in old_species
+                                and name not in changed["oeo"]]
+                kept_moves = [(i, old_moves[name]) for i, name
+                              in enumerate(moves) if name in old_moves
+                              and name not in changed["moves"]]
+                if kept_species and kept_moves:
+                    new_s, old_s = zip(*kept_species)
+                    new_m, old_m = zip(*kept_moves)
+                    damage[np.ix_(new_s, new_m, new_s)] = \
+                        cache["damage"][np.ix_(old_s, old_m, old_s)]
+        else:
+            damage = np.zeros(shape, dtype=np.int32)
+            changed_species = list(range(len(species)))
+            changed_moves = list(range(len(moves)))
+        # Every matchup involving a changed species or move, once each
+        kept_s = sorted(set(range(len(species))) - set(changed_species))
+        kept_m = sorted(set(range(len(moves))) - set(changed_moves))
+        computed = builder.fill(damage, changed_species, range(len(moves)),
+                                range(len(species)))
+        computed += builder.fill(damage, kept_s, changed_moves,
+                                 range(len(species)))
+        computed += builder.fill(damage, kept_s, kept_m, changed_species)
+        logger.info(f"Computed {computed} of {damage[..., 0, 0].size} "
+                    f"matchups for {len(changed_species)} changed species "
+                    f"and {len(changed_moves)} changed moves")
+        write_damage = True
+    if write_damage or hashes != known:
+        _write_cache(path, {"version": cache_version, "levels": levels,
+                            "hashes": hashes, "records": records,
+                            "effectiveness": single, "species": species,
+                            "moves": moves},
+                     damage if write_damage else None)
+
+    species_elements = {name: tuple(Element(e)
+                                    for e in records["oeo"][name][0])
+                        for name in species}
+    move_elements = {name: Element(records["moves"][name][0])
+                     for name in moves}
+    return MatchupTable(species, moves, levels, species_elements,
+                        move_elements, builder.stab, builder.effectiveness,
+                        damage, builder.hp)
+
+
+def get_matchup_table():
+    """
+    Load the matchup table of the package's game data, building its cache
+    if it is stale, and have the damage functions use it until
+    species_registry is invalidated
+
+    :return: the matchup table, loaded on first use and again after
+             species_registry is invalidated
+    """
+    global _matchup_table
+    table = _matchup_table
+    generation = species_registry.generation
+    if table is None or table.generation != generation:
+        table = load_matchup_table()
+        # Oeo take their elements from species_registry, so the species it
+        # has already read differently must not be looked up in the table
+        stale = [name for name in table.species if name in species_registry
+                 and species_registry.get(name).elements !=
+                 table.elements(name)]
+        if stale:
+            logger.warning(f"species_registry differs from the game data "
+                           f"for {stale}, invalidate it to use their "
+                           f"matchups")
+            table._drop_modifiers(stale)
+        table._generation = generation
+        _matchup_table = table
+        damage_functions.use_matchup_table(table)
+    return table
+
+
+def invalidate():
+    """
+    Load the matchup table again on next use, the damage functions compute
+    the modifiers themselves until then
+    """
+    global _matchup_table
+    _matchup_table = None
+    damage_functions.use_matchup_table(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update the matchup cache and optionally write the "
+                    "matchups at a reference level as CSV")
+    parser.add_argument("--level", type=int, default=50,
+                        help=f"one of {reference_levels}")
+    parser.add_argument("--csv", type=Path,
+                        help="file to write the matchups to, - for stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    table = load_matchup_table()
+    print(table, file=sys.stderr)
+    if args.csv is not None:
+        f = sys.stdout if str(args.csv) == "-" else \
+            args.csv.open("w", newline="", encoding="utf-8")
+        try:
+            writer = csv.writer(f)
+            writer.writerow(Matchup._fields)
+            writer.writerows(table.matchups(args.level))
+        finally:
+            if f is not sys.stdout:
+                f.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Opt-in timers, counters and latency histograms for Battle.run
+
+Give a Battle a BattleMetrics to have the phases of its battle loop timed
+with the monotonic clock. Phases are timed exclusively: while a nested
+phase runs, e.g. writing to the battle log while deploying, only the
+nested phase is timed, so the phases add up to the time spent in run.
+Time in run outside every other phase is counted as "other". The
+"battle_log" phase is writing to the battle log; calls to the logging
+module are not timed on their own and count towards the phase making them.
+
+A Battle without metrics runs its methods unwrapped, so the disabled path
+costs one check when the battle is made.
+
+Metrics from many battles, or many processes, are added together with
+merge and written out through a MetricsSink:
+
+    MemorySink       keeps each export as a dict
+    JsonLinesSink    appends each export to a file as a line of JSON
+    PrometheusSink   rewrites a file in the Prometheus text format, e.g.
+                     for the node exporter's textfile collector
+"""
+import abc
+import bisect
+import json
+import os
+import time
+from pathlib import Path
+
+clock = time.perf_counter
+# Upper bounds in seconds of the callback latency histogram buckets
+default_buckets = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4,
+                   5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25,
+                   0.5, 1.0)
+
+
+class Histogram(object):
+    """
+    Counts of observations in buckets by upper bound, with a last bucket
+    for observations above every bound
+    """
+    __slots__ = ("_bounds", "_counts", "_sum")
+
+    def __init__(self, bounds=default_buckets):
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+
+    @property
+    def bounds(self):
+        return self._bounds
+
+    @property
+    def counts(self):
+        return list(self._counts)
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def count(self):
+        return sum(self._counts)
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._sum += value
+
+    def cumulative(self):
+        """
+        :return: list of (upper bound, observations at or below it), ending
+                 with (inf, count)
+        """
+        total, buckets = 0, []
+        for bound, count in zip(self._bounds + (float("inf"),),
+                                self._counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def quantile(self, q):
+        """
+        :return: the upper bound of the bucket holding the q quantile
+        """
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def merge(self, other):
+        if other._bounds != self._bounds:
+            raise Exception("Histograms with different buckets can not be "
+                            "merged")
+        self._counts = [a + b for a, b in zip(self._counts, other._counts)]
+        self._sum += other._sum
+
+    def to_dict(self):
+        return {"bounds": list(self._bounds), "counts": list(self._counts),
+                "sum": self._sum}
+
+    @classmethod
+    def from_dict(cls, d):
+        histogram = cls(d["bounds"])
+        histogram._counts = list(d["counts"])
+        histogram._sum = d["sum"]
+        return histogram
+
+    def __repr__(self):
+        return "Histogram(count=%d, sum=%r)" % (self.count, self._sum)
+
+
+class BattleMetrics(object):
+    """
+    Seconds per phase, counters and callback latencies of the battles it is
+    given to
+    """
+    phases = ("withdrawals", "deployments", "actions", "events", "damage",
+              "callbacks", "battle_log", "other")
+    counters = ("battles", "turns", "events_processed", "events_skipped",
+                "callbacks")
+
+    def __init__(self, buckets=default_buckets):
+        self._buckets = tuple(buckets)
+        self._seconds = dict.fromkeys(self.phases, 0.0)
+        self._counts = dict.fromkeys(self.counters, 0)
+        # decision type:Histogram of the seconds its callbacks took
+        self._latency = {}
+        # The phases entered and not yet exited, innermost last, and when
+        # the innermost started being timed
+        self._stack = []
+        self._started = 0.0
+
+    @property
+    def seconds(self):
+        """
+        :return: dict of phase:seconds spent in it
+        """
+        return dict(self._seconds)
+
+    @property
+    def counts(self):
+        """
+        :return: dict of counter:count
+        """
+        return dict(self._counts)
+
+    @property
+    def latency(self):
+        """
+        :return: dict of decision type:Histogram of its callback latencies
+        """
+        return dict(self._latency)
+
+    def enter(self, phase):
+        """
+        Start timing phase, pausing the phase it is nested in
+        """
+        now = clock()
+        stack = self._stack
+        if stack:
+            self._seconds[stack[-1]] += now - self._started
+        stack.append(phase)
+        self._started = now
+
+    def exit(self):
+        """
+        Stop timing the innermost phase, resuming the phase it is nested in
+        """
+        now = clock()
+        self._seconds[self._stack.pop()] += now - self._started
+        self._started = now
+
+    def count(self, counter, n=1):
+        self._counts[counter] += n
+
+    def observe_callback(self, decision_type, seconds):
+        histogram = self._latency.get(decision_type)
+        if histogram is None:
+            histogram = self._latency[decision_type] = \
+                Histogram(self._buckets)
+        histogram.observe(seconds)
+        self._counts["callbacks"] += 1
+
+    def timed(self, phase, function):
+        """
+        :return: function wrapped to time each call as phase
+        """
+        enter, exit = self.enter, self.exit
+
+        def timed_function(*args, **kwargs):
+            enter(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                exit()
+        return timed_function
+
+    def timed_steps(self, phase, generator_function):
+        """
+        :return: generator_function wrapped to time the work between its
+                 yields as phase, and not the time it is suspended for, e.g.
+                 while a decision is made
+        """
+        enter, exit = self.enter, self.exit
+
+        def timed_generator(*args, **kwargs):
+            steps = generator_function(*args, **kwargs)
+            sent = None
+            while True:
+                enter(phase)
+                try:
+                    request = steps.send(sent)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    exit()
+                sent = yield request
+        return timed_generator
+
+    def timed_event(self, function, counter=None):
+        """
+        :return: event processing function wrapped to time it as the events
+                 phase and count the events processed and skipped, and
+                 counter if given
+        """
+        enter, exit, counts = self.enter, self.exit, self._counts
+
+        def timed_event(*args, **kwargs):
+            enter("events")
+            try:
+                status = function(*args, **kwargs)
+            finally:
+                exit()
+            counts["events_processed"] += 1
+            if status == -1:
+                counts["events_skipped"] += 1
+            if counter is not None:
+                counts[counter] += 1
+            return status
+        return timed_event
+
+    def timed_decisions(self, decide):
+        """
+        :return: decide, as Battle._decide, wrapped to time each decision as
+                 the callbacks phase and observe its latency
+        """
+        enter, exit = self.enter, self.exit
+
+        def timed_decide(decision_type, team_id, args):
+            enter("callbacks")
+            start = clock()
+            try:
+                return decide(decision_type, team_id, args)
+            finally:
+                seconds = clock() - start
+                exit()
+                self.observe_callback(decision_type, seconds)
+        return timed_decide
+
+    def timed_run(self, run):
+        """
+        :return: run, as Battle.run, wrapped to count the battle and time
+                 it as the other phase around the nested phases
+        """
+        def timed_run():
+            self.enter("other")
+            try:
+                return run()
+            finally:
+                self.exit()
+                self._counts["battles"] += 1
+        return timed_run
+
+    def merge(self, other):
+        """
+        Add other's metrics to these
+
+        :param other: BattleMetrics or a dict from to_dict
+        """
+        if isinstance(other, dict):
+            other = BattleMetrics.from_dict(other)
+        for phase, seconds in other._seconds.items():
+            self._seconds[phase] += seconds
+        for counter, count in other._counts.items():
+            self._counts[counter] += count
+        for decision_type, histogram in other._latency.items():
+            if decision_type in self._latency:
+                self._latency[decision_type].merge(histogram)
+            else:
+                self._latency[decision_type] = \
+                    Histogram.from_dict(histogram.to_dict())
+
+    def to_dict(self):
+        return {"seconds": dict(self._seconds), "counts": dict(self._counts),
+                "latency": {decision_type: histogram.to_dict()
+                            for decision_type, histogram
+                            in self._latency.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        metrics = cls()
+        metrics._seconds.update(d["seconds"])
+        metrics._counts.update(d["counts"])
+        metrics._latency = {decision_type: Histogram.from_dict(histogram)
+                            for decision_type, histogram
+                            in d["latency"].items()}
+        return metrics
+
+    def export(self, sink):
+        """
+        Write the metrics out through sink
+        """
+        sink.export(self)
+
+    def summary(self):
+        total = sum(self._seconds.values())
+        lines = [f"{self._counts['battles']} battles, "
+                 f"{self._counts['turns']} turns, "
+                 f"{self._counts['events_processed']} events "
+                 f"({self._counts['events_skipped']} skipped), "
+                 f"{self._counts['callbacks']} callbacks in {total:.3f}s"]
+        for phase, seconds in sorted(self._seconds.items(),
+                                     key=lambda item: -item[1]):
+            lines.append(f"  {phase:>11}: {seconds:9.3f}s "
+                         f"({seconds / total if total else 0:6.1%})")
+        for decision_type, histogram in sorted(self._latency.items()):
+            lines.append(f"  {decision_type} latency: mean "
+                         f"{histogram.sum / histogram.count * 1e6:.1f} us, "
+                         f"p50 <= {histogram.quantile(0.5) * 1e6:g} us, "
+                         f"p99 <= {histogram.quantile(0.99) * 1e6:g} us")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "BattleMetrics(%r)" % self._counts
+
+
+class TimedProxy(object):
+    """
+    Stands in for an object, timing each call of its methods as phase
+    """
+    __slots__ = ("_target", "_metrics", "_phase")
+
+    def __init__(self, target, metrics, phase):
+        self._target = target
+        self._metrics = metrics
+        self._phase = phase
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if callable(value):
+            return self._metrics.timed(self._phase, value)
+        return value
+
+
+class MetricsSink(abc.ABC):
+    """
+    Where BattleMetrics are exported to
+    """
+    @abc.abstractmethod
+    def export(self, metrics):
+        """
+        Write out metrics, a BattleMetrics
+        """
+
+
+class MemorySink(MetricsSink):
+    """
+    Keeps every export as a dict from BattleMetrics.to_dict
+    """
+    def __init__(self):
+        self.exports = []
+
+    def export(self, metrics):
+        self.exports.append(metrics.to_dict())
+
+
+class JsonLinesSink(MetricsSink):
+    """
+    Appends every export to a file as a line of JSON, with the wall clock
+    time it was made
+    """
+    def __init__(self, path):
+        self._path = Path(path)
+
+    def export(self, metrics):
+        record = {"time": time.time(), **metrics.to_dict()}
+        with self._path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Rewrites a file with the latest export in the Prometheus text
+    exposition format, replacing it atomically so that a scraper never reads
+    it half written
+    """
+    def __init__(self, path, prefix="oeo_battle"):
+        self._path = Path(path)
+        self._prefix = prefix
+
+    def export(self, metrics):
+        tmp = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.format(metrics), encoding="utf-8")
+        os.replace(tmp, self._path)
+
+    def format(self, metrics):
+        """
+        :return: metrics in the Prometheus text exposition format
+        """
+        p = self._prefix
+        lines = [f"# HELP {p}_phase_seconds_total Seconds spent in each "
+                 f"phase of the battle loop",
+                 f"# TYPE {p}_phase_seconds_total counter"]
+        lines += [f'{p}_phase_seconds_total{{phase="{phase}"}} {seconds!r}'
+                  for phase, seconds in metrics.seconds.items()]
+        for counter, count in metrics.counts.items():
+            lines += [f"# HELP {p}_{counter}_total Number of "
+                      f"{counter.replace('_', ' ')}",
+                      f"# TYPE {p}_{counter}_total counter",
+                      f"{p}_{counter}_total {count}"]
+        lines += [f"# HELP {p}_callback_latency_seconds Seconds taken by "
+                  f"each decision callback",
+                  f"# TYPE {p}_callback_latency_seconds histogram"]
+        for decision_type, histogram in sorted(metrics.latency.items()):
+            label = f'decision="{decision_type}"'
+            for bound, total in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{p}_callback_latency_seconds_bucket'
+                             f'{{{label},le="{le}"}} {total}')
+            lines += [f"{p}_callback_latency_seconds_sum{{{label}}} "
+                      f"{histogram.sum!r}",
+                      f"{p}_callback_latency_seconds_count{{{label}}} "
+                      f"{histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+
+sinks = {"memory": MemorySink, "jsonl": JsonLinesSink,
+         "prometheus": PrometheusSink}
@@ -0,0 +1,143 @@
+import abc
+import random
+from .search import BattleModel, Lookahead
+from .simevent import Action
+
+
+class Policy(abc.ABC):
+    """
+    Makes the deployment and action decisions for one team in a battle
+    """
+    def __init__(self, battle, team_id, rng=None):
+        self._battle = battle
+        self._team_id = team_id
+        self._rng = rng if rng is not None else random.Random()
+        self._opponent_id = next(t for t in battle.teams if t != team_id)
+
+    @property
+    def team_id(self):
+        return self._team_id
+
+    def opponents(self):
+        """
+        :return: list of oeo_id of the opposing oeo on the field
+        """
+        return list(self._battle.field[self._opponent_id].fielded)
+
+    def choose_deployments(self, team_id, non_fielded_team, empty_positions):
+        """
+        Deploy the first available oeo into each empty position
+
+        :return: dict of position:oeo_id
+        """
+        return dict(zip(empty_positions, non_fielded_team))
+
+    @abc.abstractmethod
+    def choose_actions(self, team_id, oeo_requiring_actions):
+        """
+        :return: dict of oeo_id:action
+        """
+
+
+class FirstMovePolicy(Policy):
+    """
+    Always uses the first move of each oeo against the first opposing oeo
+    """
+    def choose_actions(self, team_id, oeo_requiring_actions):
+        opponents = self.opponents()
+        oeo = self._battle.oeo
+        return {oeo_id: Action.use_move(oeo[oeo_id].moves[0], opponents[0])
+                for oeo_id in oeo_requiring_actions}
+
+
+class RandomPolicy(Policy):
+    """
+    Deploys random oeo and uses random moves against random opposing oeo
+    """
+    def choose_deployments(self, team_id, non_fielded_team, empty_positions):
+        count = min(len(non_fielded_team), len(empty_positions))
+        chosen = self._rng.sample(list(non_fielded_team), count)
+        return dict(zip(empty_positions, chosen))
+
+    def choose_actions(self, team_id, oeo_requiring_actions):
+        opponents = self.opponents()
+        oeo = self._battle.oeo
+        return {oeo_id: Action.use_move(self._rng.choice(oeo[oeo_id].moves),
+                                        self._rng.choice(opponents))
+                for oeo_id in oeo_requiring_actions}
+
+
+class SearchPolicy(Policy):
+    """
+    Looks ahead over the turns to come with an expectimax search, see
+    battlesim.search
+    """
+    def __init__(self, battle, team_id, rng=None, time_budget=0.05,
+                 max_depth=4):
+        """
+        :param time_budget: seconds to search for each decision
+        :param max_depth: deepest search in turns
+        """
+        super().__init__(battle, team_id, rng)
+        self._time_budget = time_budget
+        self._max_depth = max_depth
+        # Built on the first decision, when the oeo of both teams are known
+        self._lookahead = None
+
+    @property
+    def lookahead(self):
+        if self._lookahead is None:
+            self._lookahead = Lookahead(
+                BattleModel(self._battle, self._team_id), self._time_budget,
+                self._max_depth)
+        return self._lookahead
+
+    def choose_deployments(self, team_id, non_fielded_team, empty_positions):
+        lookahead = self.lookahead
+        model = lookahead.model
+        index = {oeo_id: i for i, oeo_id in enumerate(model.oeo_ids)}
+        deployed = lookahead.best_deployment(
+            model.state(self._battle),
+            [index[oeo_id] for oeo_id in non_fielded_team],
+            len(empty_positions))
+        return dict(zip(empty_positions,
+                        (model.oeo_ids[i] for i in deployed)))
+
+    def choose_actions(self, team_id, oeo_requiring_actions):
+        model = self.lookahead.model
+        actions = self.lookahead.best_actions(model.state(self._battle))
+        chosen = {model.oeo_ids[i]: Action.use_move(model.move_ids[i][m],
+                                                    model.oeo_ids[j])
+                  for i, m, j in actions}
+        return {oeo_id: chosen[oeo_id] for oeo_id in oeo_requiring_actions
+                if oeo_id in chosen}
+
+
+policies = {"first": FirstMovePolicy, "random": RandomPolicy,
+            "search": SearchPolicy}
+
+
+def get_policy(name):
+    try:
+        return policies[name]
+    except KeyError:
+        raise Exception(f"No policy named '{name}', "
+                        f"choose from {sorted(policies)}") from None
+
+
+def attach_policies(battle, team_policies):
+    """
+    Route the battle's decision events to the policy of each team
+
+    :param team_policies: dict of team_id:Policy
+    """
+    def choose_deployments(team_id, non_fielded_team, empty_positions):
+        return team_policies[team_id].choose_deployments(
+            team_id, non_fielded_team, empty_positions)
+
+    def choose_actions(team_id, oeo_requiring_actions):
+        return team_policies[team_id].choose_actions(
+            team_id, oeo_requiring_actions)
+
+    battle.event_choose_deployments += choose_deployments
+    battle.event_choose_actions += choose_actions
@@ -0,0 +1,431 @@
+"""
+Run many independent battles headlessly across a pool of worker processes
+
+Usage: python -m battlesim.runner [--teams teams.json] [--battles N]
+                                  [--workers N] [--seed N]
+                                  [--policy-a NAME] [--policy-b NAME]
+                                  [--log-level LEVEL] [--log-file PATH]
+                                  [--validation full|debug|off]
+                                  [--engine battle|lockstep]
+                                  [--lockstep-size N] [--benchmark]
+                                  [--metrics memory|jsonl|prometheus]
+                                  [--metrics-file PATH] [--matchups]
+
+A teams file is a JSON object of team_id to team definition, for example:
+
+    {"X": {"max_fielded": 1,
+           "oeo": [{"species": "Chikaphu", "level": 50, "moves": ["Maul"]}]},
+     "Y": {"max_fielded": 1,
+           "oeo": [{"species": "Chikaphu", "level": 50, "moves": ["Maul"]}]}}
+
+The lockstep engine runs the battles in batches of --lockstep-size with
+battlesim.lockstep, for the first and random policies only.
+
+--matchups loads the matchup table of battlesim.matchup, building its cache
+if it is stale, for the damage functions to look up the same type attack
+bonus and element effectiveness in.
+
+--metrics instruments every battle run with Battle with a BattleMetrics,
+prints where the time went, and for jsonl and prometheus exports the
+metrics of the run to --metrics-file.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from core import Oeo, RandomStream, Stats, move_catalog, species_registry
+from .battle import Battle
+from .hooks import Validation
+from .policy import get_policy, attach_policies
+from .simlogging import configure_simulation_logging
+
+logger = logging.getLogger(__name__)
+
+default_teams = {
+    "X": {"max_fielded": 1,
+          "oeo": [{"species": "Chikaphu", "level": 50, "moves": ["Maul"]}]},
+    "Y": {"max_fielded": 1,
+          "oeo": [{"species": "Chikaphu", "level": 50, "moves": ["Maul"]}]}
+}
+
+
+class BattleResult(object):
+    """
+    The outcome of one simulated battle
+    """
+    __slots__ = ("index", "victor", "turns", "damage_dealt")
+
+    def __init__(self, index, victor, turns, damage_dealt):
+        self.index = index
+        self.victor = victor
+        self.turns = turns
+        # dict of team_id:total damage dealt to the opposing team
+        self.damage_dealt = damage_dealt
+
+
+class SimulationResults(object):
+    """
+    Aggregated outcomes of many simulated battles
+    """
+    def __init__(self, team_ids, results, seconds):
+        self._team_ids = team_ids
+        self._results = sorted(results, key=lambda r: r.index)
+        self._seconds = seconds
+
+    @property
+    def battles(self):
+        return len(self._results)
+
+    @property
+    def seconds(self):
+        return self._seconds
+
+    @property
+    def battles_per_second(self):
+        return self.battles / self._seconds if self._seconds else 0.0
+
+    @property
+    def results(self):
+        return self._results
+
+    @property
+    def victories(self):
+        """
+        :return: Counter of victor (team_id or "DRAW") to number of battles
+        """
+        return Counter(r.victor for r in self._results)
+
+    def win_rate(self, team_id):
+        return self.victories[team_id] / self.battles if self.battles else 0.0
+
+    @property
+    def turns(self):
+        return [r.turns for r in self._results]
+
+    def damage_distribution(self, team_id):
+        """
+        :return: Counter of total damage dealt by team_id per battle to
+                 number of battles
+        """
+        return Counter(r.damage_dealt[team_id] for r in self._results)
+
+    def summary(self):
+        lines = [f"{self.battles} battles in {self._seconds:.2f}s "
+                 f"({self.battles_per_second:.1f} battles/sec)"]
+        for victor, count in sorted(self.victories.items()):
+            lines.append(f"  {victor}: {count} ({count / self.battles:.1%})")
+        turns = self.turns
+        if turns:
+            lines.append(f"  turns: mean {statistics.mean(turns):.2f}, "
+                         f"min {min(turns)}, max {max(turns)}")
+        for team_id in self._team_ids:
+            damage = [r.damage_dealt[team_id] for r in self._results]
+            if damage:
+                lines.append(f"  damage dealt by {team_id}: "
+                             f"mean {statistics.mean(damage):.2f}, "
+                             f"min {min(damage)}, max {max(damage)}")
+        return "\n".join(lines)
+
+
+def build_team(team_id, definition, rng=None):
+    """
+    :param rng: RandomStream or random.Random to draw the ivs that are not \
+                given from, the random module if None
+    :return: dict of oeo_id:Oeo for the oeo in a team definition
+    """
+    oeos = {}
+    for i, o in enumerate(definition["oeo"]):
+        oeo_id = f"{team_id}{i}"
+        ivs = Stats.from_dict(o["ivs"]) if "ivs" in o \
+            else Stats.rand_ivs(rng)
+        evs = Stats.from_dict(o["evs"]) if "evs" in o else Stats()
+        oeos[oeo_id] = Oeo(oeo_id, o.get("name", ""), o["species"],
+                           o["level"], o.get("xp", 0), None, ivs, evs,
+                           list(o["moves"]), None, None)
+    return oeos
+
+
+def run_battle(teams, policy_names, seed, index,
+               validation=Validation.Full, metrics=None):
+    """
+    Run one battle, seeded from seed and index so that the outcome does not
+    depend on which worker runs it
+
+    The ivs and every draw of the battle come from the battle's own random
+    stream, spawned from seed with index as its key, and each policy has its
+    own random.Random, so no random state is shared between battles.
+
+    :param metrics: BattleMetrics to instrument the battle with
+    :return: BattleResult
+    """
+    rng = RandomStream(seed, spawn_key=(index,))
+    (a_id, a_def), (b_id, b_def) = teams.items()
+    a_oeo, b_oeo = build_team(a_id, a_def, rng), build_team(b_id, b_def, rng)
+    oeos = {**a_oeo, **b_oeo}
+    battle = Battle(oeos, a_id, set(a_oeo), a_def["max_fielded"],
+                    b_id, set(b_oeo), b_def["max_fielded"], rng=rng,
+                    validation=validation, metrics=metrics)
+    attach_policies(battle, {
+        team_id: get_policy(policy_names[team_id])(
+            battle, team_id, random.Random(f"{seed}:{index}:{team_id}"))
+        for team_id in teams})
+    victor = battle.run()
+    damage_dealt = {
+        a_id: sum(o.full_hp - o.current_hp for o in b_oeo.values()),
+        b_id: sum(o.full_hp - o.current_hp for o in a_oeo.values())}
+    return BattleResult(index, victor, battle.turn_number, damage_dealt)
+
+
+def _run_chunk(teams, policy_names, seed, start, stop, validation,
+               metrics=None):
+    """
+    :return: (list of BattleResult, metrics), so that the metrics of a chunk
+             run in a worker process are sent back with its results
+    """
+    return [run_battle(teams, policy_names, seed, index, validation, metrics)
+            for index in range(start, stop)], metrics
+
+
+def _init_worker(log_level, log_file=None):
+    """
+    Set up logging in a worker process
+
+    Handlers inherited from the parent process are replaced when log_file is
+    given, since a forked worker can not use the parent's queue listener.
+
+    :param log_file: file to write log records at log_level and above to, \
+                     suffixed with the process id so that worker processes \
+                     do not write to the same file
+    """
+    root = logging.getLogger()
+    if log_file is not None:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        log_file = Path(log_file)
+        log_file = log_file.with_name(f"{log_file.stem}.{os.getpid()}"
+                                      f"{log_file.suffix}")
+        configure_simulation_logging(log_level, log_file)
+    else:
+        root.setLevel(log_level)
+
+
+def use_matchup_table():
+    """
+    Load the matchup table for the damage functions in this process and the
+    workers forked from it, which compute the modifiers themselves if it
+    can not be loaded
+    """
+    from .matchup import get_matchup_table
+    try:
+        get_matchup_table()
+    except Exception as e:
+        logger.warning(f"Not using the matchup table, it could not be "
+                       f"loaded: {e}")
+
+
+def run_battles(teams, policy_names, battles, workers=None, seed=0,
+                log_level=logging.WARNING, log_file=None,
+                validation=Validation.Full, metrics=None):
+    """
+    Run battles independent battles between the two teams
+
+    :param teams: dict of team_id:team definition
+    :param policy_names: dict of team_id:name of the policy for that team
+    :param workers: number of worker processes, os.cpu_count() if None, \
+                    or 0 to run in this process
+    :param log_level: level of the root logger of the worker processes
+    :param log_file: file to log to through a queue, one file per worker \
+                     process. Logging is left to the caller when workers is \
+                     0, so log_file must be None then
+    :param validation: Validation of the policies' decisions
+    :param metrics: BattleMetrics to add the metrics of every battle to, \
+                    the battles are not instrumented if None
+    :return: SimulationResults
+    """
+    assert len(teams) == 2, "teams does not contain two team definitions"
+    if workers is None:
+        workers = os.cpu_count() or 1
+    start_time = time.perf_counter()
+    if workers == 0:
+        if log_file is not None:
+            raise Exception("log_file is only applied to worker processes, "
+                            "configure logging before running battles in "
+                            "this process")
+        results, _ = _run_chunk(teams, policy_names, seed, 0, battles,
+                                validation, metrics)
+    else:
+        # Load the shared game data before the workers are forked so that
+        # they inherit it copy-on-write, and move it out of the collector's
+        # view so that collections in the workers do not touch its pages
+        move_catalog.preload()
+        species_registry.preload()
+        from .metrics import BattleMetrics
+        # Several chunks per worker keep the workers busy while amortising
+        # the cost of sending work and results between processes
+        chunk_size = max(1, battles // (workers * 4))
+        chunks = [(start, min(start + chunk_size, battles))
+                  for start in range(0, battles, chunk_size)]
+        results = []
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(log_level, log_file)) \
+                    as executor:
+                futures = [executor.submit(_run_chunk, teams, policy_names,
+                                           seed, start, stop, validation,
+                                           None if metrics is None
+                                           else BattleMetrics())
+                           for start, stop in chunks]
+                for future in futures:
+                    chunk_results, chunk_metrics = future.result()
+                    results.extend(chunk_results)
+                    if metrics is not None:
+                        metrics.merge(chunk_metrics)
+        finally:
+            gc.unfreeze()
+    seconds = time.perf_counter() - start_time
+    return SimulationResults(list(teams), results, seconds)
+
+
+def run_lockstep(teams, policy_names, battles, seed=0, size=10000):
+    """
+    Run battles independent battles between the two teams with
+    LockstepBattles, size at a time
+
+    Each batch of battles draws from its own random stream, spawned from seed
+    with the batch number as its key.
+
+    :return: SimulationResults
+    """
+    # NumPy arrays for every battle are only needed by the lockstep engine
+    from .lockstep import LockstepBattles
+    assert len(teams) == 2, "teams does not contain two team definitions"
+    start_time = time.perf_counter()
+    results = []
+    for batch, start in enumerate(range(0, battles, size)):
+        lockstep = LockstepBattles(teams, policy_names,
+                                   min(size, battles - start),
+                                   RandomStream(seed, spawn_key=(batch,)))
+        victors = lockstep.run()
+        turns = lockstep.turns.tolist()
+        damage_dealt = {team_id: damage.tolist() for team_id, damage
+                        in lockstep.damage_dealt().items()}
+        results.extend(
+            BattleResult(start + i, victor, turns[i],
+                         {team_id: damage[i] for team_id, damage
+                          in damage_dealt.items()})
+            for i, victor in enumerate(victors))
+    seconds = time.perf_counter() - start_time
+    return SimulationResults(list(teams), results, seconds)
+
+
+def benchmark(teams, policy_names, battles, max_workers, seed=0):
+    """
+    Print battles/sec for increasing numbers of worker processes
+    """
+    workers = 1
+    while True:
+        results = run_battles(teams, policy_names, battles, workers, seed)
+        print(f"{workers:>3} worker(s): "
+              f"{results.battles_per_second:10.1f} battles/sec")
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run battles headlessly across worker processes")
+    parser.add_argument("--teams", type=Path,
+                        help="JSON file of team_id to team definition")
+    parser.add_argument("--battles", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy-a", default="random",
+                        help="policy of the first team")
+    parser.add_argument("--policy-b", default="random",
+                        help="policy of the second team")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-file", type=Path,
+                        help="file to write log records at --log-level to")
+    parser.add_argument("--validation", default="full",
+                        choices=["full", "debug", "off"],
+                        help="how thoroughly to check the policies' "
+                             "decisions")
+    parser.add_argument("--engine", default="battle",
+                        choices=["battle", "lockstep"],
+                        help="run each battle with Battle, or many at once "
+                             "with LockstepBattles")
+    parser.add_argument("--lockstep-size", type=int, default=10000,
+                        help="battles advanced together by the lockstep "
+                             "engine")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="report battles/sec from 1 to --workers workers")
+    parser.add_argument("--matchups", action="store_true",
+                        help="look up the modifiers of the damage functions "
+                             "in the matchup table")
+    parser.add_argument("--metrics", choices=["jsonl", "memory",
+                                              "prometheus"],
+                        help="instrument the battles and export their "
+                             "metrics to this sink")
+    parser.add_argument("--metrics-file", type=Path,
+                        help="file of the jsonl or prometheus metrics sink")
+    args = parser.parse_args()
+    if args.metrics and args.engine == "lockstep":
+        parser.error("--metrics is only supported by the battle engine")
+    if args.metrics in ("jsonl", "prometheus") and not args.metrics_file:
+        parser.error(f"--metrics {args.metrics} requires --metrics-file")
+
+    if args.teams:
+        with args.teams.open(encoding="utf-8") as f:
+            teams = json.load(f)
+    else:
+        teams = default_teams
+    a_id, b_id = teams
+    policy_names = {a_id: args.policy_a, b_id: args.policy_b}
+    if args.matchups:
+        use_matchup_table()
+
+    if args.benchmark:
+        benchmark(teams, policy_names, args.battles, args.workers, args.seed)
+    elif args.engine == "lockstep":
+        results = run_lockstep(teams, policy_names, args.battles, args.seed,
+                               args.lockstep_size)
+        print(results.summary())
+    else:
+        metrics = None
+        if args.metrics:
+            from .metrics import BattleMetrics, sinks
+            metrics = BattleMetrics()
+        log_level = getattr(logging, args.log_level)
+        log_file = args.log_file
+        if args.workers == 0:
+            # The battles run in this process, so configure its logging
+            if log_file is not None:
+                configure_simulation_logging(log_level, log_file)
+                log_file = None
+            else:
+                logging.getLogger().setLevel(log_level)
+        results = run_battles(teams, policy_names, args.battles,
+                              args.workers, args.seed, log_level, log_file,
+                              Validation[args.validation.capitalize()],
+                              metrics)
+        print(results.summary())
+        if metrics is not None:
+            print(metrics.summary())
+            sink = sinks[args.metrics](args.metrics_file) \
+                if args.metrics_file else sinks[args.metrics]()
+            metrics.export(sink)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import heapq
+import itertools
+
+
+class EventScheduler(object):
+    """
+    Priority queue of pending SimEvents
+
+    Events are ordered by the integer key (turn, stage, speed_rank, sequence)
+    where lower values are processed first. The sequence number increases
+    with every event scheduled, so events with equal turn, stage and
+    speed_rank are processed in the order they were scheduled.
+    """
+    __slots__ = ("_heap", "_sequence")
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def push(self, event, turn, stage=0, speed_rank=0):
+        """
+        Schedule event
+
+        :param turn: the turn in which the event is to be actioned
+        :param stage: the stage of the turn in which the event is to be \
+                      actioned
+        :param speed_rank: the speed rank of the oeo undertaking the event
+        """
+        heapq.heappush(self._heap, (turn, stage, speed_rank,
+                                    next(self._sequence), event))
+
+    def pop(self):
+        """
+        Remove and return the next event
+
+        :return: (event, (turn, stage, speed_rank, sequence))
+        """
+        turn, stage, speed_rank, sequence, event = heapq.heappop(self._heap)
+        return event, (turn, stage, speed_rank, sequence)
+
+    def peek(self):
+        """
+        :return: the next event without removing it
+        """
+        return self._heap[0][4]
+
+    def clear(self):
+        self._heap.clear()
+
+    def state(self):
+        """
+        :return: (list of (turn, stage, speed_rank, sequence, event) in heap \
+                 order, the next sequence number)
+        """
+        sequence = next(self._sequence)
+        self._sequence = itertools.count(sequence)
+        return list(self._heap), sequence
+
+    @classmethod
+    def from_state(cls, entries, sequence):
+        """
+        :param entries: list of (turn, stage, speed_rank, sequence, event) \
+                        in heap order, as returned by state
+        :param sequence: the next sequence number
+        """
+        scheduler = cls()
+        scheduler._heap = list(entries)
+        scheduler._sequence = itertools.count(sequence)
+        return scheduler
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def __iter__(self):
+        """
+        Iterate over (event, key) in processing order
+        """
+        return ((entry[4], entry[:4]) for entry in sorted(self._heap))
+
+    def __repr__(self):
+        return "EventScheduler(%s)" % ", ".join(
+            f"{event!r}: {key}" for event, key in self)
@@ -0,0 +1,341 @@
+"""
+Depth-limited expectimax search over a simplified model of a battle
+
+The model keeps only what changes during a battle: the HP of every oeo and
+which oeo are fielded on each side. A search state is a tuple of the two, so
+states are cheap to branch and hashable for the transposition table.
+Everything else, the expected damage of every move between every pair of
+oeo and the order in which the oeo act, is computed once per battle.
+
+The model follows the rules of Battle: the oeo act in order of move
+priority then speed, an oeo withdrawn because it is unconscious neither acts
+nor can be hit for the rest of the turn, and the battle ends as soon as a
+team has no conscious oeo. It differs from Battle in that:
+
+- damage is the expected damage over the randomness factor, not a draw
+- the opposing team's actions are taken to be equally likely, from the
+  candidate actions of each of its oeo
+- empty positions are filled with the first conscious benched oeo of the
+  team at the end of each turn, as by Policy.choose_deployments
+- moves that are neither the strongest against a target nor faster than a
+  stronger one are not considered, and when a side has more joint actions
+  than max_actions only the actions dealing the largest share of their
+  target's HP are kept for each oeo
+"""
+import itertools
+import logging
+import math
+import time
+from core import move_catalog
+from .damage import get_damage_function
+from .speed import SpeedRanking
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfTime(Exception):
+    """
+    Raised inside a search when its time budget has been used
+    """
+
+
+class BattleModel(object):
+    """
+    The static data of a battle seen from one team, with the oeo numbered in
+    battle order
+
+    Side 0 is the searching team and side 1 its opponent. The damage,
+    turn order keys and candidate actions are computed once, so stepping a
+    state only does arithmetic on tuples.
+    """
+    __slots__ = ("oeo_ids", "sides", "max_fielded", "full_hp", "members",
+                 "team_hp", "move_ids", "order_keys", "damage", "max_actions",
+                 "_candidates", "_turn_orders")
+
+    def __init__(self, battle, team_id, max_actions=64):
+        """
+        :param max_actions: most joint actions to consider for a side
+        """
+        oeos = battle.oeo
+        team = battle.teams[team_id]
+        opponent_id = next(t for t in battle.teams if t != team_id)
+        self.oeo_ids = list(oeos)
+        self.sides = tuple(0 if oeo_id in team else 1
+                           for oeo_id in self.oeo_ids)
+        self.max_fielded = (len(battle.field[team_id]),
+                            len(battle.field[opponent_id]))
+        self.full_hp = tuple(oeo.full_hp for oeo in oeos.values())
+        self.members = tuple(tuple(i for i, side in enumerate(self.sides)
+                                   if side == s) for s in (0, 1))
+        self.team_hp = tuple(sum(self.full_hp[i] for i in members)
+                             for members in self.members)
+
+        ranking = SpeedRanking(oeos)
+        self.move_ids = []
+        self.order_keys = []
+        self.damage = {}
+        for i, oeo in enumerate(oeos.values()):
+            moves = move_catalog.get_many(oeo.moves)
+            self.move_ids.append(tuple(oeo.moves))
+            self.order_keys.append(tuple(
+                (-moves[move_id].priority, ranking.rank(oeo.oeo_id))
+                for move_id in oeo.moves))
+            for m, move_id in enumerate(oeo.moves):
+                move = moves[move_id]
+                expected_damage = get_damage_function(
+                    getattr(move, "df_id", "Standard"), expected=True)
+                for j, target in enumerate(oeos.values()):
+                    if self.sides[j] != self.sides[i]:
+                        self.damage[i, m, j] = expected_damage(oeo, move,
+                                                               target)
+        self.max_actions = max_actions
+        self._candidates = {}
+        # Joint actions of both sides in the order they are taken
+        self._turn_orders = {}
+
+    def state(self, battle):
+        """
+        :return: the search state of the battle
+        """
+        hps = tuple(oeo.current_hp for oeo in battle.oeo.values())
+        field = battle.field
+        fielded = tuple(tuple(i for i in self.members[s]
+                              if self.oeo_ids[i] in field
+                              and hps[i] > 0) for s in (0, 1))
+        return hps, fielded
+
+    def deploy(self, state, side, deployed):
+        """
+        :return: state with deployed added to the fielded oeo of side
+        """
+        hps, fielded = state
+        fielded = list(fielded)
+        fielded[side] = tuple(sorted(fielded[side] + tuple(deployed)))
+        return hps, tuple(fielded)
+
+    def fill(self, state, side):
+        """
+        :return: state with the empty positions of side filled by the first
+                 conscious benched oeo, as by Policy.choose_deployments
+        """
+        hps, fielded = state
+        empty = self.max_fielded[side] - len(fielded[side])
+        if empty <= 0:
+            return state
+        benched = [i for i in self.members[side]
+                   if hps[i] > 0 and i not in fielded[side]]
+        return self.deploy(state, side, benched[:empty])
+
+    def actions(self, state, side):
+        """
+        :return: list of the joint actions side could take, each a tuple of
+                 (oeo, move, target) for every fielded oeo of side
+        """
+        fielded = state[1]
+        key = (side, fielded)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            targets = fielded[1 - side]
+            # Oeo without moves take no action
+            per_oeo = [actions for actions in
+                       (self._oeo_actions(i, targets) for i in fielded[side])
+                       if actions]
+            if math.prod(len(actions) for actions in per_oeo) > \
+                    self.max_actions:
+                keep = max(1, int(self.max_actions ** (1 / len(per_oeo))))
+                per_oeo = [sorted(actions, key=self._share,
+                                  reverse=True)[:keep]
+                           for actions in per_oeo]
+            candidates = list(itertools.product(*per_oeo))
+            self._candidates[key] = candidates
+        return candidates
+
+    def _oeo_actions(self, i, targets):
+        """
+        :return: list of (i, move, target) of the moves of oeo i that are
+                 the strongest against a target among the moves at least as
+                 fast
+        """
+        keys = self.order_keys[i]
+        fastest_first = sorted(range(len(keys)), key=keys.__getitem__)
+        actions = []
+        for j in targets:
+            strongest = -1
+            for m in fastest_first:
+                damage = self.damage[i, m, j]
+                if damage > strongest:
+                    strongest = damage
+                    actions.append((i, m, j))
+        return actions
+
+    def _share(self, action):
+        i, m, j = action
+        return self.damage[i, m, j] / self.full_hp[j]
+
+    def step(self, state, actions):
+        """
+        Play a turn in which every fielded oeo takes its action
+
+        :param actions: tuple of (oeo, move, target)
+        :return: the state after the turn, with empty positions filled
+        """
+        hps, fielded = state
+        hps = list(hps)
+        turn_order = self._turn_orders.get(actions)
+        if turn_order is None:
+            order_keys = self.order_keys
+            turn_order = tuple(sorted(
+                actions, key=lambda a: order_keys[a[0]][a[1]]))
+            self._turn_orders[actions] = turn_order
+        damage = self.damage
+        for i, m, j in turn_order:
+            if hps[i] > 0 and hps[j] > 0:
+                hp = hps[j] - damage[i, m, j]
+                if hp > 0:
+                    hps[j] = hp
+                    continue
+                hps[j] = 0
+                if not any(hps[k] > 0 for k in self.members[self.sides[j]]):
+                    break
+        fielded = tuple(tuple(i for i in side if hps[i] > 0)
+                        for side in fielded)
+        state = tuple(hps), fielded
+        return self.fill(self.fill(state, 0), 1)
+
+    def outcome(self, state):
+        """
+        :return: 1 if side 0 has won, -1 if it has lost, 0 for a draw, or
+                 None if the battle is not over
+        """
+        hps = state[0]
+        alive = [any(hps[i] > 0 for i in self.members[s]) for s in (0, 1)]
+        if alive[0] and alive[1]:
+            return None
+        return alive[0] - alive[1]
+
+    def evaluate(self, state):
+        """
+        :return: the share of its total HP that side 0 has left less that of
+                 side 1, from -1 to 1
+        """
+        hps = state[0]
+        ours, theirs = self.members
+        return sum(hps[i] for i in ours) / self.team_hp[0] - \
+            sum(hps[i] for i in theirs) / self.team_hp[1]
+
+
+class Lookahead(object):
+    """
+    Chooses the actions and deployments of side 0 of a BattleModel by
+    iterative deepening expectimax within a time budget
+
+    Each ply is a turn: side 0 takes the joint action with the highest
+    expected value, over the equally likely joint actions of side 1. Values
+    of states are cached in a transposition table keyed by state and depth,
+    which is kept between decisions.
+    """
+    # Value of a win, above that of any unfinished battle, and the bonus per
+    # ply of winning sooner
+    win_value = 2.0
+    win_sooner = 0.01
+
+    def __init__(self, model, time_budget=0.05, max_depth=4,
+                 max_table=200000):
+        """
+        :param time_budget: seconds to spend on each decision, the search
+                            always completes depth 1
+        :param max_depth: deepest search in turns
+        :param max_table: most states in the transposition table before it
+                          is cleared
+        """
+        self.model = model
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.max_table = max_table
+        self.nodes = 0
+        self.depth = 0
+        self._table = {}
+        self._deadline = None
+
+    def best_actions(self, state):
+        """
+        :return: the joint action of side 0 with the highest value
+        """
+        model = self.model
+        options = model.actions(state, 0)
+        replies = model.actions(state, 1)
+
+        def value(actions, depth):
+            return sum(self._value(model.step(state, actions + reply),
+                                   depth - 1)
+                       for reply in replies) / len(replies)
+
+        return self._search(options, value)
+
+    def best_deployment(self, state, benched, empty):
+        """
+        :param benched: the oeo side 0 may deploy
+        :param empty: number of empty positions on side 0
+        :return: tuple of the oeo to deploy with the highest value
+        """
+        model = self.model
+        options = list(itertools.combinations(benched,
+                                              min(len(benched), empty)))
+
+        def value(deployed, depth):
+            return self._value(model.fill(model.deploy(state, 0, deployed),
+                                          1), depth)
+
+        return self._search(options, value)
+
+    def _search(self, options, value):
+        if len(options) == 1:
+            self.depth = 0
+            return options[0]
+        if len(self._table) > self.max_table:
+            self._table.clear()
+        self._deadline = None
+        start = time.perf_counter()
+        best = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                values = [value(option, depth) for option in options]
+            except OutOfTime:
+                break
+            best = options[max(range(len(options)),
+                               key=values.__getitem__)]
+            self.depth = depth
+            # Depth 1 always completes, deeper searches stop at the deadline
+            self._deadline = start + self.time_budget
+            if time.perf_counter() >= self._deadline:
+                break
+        logger.debug("Searched to depth %s, %s nodes", self.depth,
+                     self.nodes)
+        return best
+
+    def _value(self, state, depth):
+        self.nodes += 1
+        model = self.model
+        outcome = model.outcome(state)
+        if outcome is not None:
+            return outcome * (self.win_value + self.win_sooner * depth)
+        if depth == 0:
+            return model.evaluate(state)
+        key = (state, depth)
+        value = self._table.get(key)
+        if value is not None:
+            return value
+        if self._deadline is not None and \
+                time.perf_counter() >= self._deadline:
+            raise OutOfTime()
+
+        replies = model.actions(state, 1)
+        best = None
+        for actions in model.actions(state, 0):
+            expected = sum(self._value(model.step(state, actions + reply),
+                                       depth - 1)
+                           for reply in replies) / len(replies)
+            if best is None or expected > best:
+                best = expected
+        self._table[key] = best
+        return best
@@ -0,0 +1,69 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing.util
+import queue
+import sys
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that tracks whether it was started, so that its owner and
+    the exit handlers can all stop it
+    """
+    _started = False
+
+    def start(self):
+        super().start()
+        self._started = True
+
+    def stop(self):
+        if self._started:
+            self._started = False
+            super().stop()
+
+
+def start_queue_logging(handlers, level=logging.WARNING, logger=None):
+    """
+    Route log records through a queue so that the handlers, and any file I/O
+    they do, run on a background thread instead of blocking the simulation
+
+    :param handlers: handlers that should receive the log records
+    :param level: level to set on logger
+    :param logger: logger to attach the queue to, the root logger if None
+    :return: the started QueueListener, stop() it to flush the queue
+    """
+    if logger is None:
+        logger = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = _QueueListener(log_queue, *handlers,
+                              respect_handler_level=True)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(level)
+    listener.start()
+    # Worker processes exit without running atexit handlers, so also stop
+    # the listener from multiprocessing's exit finalizers
+    atexit.register(listener.stop)
+    multiprocessing.util.Finalize(None, listener.stop, exitpriority=10)
+    return listener
+
+
+def configure_simulation_logging(level=logging.WARNING, log_file=None):
+    """
+    Configure logging for headless simulation: WARNING and above go to
+    stderr, and everything at level and above goes to log_file if given,
+    all through a queue
+
+    :return: the started QueueListener
+    """
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(logging.WARNING)
+    console.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    handlers = [console]
+    if log_file is not None:
+        file_handler = logging.FileHandler(log_file, "w", encoding="utf-8")
+        file_handler.setLevel(level)
+        file_handler.setFormatter(logging.Formatter(
+            "%(levelname)s: %(message)s (%(name)s:%(lineno)d)"))
+        handlers.append(file_handler)
+    return start_queue_logging(handlers, level)
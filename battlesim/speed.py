@@ -0,0 +1,80 @@
+import bisect
+
+
+class SpeedRanking(object):
+    """
+    Ranks the oeo in a battle from fastest to slowest
+
+    Oeo with equal speed are ranked in the order they were given. The
+    ranking is built once and updated incrementally by refresh when the
+    speed of some oeo has changed, so rank lookups are O(1) dict lookups.
+    """
+    __slots__ = ("_oeos", "_order", "_keys", "_ranks", "_speeds")
+
+    def __init__(self, oeos):
+        """
+        :param oeos: dict of oeo_id:Oeo
+        """
+        self._oeos = oeos
+        self._speeds = {oeo_id: oeo.speed for oeo_id, oeo in oeos.items()}
+        # Sort keys of (-speed, insertion index) in rank order
+        self._keys = {oeo_id: (-self._speeds[oeo_id], i)
+                      for i, oeo_id in enumerate(oeos)}
+        self._order = sorted(self._keys, key=self._keys.__getitem__)
+        self._ranks = {oeo_id: rank for rank, oeo_id
+                       in enumerate(self._order)}
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        """
+        Iterate over oeo_id from fastest to slowest
+        """
+        return iter(self._order)
+
+    def rank(self, oeo_id):
+        """
+        :return: 0 for the fastest oeo, 1 for the next and so on
+        """
+        return self._ranks[oeo_id]
+
+    def order(self, oeo_ids):
+        """
+        :return: list of oeo_ids sorted from fastest to slowest
+        """
+        return sorted(oeo_ids, key=self._ranks.__getitem__)
+
+    def refresh(self):
+        """
+        Move any oeo whose speed has changed since the last refresh to its
+        new rank
+
+        :return: number of oeo that moved
+        """
+        changed = [oeo_id for oeo_id, oeo in self._oeos.items()
+                   if oeo.speed != self._speeds[oeo_id]]
+        for oeo_id in changed:
+            self.update(oeo_id)
+        return len(changed)
+
+    def update(self, oeo_id):
+        """
+        Move oeo_id to the rank for its current speed
+        """
+        speed = self._oeos[oeo_id].speed
+        self._speeds[oeo_id] = speed
+        old_rank = self._ranks[oeo_id]
+        key = (-speed, self._keys[oeo_id][1])
+        self._keys[oeo_id] = key
+        del self._order[old_rank]
+        keys = [self._keys[o] for o in self._order]
+        new_rank = bisect.bisect_left(keys, key)
+        self._order.insert(new_rank, oeo_id)
+        for rank in range(min(old_rank, new_rank),
+                          max(old_rank, new_rank) + 1):
+            self._ranks[self._order[rank]] = rank
+
+    def __repr__(self):
+        return "SpeedRanking(%s)" % ", ".join(
+            f"{oeo_id}: {self._speeds[oeo_id]}" for oeo_id in self._order)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the oeo simulation, run from the repository root using
+python -m benchmarks.<name>
+"""
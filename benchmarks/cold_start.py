@@ -0,0 +1,52 @@
+"""
+Cold-start time of the terminal arena and of a simulation worker, reading
+the game data from its JSON sources or from the compiled bundle
+
+Usage: python -m benchmarks.cold_start [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from core import gamedata
+
+repo_root = Path(__file__).resolve().parent.parent
+
+_worker = "from battlesim.runner import default_teams, run_battle; " \
+          "run_battle(default_teams, {'X': 'first', 'Y': 'first'}, 0, 0)"
+
+commands = {"oeo_terminal.py": [sys.executable, "oeo_terminal.py"],
+            "sim worker": [sys.executable, "-c", _worker]}
+
+
+def _time(command, env, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=repo_root, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="runs of each command, the median is reported")
+    args = parser.parse_args()
+
+    gamedata.compile_bundle()
+    json_env = dict(os.environ, OEO_NO_BUNDLE="1")
+    bundle_env = {k: v for k, v in os.environ.items() if k != "OEO_NO_BUNDLE"}
+    for name, command in commands.items():
+        json_time = _time(command, json_env, args.runs)
+        bundle_time = _time(command, bundle_env, args.runs)
+        print(f"{name:>15}: JSON {json_time * 1000:7.1f} ms, "
+              f"bundle {bundle_time * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Per-turn overhead of deciding through the hooks at each validation level,
+against the axel events and quadratic validation they replaced
+
+Usage: python -m benchmarks.hooks [--battles N] [--fielded N]
+                                  [--decisions N]
+"""
+import argparse
+import time
+from battlesim.battle import Battle
+from battlesim.hooks import Validation
+from battlesim.policy import FirstMovePolicy, attach_policies
+from battlesim.runner import build_team
+from battlesim.simevent import SimEvent
+from core import RandomStream
+
+try:
+    from axel import Event
+except ImportError:
+    Event = None
+
+
+class AxelBattle(Battle):
+    """
+    Battle deciding as it did before the hooks: through axel events, which
+    return a (flag, result, handler) tuple per handler, with the decisions
+    validated by counting over the values of the result for each item
+    """
+    def _setup_hooks(self):
+        self.sim_output_message = Event()
+        self.event_choose_deployments = Event()
+        self.event_choose_actions = Event()
+
+    def _decide(self, decision_type, team_id, args):
+        if decision_type == self.choose_deployments_decision:
+            results = self.event_choose_deployments(team_id, *args)
+        else:
+            results = self.event_choose_actions(team_id, *args)
+        flag, result, handler = results[0]
+        if not flag:
+            raise Exception(f"Exception in {decision_type} handler") \
+                from result
+        return result
+
+    def _validate_deployments(self, team_id, deployments):
+        for position, oeo_id in deployments.items():
+            if list(deployments.values()).count(oeo_id) > 1:
+                raise Exception(f"{oeo_id} can not be deployed to more "
+                                "than one field position")
+            if position < 0 or position >= len(self._field[team_id]):
+                raise Exception(f"Position {position} is out of bounds"
+                                f"(0-{len(self._field[team_id]) - 1})")
+            if oeo_id not in self.teams[team_id]:
+                raise Exception(f"{oeo_id} is not in {team_id}'s team")
+
+    def _validate_actions(self, team_id, actions):
+        for oeo_id, action in actions.items():
+            if not self._is_fielded(oeo_id):
+                raise Exception(f"{oeo_id} is not on the field")
+            if oeo_id not in self.teams[team_id]:
+                raise Exception(f"{oeo_id} is not on {team_id}'s side")
+            if not isinstance(action, SimEvent):
+                raise Exception("Action is not a SimEvent")
+            if action.event_type not in list(self._action_event_types):
+                raise Exception("Action event type not UseMove, UseItem, "
+                                "Switch or Run")
+
+
+def make_battle(battle_class, validation, fielded, index):
+    team = {"max_fielded": fielded,
+            "oeo": [{"species": "Chikaphu", "level": 50, "moves": ["Maul"]}
+                    for _ in range(fielded)]}
+    rng = RandomStream(0, spawn_key=(index,))
+    a, b = build_team("X", team, rng), build_team("Y", team, rng)
+    battle = battle_class({**a, **b}, "X", set(a), fielded, "Y", set(b),
+                          fielded, rng=rng, validation=validation)
+    attach_policies(battle, {team_id: FirstMovePolicy(battle, team_id)
+                             for team_id in battle.teams})
+    return battle
+
+
+def decide(battle_class, validation, fielded, decisions):
+    """
+    :return: seconds per action decision made and validated, for a team of
+             fielded oeo all on the field
+    """
+    battle = make_battle(battle_class, validation, fielded, 0)
+    for team_id, team in battle.teams.items():
+        for position, oeo_id in enumerate(sorted(team)):
+            battle.field.deploy(team_id, oeo_id, position)
+    args = (sorted(battle.teams["X"]),)
+    validate = battle._validate
+    start = time.perf_counter()
+    for _ in range(decisions):
+        actions = battle._decide(battle.choose_actions_decision, "X", args)
+        if validate:
+            battle._validate_actions("X", actions)
+    return (time.perf_counter() - start) / decisions
+
+
+def run(battle_class, validation, battles, fielded):
+    """
+    :return: (seconds, turns) to run battles between teams of fielded oeo
+    """
+    seconds, turns = 0.0, 0
+    for index in range(battles):
+        battle = make_battle(battle_class, validation, fielded, index)
+        start = time.perf_counter()
+        battle.run()
+        seconds += time.perf_counter() - start
+        turns += battle.turn_number
+    return seconds, turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=300)
+    parser.add_argument("--fielded", type=int, default=6,
+                        help="oeo in each team, all fielded")
+    parser.add_argument("--decisions", type=int, default=20000,
+                        help="action decisions timed on their own")
+    args = parser.parse_args()
+
+    modes = [(f"hooks, {validation.name.lower()} validation", Battle,
+              validation) for validation in Validation]
+    if Event is None:
+        print("axel is not installed, only the hooks are timed")
+    else:
+        modes.insert(0, ("axel, quadratic validation", AxelBattle,
+                         Validation.Full))
+    baseline = None
+    for name, battle_class, validation in modes:
+        seconds, turns = run(battle_class, validation, args.battles,
+                             args.fielded)
+        us_per_turn = seconds / turns * 1e6
+        us_per_decision = decide(battle_class, validation, args.fielded,
+                                 args.decisions) * 1e6
+        if baseline is None:
+            baseline = (us_per_turn, us_per_decision)
+        print(f"{name:>30}: {us_per_turn:8.1f} us/turn "
+              f"({baseline[0] / us_per_turn:5.2f}x), "
+              f"{us_per_decision:6.1f} us/decision "
+              f"({baseline[1] / us_per_decision:5.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Battles hosted per GB and decisions per second per core of a BattleHost,
+without a memory limit and with one, which measures the battles as they
+grow
+
+Usage: python -m benchmarks.host [--battles N]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from battlesim.host import BattleHost, PolicyClient
+from battlesim.policy import RandomPolicy
+from battlesim.runner import default_teams
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=10000)
+    args = parser.parse_args()
+
+    host = BattleHost(max_battles=args.battles)
+    # Load the shared game data before measuring
+    host.remove(host.create(default_teams))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(args.battles):
+        host.create(default_teams)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{args.battles} battles hosted: {used / args.battles:8.0f} "
+          f"bytes/battle measured, {host.stats()['memory_per_battle']:8.0f} "
+          f"bytes/battle accounted, {2 ** 30 / (used / args.battles):10.0f} "
+          f"battles/GB")
+
+    limited = BattleHost(max_battles=args.battles, max_memory=2 ** 40)
+    for _ in range(args.battles):
+        limited.create(default_teams)
+    for name, hosted in (("no memory limit", host),
+                         ("memory limit", limited)):
+        client = PolicyClient(hosted, RandomPolicy)
+        start = time.perf_counter()
+        decisions = client.run()
+        seconds = time.perf_counter() - start
+        print(f"{name:>15}: {decisions} decisions in {seconds:.2f}s: "
+              f"{decisions / seconds:10.0f} decisions/sec/core, "
+              f"{args.battles / seconds:8.0f} battles/sec/core")
+
+
+if __name__ == "__main__":
+    main()
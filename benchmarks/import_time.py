@@ -0,0 +1,73 @@
+"""
+Import time of the packages measured with python -X importtime, failing if
+an import takes longer than its threshold or imports a module it should
+only import when that module is used
+
+Usage: python -m benchmarks.import_time [--runs N] [--scale X]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+
+# Cumulative import time thresholds in microseconds, with headroom over the
+# times measured when the package exports were made lazy. Most of the time
+# of battlesim.runner is NumPy, whose import time varies widely between
+# runs, so its threshold only catches gross regressions and the modules it
+# must not import catch the rest
+thresholds = {"core": 15000, "battlesim": 15000, "battlesim.runner": 500000}
+# Modules imported where they are used rather than by the module
+deferred = {"battlesim.runner": ("battlesim.lockstep", "battlesim.matchup",
+                                 "battlesim.metrics")}
+
+
+def import_time(module):
+    """
+    :return: (the cumulative import time of module in microseconds, set of
+             the modules imported), as reported by -X importtime in a fresh
+             interpreter
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import {module}"], cwd=repo_root, check=True,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imported.add(name.strip())
+        if name.strip() == module:
+            return int(cumulative_us), imported
+    raise Exception(f"-X importtime did not report an import of {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5,
+                        help="runs of each import, the median is reported")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the thresholds, for slower machines")
+    args = parser.parse_args()
+
+    failed = []
+    for module, threshold in thresholds.items():
+        runs = [import_time(module) for _ in range(args.runs)]
+        us = statistics.median(us for us, _ in runs)
+        limit = threshold * args.scale
+        eager = sorted(set(deferred.get(module, ())).intersection(
+            *(imported for _, imported in runs)))
+        ok = us <= limit and not eager
+        print(f"{module:>16}: {us / 1000:8.1f} ms (threshold "
+              f"{limit / 1000:.1f} ms){'' if ok else '  REGRESSION'}"
+              f"{f', imports {eager}' if eager else ''}")
+        if not ok:
+            failed.append(module)
+    if failed:
+        sys.exit(f"Import time regression in {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
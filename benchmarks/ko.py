@@ -0,0 +1,81 @@
+"""
+Time to find the chance of a knock out in 1 to N hits exactly, against
+estimating it by sampling the damage function, checking they agree
+
+Usage: python -m benchmarks.ko [--trials N] [--level N] [--seed N]
+"""
+import argparse
+import math
+import sys
+import time
+import timeit
+from battlesim.damage import calculate_standard_damage
+from battlesim.damagecalc import damage_distribution, ko_chances
+from battlesim.runner import build_team
+from core import RandomStream, move_catalog
+
+
+def monte_carlo(user, move, target, hits, trials, rng):
+    """
+    :return: list of the fraction of trials knocking target out within each
+             number of hits up to hits
+    """
+    knocked_out = [0] * hits
+    for _ in range(trials):
+        hp = target.current_hp
+        for hit in range(hits):
+            hp -= calculate_standard_damage(user, move, target, rng=rng)
+            if hp <= 0:
+                for later in range(hit, hits):
+                    knocked_out[later] += 1
+                break
+    return [count / trials for count in knocked_out]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=20000)
+    parser.add_argument("--level", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = RandomStream(args.seed)
+    team = {"max_fielded": 1,
+            "oeo": [{"species": "Chikaphu", "level": args.level,
+                     "moves": ["Maul"]}] * 2}
+    user, target = build_team("X", team, rng).values()
+    move = move_catalog.get("Maul")
+
+    distribution = damage_distribution(user, move, target)
+    exact = [float(chance) for chance
+             in ko_chances(distribution, target.current_hp)]
+    hits = len(exact)
+    print(f"{user.oeo_id} using {move.name} on {target.oeo_id} "
+          f"({target.current_hp} HP): damage {distribution.min}-"
+          f"{distribution.max}, mean {distribution.mean:.2f}")
+
+    runs = 1000
+    exact_us = timeit.timeit(
+        lambda: ko_chances(damage_distribution(user, move, target),
+                           target.current_hp), number=runs) / runs * 1e6
+    start = time.perf_counter()
+    sampled = monte_carlo(user, move, target, hits, args.trials, rng)
+    sampled_us = (time.perf_counter() - start) * 1e6
+    print(f"exact: {exact_us:10.1f} us, sampled ({args.trials} trials): "
+          f"{sampled_us:10.1f} us, {sampled_us / exact_us:8.0f}x")
+
+    failed = False
+    for hit, (p, estimate) in enumerate(zip(exact, sampled), 1):
+        # Four standard errors of the estimate, at least one trial's worth
+        tolerance = max(4 * math.sqrt(p * (1 - p) / args.trials),
+                        1 / args.trials)
+        ok = abs(p - estimate) <= tolerance
+        failed = failed or not ok
+        print(f"  KO within {hit:>2} hit(s): exact {p:.6f}, sampled "
+              f"{estimate:.6f}{'' if ok else '  MISMATCH'}")
+    if failed:
+        sys.exit("Sampled knock out chances do not agree with the exact ones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Battles/sec of the lockstep engine against running each battle with
+Battle, checking that their outcomes follow the same distribution
+
+Usage: python -m benchmarks.lockstep [--battles N] [--lockstep-battles N]
+                                     [--seed N]
+"""
+import argparse
+import math
+import statistics
+import sys
+from collections import Counter
+from battlesim.runner import default_teams, run_battles, run_lockstep
+
+scenarios = {
+    "1v1": default_teams,
+    # Two fielded from three, so oeo are replaced part way through turns
+    "2v2": {team_id: {"max_fielded": 2,
+                      "oeo": [{"species": "Chikaphu", "level": level,
+                               "moves": ["Maul"]}
+                              for level in (46, 50, 54)]}
+            for team_id in ("X", "Y")}}
+
+
+def proportion_z(a_count, a_total, b_count, b_total):
+    p = (a_count + b_count) / (a_total + b_total)
+    se = math.sqrt(p * (1 - p) * (1 / a_total + 1 / b_total))
+    return (a_count / a_total - b_count / b_total) / se if se else 0.0
+
+
+def mean_z(a, b):
+    se = math.sqrt(statistics.variance(a) / len(a) +
+                   statistics.variance(b) / len(b))
+    return (statistics.mean(a) - statistics.mean(b)) / se if se else 0.0
+
+
+def distribution_z(a, b, min_count=10):
+    """
+    Two sample chi-squared test of whether a and b have the same
+    distribution, with the rare values pooled
+
+    :return: the statistic as a standard normal z by the Wilson-Hilferty
+             approximation
+    """
+    a_counts, b_counts = Counter(a), Counter(b)
+    bins, rare = [], [0, 0]
+    for value in sorted(set(a_counts) | set(b_counts)):
+        counts = [a_counts[value], b_counts[value]]
+        if sum(counts) < min_count:
+            rare = [rare[0] + counts[0], rare[1] + counts[1]]
+        else:
+            bins.append(counts)
+    if sum(rare):
+        bins.append(rare)
+    df = len(bins) - 1
+    if df < 1:
+        return 0.0
+    k1, k2 = math.sqrt(len(b) / len(a)), math.sqrt(len(a) / len(b))
+    chi2 = sum((r * k1 - s * k2) ** 2 / (r + s) for r, s in bins)
+    return ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / \
+        math.sqrt(2 / (9 * df))
+
+
+def compare(battle, lockstep, team_ids):
+    """
+    :return: list of (name, z) of each statistic compared
+    """
+    a_id = team_ids[0]
+    z = [(f"{a_id} win rate", proportion_z(
+        battle.victories[a_id], battle.battles,
+        lockstep.victories[a_id], lockstep.battles)),
+        ("mean turns", mean_z(battle.turns, lockstep.turns)),
+        ("turns distribution", distribution_z(battle.turns, lockstep.turns))]
+    for team_id in team_ids:
+        damage = [[r.damage_dealt[team_id] for r in results.results]
+                  for results in (battle, lockstep)]
+        z.append((f"mean damage by {team_id}", mean_z(*damage)))
+    return z
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=3000,
+                        help="battles run with Battle per comparison")
+    parser.add_argument("--lockstep-battles", type=int, default=100000,
+                        help="battles run with the lockstep engine per "
+                             "comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = False
+    for name, teams in scenarios.items():
+        for policy in ("first", "random"):
+            policy_names = {team_id: policy for team_id in teams}
+            battle = run_battles(teams, policy_names, args.battles, 0,
+                                 args.seed)
+            lockstep = run_lockstep(teams, policy_names,
+                                    args.lockstep_battles, args.seed)
+            speedup = lockstep.battles_per_second / battle.battles_per_second
+            print(f"{name}, {policy} policy: Battle "
+                  f"{battle.battles_per_second:9.0f} battles/sec, lockstep "
+                  f"{lockstep.battles_per_second:9.0f} battles/sec "
+                  f"({speedup:5.1f}x)")
+            for statistic, z in compare(battle, lockstep, list(teams)):
+                # Four standard errors, a false alarm in about 1 in 16000
+                ok = abs(z) <= 4
+                failed = failed or not ok
+                print(f"  {statistic:>20}: z = {z:6.2f}"
+                      f"{'' if ok else '  MISMATCH'}")
+    if failed:
+        sys.exit("Lockstep outcomes differ from those of Battle")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Battles/sec with logging at WARNING against DEBUG, with the DEBUG records
+written to a file directly or through the queue used for simulations
+
+Usage: python -m benchmarks.log_overhead [--battles N]
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from battlesim.runner import default_teams, run_battles
+from battlesim.simlogging import configure_simulation_logging
+
+
+def _warning(log_file):
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _debug_file(log_file):
+    handler = logging.FileHandler(log_file, "w", encoding="utf-8")
+    handler.setFormatter(logging.Formatter(
+        "%(levelname)s: %(message)s (%(name)s:%(lineno)d)"))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+
+
+def _debug_queue(log_file):
+    return configure_simulation_logging(logging.DEBUG, log_file)
+
+
+def _reset(listener):
+    if listener is not None:
+        listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=2000)
+    args = parser.parse_args()
+
+    policy_names = {team_id: "random" for team_id in default_teams}
+    modes = [("WARNING", _warning), ("DEBUG, file", _debug_file),
+             ("DEBUG, queue", _debug_queue)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, configure in modes:
+            listener = configure(Path(tmp) / "sim.log")
+            start = time.perf_counter()
+            run_battles(default_teams, policy_names, args.battles, workers=0)
+            # Include the time taken to drain the queue
+            _reset(listener)
+            seconds = time.perf_counter() - start
+            print(f"{name:>12}: {args.battles / seconds:10.1f} battles/sec")
+
+
+if __name__ == "__main__":
+    main()
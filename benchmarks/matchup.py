@@ -0,0 +1,189 @@
+"""
+Time to build the matchup table in full, from its cache and after one
+species or move file changes, checking the incremental builds against a
+full one, that invalid files are left out, and the damage ranges against
+the damage function
+
+Usage: python -m benchmarks.matchup [--species N] [--moves N] [--checks N]
+                                    [--seed N]
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+from battlesim import damage
+from battlesim.matchup import get_matchup_table, load_matchup_table, max_iv
+from battlesim.runner import build_team
+from core import Element, MoveCategory, RandomStream, gamedata, move_catalog
+from core.stats import calculate_stat
+
+stat_names = ("hp", "attack", "defence", "sp_attack", "sp_defence", "speed")
+
+
+def write_species(root, name, rng):
+    elements = rng.sample([e.name for e in Element], rng.randint(1, 2))
+    data = {"base_stats": {stat: rng.randint(20, 160) for stat in stat_names},
+            "elements": elements}
+    (root / "oeo" / f"{name}.json").write_text(json.dumps(data))
+
+
+def write_move(root, name, rng):
+    data = {"name": name, "element": rng.choice([e.name for e in Element]),
+            "category": rng.choice([c.name for c in MoveCategory]),
+            "power": rng.randint(10, 150), "accuracy": 100,
+            "makes_contact": False}
+    (root / "moves" / f"{name}.json").write_text(json.dumps(data))
+
+
+def make_data(root, species, moves, rng):
+    for category in ("oeo", "moves"):
+        (root / category).mkdir(parents=True)
+    shutil.copytree(gamedata.data_root / "battle", root / "battle")
+    for i in range(species):
+        write_species(root, f"Species{i:04d}", rng)
+    for i in range(moves):
+        write_move(root, f"Move{i:04d}", rng)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def same(a, b):
+    return a.species == b.species and a.moves == b.moves and \
+        np.array_equal(a.stab, b.stab) and \
+        np.array_equal(a.effectiveness, b.effectiveness) and \
+        np.array_equal(a.damage, b.damage) and np.array_equal(a.hp, b.hp)
+
+
+def new_oeo(species, elements, base_stats, level, iv):
+    stats = {stat: calculate_stat(base_stats[stat], iv, 0, level)
+             for stat in stat_names[1:]}
+    return SimpleNamespace(species=species, elements=elements, level=level,
+                           **stats)
+
+
+def check_ranges(table, root, checks, rng):
+    """
+    :return: number of the checks sampled matchups whose damage range
+             differs from the least and most damage of the damage function
+    """
+    data = {name: json.loads((root / "oeo" / f"{name}.json").read_text())
+            for name in table.species}
+    moves = {name: move_catalog.validate(name, json.loads(
+        (root / "moves" / f"{name}.json").read_text()))
+        for name in table.moves}
+    failures = 0
+    for _ in range(checks):
+        attacker, defender = rng.choice(table.species), \
+            rng.choice(table.species)
+        move = moves[rng.choice(table.moves)]
+        level = rng.choice(table.levels)
+        oeos = {}
+        for role, species, iv in (("weak", attacker, 0),
+                                  ("strong", attacker, max_iv),
+                                  ("frail", defender, 0),
+                                  ("tough", defender, max_iv)):
+            elements = tuple(Element[e] for e in data[species]["elements"])
+            oeos[role] = new_oeo(species, elements,
+                                 data[species]["base_stats"], level, iv)
+        if move.category == MoveCategory.Status:
+            expected = (0, 0)
+        else:
+            expected = (min(damage.standard_damage_rolls(
+                            oeos["weak"], move, oeos["tough"])),
+                        max(damage.standard_damage_rolls(
+                            oeos["strong"], move, oeos["frail"])))
+        if table.damage_range(attacker, move.name, defender,
+                              level) != expected:
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--species", type=int, default=150)
+    parser.add_argument("--moves", type=int, default=100)
+    parser.add_argument("--checks", type=int, default=2000,
+                        help="matchups checked against the damage function")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        root, cache = Path(tmp) / "data", Path(tmp) / "matchups.cache"
+        make_data(root, args.species, args.moves, rng)
+        table, full = timed(lambda: load_matchup_table(root, cache))
+        print(f"{table}, {table.damage.nbytes / 2 ** 20:.1f} MiB of damage")
+        _, cached = timed(lambda: load_matchup_table(root, cache))
+        print(f"{'full build':>22}: {full * 1e3:9.1f} ms")
+        print(f"{'from cache':>22}: {cached * 1e3:9.1f} ms")
+
+        for name, change in (("one species changed", lambda: write_species(
+                                  root, table.species[0], rng)),
+                             ("one move changed", lambda: write_move(
+                                  root, table.moves[0], rng)),
+                             ("one species added", lambda: write_species(
+                                  root, "Species9999", rng))):
+            change()
+            incremental, seconds = timed(
+                lambda: load_matchup_table(root, cache))
+            rebuilt = load_matchup_table(root, Path(tmp) / "full.cache")
+            (Path(tmp) / "full.cache").unlink()
+            ok = same(incremental, rebuilt)
+            failed = failed or not ok
+            print(f"{name:>22}: {seconds * 1e3:9.1f} ms "
+                  f"({full / seconds:5.1f}x)"
+                  f"{'' if ok else '  DIFFERS FROM A FULL BUILD'}")
+
+        # A move missing a key and a species that is not JSON
+        (root / "moves" / "Broken.json").write_text(json.dumps(
+            {"name": "Broken", "element": "Normal", "category": "Physical",
+             "power": 40, "accuracy": 100}))
+        (root / "oeo" / "Broken.json").write_text("{")
+        with_invalid = load_matchup_table(root, cache)
+        ok = "Broken" not in with_invalid.species + with_invalid.moves and \
+            same(with_invalid, incremental)
+        failed = failed or not ok
+        print(f"{'invalid files':>22}: "
+              f"{'left out' if ok else 'NOT LEFT OUT CORRECTLY'}")
+
+        failures = check_ranges(incremental, root, args.checks, rng)
+        failed = failed or failures > 0
+        print(f"{args.checks - failures}/{args.checks} damage ranges match "
+              f"the damage function")
+
+    team = {"max_fielded": 1,
+            "oeo": [{"species": "Chikaphu", "level": 50,
+                     "moves": ["Maul"]}] * 2}
+    user, target = build_team("X", team, RandomStream(args.seed)).values()
+    move = move_catalog.get("Maul")
+    runs = 200000
+    get_matchup_table()
+    computed_us = timeit.timeit(
+        lambda: (damage._same_type_attack_bonus(move.element, user.elements),
+                 damage._element_effectiveness(move.element,
+                                               target.elements)),
+        number=runs) / runs * 1e6
+    table_us = timeit.timeit(
+        lambda: damage._stab_and_effectiveness(user, move, target),
+        number=runs) / runs * 1e6
+    print(f"stab and effectiveness per hit: computed {computed_us:.2f} us, "
+          f"matchup table {table_us:.2f} us")
+    if failed:
+        sys.exit("The matchup table does not match the damage function or "
+                 "a full build")
+
+
+if __name__ == "__main__":
+    main()
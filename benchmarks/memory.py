@@ -0,0 +1,83 @@
+"""
+Bytes per oeo when holding many oeo as Oeo objects, in the layout Oeo had
+before it had __slots__, or in a Roster
+
+Usage: python -m benchmarks.memory [--count N]
+"""
+import argparse
+import random
+import tracemalloc
+import uuid
+from namedlist import namedlist
+from core import Element, Oeo, Roster, Stats, gamedata
+
+
+class _DictStats(namedlist("Stat", "hp attack defence sp_attack sp_defence "
+                                   "speed", default=0)):
+    """
+    Stats as they were before __slots__, with a __dict__ per instance
+    """
+
+
+class _DictOeo(object):
+    """
+    The attributes of Oeo as they were before __slots__: held in a __dict__,
+    with elements and base stats read from the species data for every oeo
+    """
+    def __init__(self, species, level, species_data):
+        self._oeo_id = uuid.uuid4().hex[8:-8]
+        self._name = ""
+        self._species = species
+        self._level = level
+        self._xp = 0
+        self._elements = [Element[e] for e in species_data["elements"]]
+        self._base_stats = _DictStats(**species_data["base_stats"])
+        self._ivs = _DictStats(*Stats.rand_ivs())
+        self._evs = _DictStats()
+        self._current_hp = (self._ivs.hp + 2 * self._base_stats.hp + 100) * \
+            level // 100 + 10
+        self._moves = ["Maul"]
+        self._status_conditions = []
+        self._held_item = None
+
+
+def _create(count, seed):
+    random.seed(seed)
+    for _ in range(count):
+        yield Oeo.create("Chikaphu", "", random.randint(1, 100), 0)
+
+
+def _create_dict_oeo(count, seed):
+    species_data = gamedata.read_json("oeo", "Chikaphu")
+    random.seed(seed)
+    return [_DictOeo("Chikaphu", random.randint(1, 100), species_data)
+            for _ in range(count)]
+
+
+def _measure(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del held
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1000000,
+                        help="number of oeo to hold in memory")
+    args = parser.parse_args()
+
+    layouts = [("dict-backed Oeo objects",
+                lambda: _create_dict_oeo(args.count, 0)),
+               ("Oeo objects", lambda: list(_create(args.count, 0))),
+               ("Roster", lambda: Roster(_create(args.count, 0)))]
+    for name, build in layouts:
+        print(f"{name:>23}: {_measure(build, args.count):8.1f} bytes/oeo "
+              f"({args.count} oeo)")
+
+
+if __name__ == "__main__":
+    main()
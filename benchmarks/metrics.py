@@ -0,0 +1,87 @@
+"""
+Battles/sec with and without BattleMetrics, checking that an instrumented
+battle writes the same battle log as one that is not and that its phases
+add up to the time spent in run
+
+Usage: python -m benchmarks.metrics [--battles N] [--repeats N] [--seed N]
+"""
+import argparse
+import io
+import random
+import sys
+import time
+from battlesim.battle import Battle
+from battlesim.battlelog import BattleLogWriter
+from battlesim.metrics import BattleMetrics, MemorySink, PrometheusSink
+from battlesim.policy import RandomPolicy, attach_policies
+from battlesim.runner import build_team, default_teams, run_battles
+from core import RandomStream
+from .rng import teams
+
+
+def battle_log(seed, metrics=None):
+    """
+    :return: (the battle log of the battle seeded by seed, seconds in run)
+    """
+    rng = RandomStream(seed)
+    oeos = {team_id: build_team(team_id, team, rng)
+            for team_id, team in teams.items()}
+    log = io.StringIO()
+    with BattleLogWriter(log) as writer:
+        battle = Battle({**oeos["X"], **oeos["Y"]}, "X", set(oeos["X"]), 2,
+                        "Y", set(oeos["Y"]), 2, writer, rng, metrics=metrics)
+        attach_policies(battle, {
+            team_id: RandomPolicy(battle, team_id,
+                                  random.Random(f"{seed}:{team_id}"))
+            for team_id in teams})
+        start = time.perf_counter()
+        battle.run()
+        return log.getvalue(), time.perf_counter() - start
+
+
+def battles_per_second(battles, repeats, seed, instrumented):
+    policy_names = {team_id: "random" for team_id in default_teams}
+    best = 0.0
+    for _ in range(repeats):
+        metrics = BattleMetrics() if instrumented else None
+        results = run_battles(default_teams, policy_names, battles, 0, seed,
+                              metrics=metrics)
+        best = max(best, results.battles_per_second)
+    return best, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    disabled, _ = battles_per_second(args.battles, args.repeats, args.seed,
+                                     False)
+    enabled, metrics = battles_per_second(args.battles, args.repeats,
+                                          args.seed, True)
+    print(f"{'no metrics':>12}: {disabled:10.1f} battles/sec")
+    print(f"{'metrics':>12}: {enabled:10.1f} battles/sec "
+          f"({disabled / enabled - 1:.1%} more time per battle)")
+    print(metrics.summary())
+    sink = MemorySink()
+    metrics.export(sink)
+    print(f"exported {len(PrometheusSink('').format(metrics).splitlines())} "
+          f"Prometheus lines, {len(sink.exports)} in memory")
+
+    plain, _ = battle_log(args.seed)
+    metrics = BattleMetrics()
+    instrumented, seconds = battle_log(args.seed, metrics)
+    if plain != instrumented:
+        sys.exit("An instrumented battle wrote a different battle log")
+    timed = sum(metrics.seconds.values())
+    print(f"same battle log instrumented, phases {timed * 1e3:.2f} ms of "
+          f"{seconds * 1e3:.2f} ms in run "
+          f"({metrics.seconds['battle_log'] * 1e3:.2f} ms battle log)")
+    if not 0.9 * seconds <= timed <= seconds:
+        sys.exit("The phases do not add up to the time spent in run")
+
+
+if __name__ == "__main__":
+    main()
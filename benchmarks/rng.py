@@ -0,0 +1,71 @@
+"""
+Draws/sec of RandomStream against the random module, checking that battles
+from the same seed write the same battle log byte for byte
+
+Usage: python -m benchmarks.rng [--draws N] [--seed N]
+"""
+import argparse
+import io
+import random
+import sys
+import timeit
+from battlesim.battle import Battle
+from battlesim.battlelog import BattleLogWriter
+from battlesim.policy import RandomPolicy, attach_policies
+from battlesim.runner import build_team
+from core import RandomStream
+
+teams = {team_id: {"max_fielded": 2,
+                   "oeo": [{"species": "Chikaphu", "level": level,
+                            "moves": ["Maul"]}
+                           for level in (40, 45, 50, 55)]}
+         for team_id in ("X", "Y")}
+
+
+def battle_log(seed, index):
+    """
+    :return: the battle log of the battle seeded by seed and index
+    """
+    rng = RandomStream(seed, spawn_key=(index,))
+    oeos = {team_id: build_team(team_id, team, rng)
+            for team_id, team in teams.items()}
+    log = io.StringIO()
+    with BattleLogWriter(log) as writer:
+        battle = Battle({**oeos["X"], **oeos["Y"]}, "X", set(oeos["X"]), 2,
+                        "Y", set(oeos["Y"]), 2, writer, rng)
+        attach_policies(battle, {
+            team_id: RandomPolicy(battle, team_id,
+                                  random.Random(f"{seed}:{index}:{team_id}"))
+            for team_id in teams})
+        battle.run()
+        return log.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--draws", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stream = RandomStream(args.seed)
+    timings = [
+        ("random.randint", lambda: random.randint(85, 100), args.draws),
+        ("RandomStream.randint", lambda: stream.randint(85, 100), args.draws),
+        ("RandomStream.randints", lambda: stream.randints(85, 100, 1000),
+         args.draws // 1000)]
+    for name, draw, calls in timings:
+        seconds = timeit.timeit(draw, number=calls)
+        draws = calls * (1000 if name.endswith("randints") else 1)
+        print(f"{name:>21}: {draws / seconds:12.0f} draws/sec")
+
+    logs = [battle_log(args.seed, index) for index in (0, 0, 1)]
+    if logs[0] != logs[1]:
+        sys.exit("Battles from the same seed wrote different battle logs")
+    if logs[0] == logs[2]:
+        sys.exit("Battles from different streams wrote the same battle log")
+    print(f"same seed, same battle log: {len(logs[0].encode())} bytes "
+          f"identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Event-queue throughput of EventScheduler against the PQDict float priorities
+it replaced
+
+Usage: python -m benchmarks.scheduler [--turns N] [--actions N]
+"""
+import argparse
+import timeit
+try:
+    from pqdict import PQDict
+except ImportError:
+    # Renamed in later versions of pqdict
+    from pqdict import pqdict as PQDict
+from battlesim.battle import Battle
+from battlesim.scheduler import EventScheduler
+from battlesim.simevent import SimEvent, SimEventType
+
+_turn_stage_map = {8: '02', 7: '03', 6: '04', 5: '05', 4: '06',
+                   3: '07', 2: '08', 1: '09', 0: '10',
+                   -1: '11', -2: '12', -3: '13', -4: '14',
+                   -5: '15', -6: '16', -7: '17'}
+
+_turn_spi_map = {0: '01', 1: '02', 2: '03', 3: '04', 4: '05', 5: '06',
+                 6: '07', 7: '08', 8: '09', 9: '10', 10: '11', 11: '12'}
+
+
+def _pqdict(turns, actions):
+    queue = PQDict()
+    for turn in range(1, turns + 1):
+        queue.additem(SimEvent(SimEventType.BeginTurn), turn)
+        for speed_rank in range(actions):
+            priority = float(f"{turn}.{_turn_stage_map[0]}"
+                             f"{_turn_spi_map[speed_rank]}")
+            queue.additem(SimEvent(SimEventType.UseMove), priority)
+        while queue:
+            queue.popitem()
+
+
+def _scheduler(turns, actions):
+    queue = EventScheduler()
+    for turn in range(1, turns + 1):
+        queue.push(SimEvent(SimEventType.BeginTurn), turn,
+                   Battle._begin_turn_stage)
+        for speed_rank in range(actions):
+            queue.push(SimEvent(SimEventType.UseMove), turn, 0, speed_rank)
+        while queue:
+            queue.pop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--actions", type=int, default=12,
+                        help="actions per turn, at most 12 for PQDict")
+    args = parser.parse_args()
+
+    events = args.turns * (args.actions + 1)
+    for name, run in [("PQDict", _pqdict), ("EventScheduler", _scheduler)]:
+        seconds = timeit.timeit(lambda: run(args.turns, args.actions),
+                                number=1)
+        print(f"{name:>14}: {events / seconds:12.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
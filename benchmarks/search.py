@@ -0,0 +1,60 @@
+"""
+Nodes per second of the lookahead search and the win rate of the search
+policy against the other policies
+
+Usage: python -m benchmarks.search [--depth N] [--battles N]
+"""
+import argparse
+import random
+import time
+from battlesim.battle import Battle
+from battlesim.runner import build_team, run_battles
+from battlesim.search import BattleModel, Lookahead
+
+teams = {team_id: {"max_fielded": 2,
+                   "oeo": [{"species": "Chikaphu", "level": level,
+                            "moves": ["Maul"]}
+                           for level in (40, 45, 50, 55)]}
+         for team_id in ("X", "Y")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=4,
+                        help="depth of the timed search in turns")
+    parser.add_argument("--battles", type=int, default=50,
+                        help="battles against each other policy")
+    args = parser.parse_args()
+
+    # The same ivs every run, so the searched tree is the same
+    random.seed(0)
+    oeos = {}
+    for team_id, team in teams.items():
+        oeos[team_id] = build_team(team_id, team)
+    battle = Battle({**oeos["X"], **oeos["Y"]}, "X", set(oeos["X"]), 2,
+                    "Y", set(oeos["Y"]), 2)
+    for team_id, team in oeos.items():
+        for position, oeo_id in enumerate(list(team)[:2]):
+            battle.field.deploy(team_id, oeo_id, position)
+
+    model = BattleModel(battle, "X")
+    # No time budget, so the search goes to the full depth
+    lookahead = Lookahead(model, time_budget=float("inf"),
+                          max_depth=args.depth)
+    start = time.perf_counter()
+    lookahead.best_actions(model.state(battle))
+    seconds = time.perf_counter() - start
+    print(f"depth {args.depth}: {lookahead.nodes} nodes in {seconds:.2f}s, "
+          f"{lookahead.nodes / seconds:10.0f} nodes/sec")
+
+    for opponent in ("first", "random"):
+        results = run_battles(teams, {"X": "search", "Y": opponent},
+                              args.battles, workers=0)
+        wins = sum(1 for result in results.results if result.victor == "X")
+        print(f"search vs {opponent:>6}: won {wins} of {args.battles} "
+              f"({wins / args.battles:.0%}), "
+              f"{results.seconds / args.battles:.2f}s per battle")
+
+
+if __name__ == "__main__":
+    main()
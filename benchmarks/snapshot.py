@@ -0,0 +1,71 @@
+"""
+Size of a Battle snapshot and the time to take and restore it, checking that
+a restored battle plays out exactly as the original
+
+Usage: python -m benchmarks.snapshot [--runs N] [--seed N]
+"""
+import argparse
+import pickle
+import random
+import sys
+import timeit
+from battlesim.battle import Battle
+from battlesim.host import BattleHost, PolicyClient
+from battlesim.policy import RandomPolicy, attach_policies
+from battlesim.runner import default_teams
+
+
+def play_out(battle, seed):
+    """
+    :return: (victor, turn number, current hp of every oeo) after running \
+             battle to its end with random policies seeded by seed
+    """
+    random.seed(seed)
+    attach_policies(battle, {team_id: RandomPolicy(battle, team_id)
+                             for team_id in battle.teams})
+    victor = battle.run()
+    return victor, battle.turn_number, [oeo.current_hp for oeo
+                                        in battle.oeo.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Step a hosted battle part of the way through, so the snapshot holds a
+    # field and pending events
+    random.seed(args.seed)
+    host = BattleHost()
+    battle_id = host.create(default_teams)
+    client = PolicyClient(host, RandomPolicy)
+    for _ in range(4):
+        client.decide_all()
+    battle = host[battle_id].battle
+    blob = battle.snapshot()
+
+    print(f"snapshot: {len(blob)} bytes "
+          f"(pickle of the battle's oeo: {len(pickle.dumps(battle.oeo))} "
+          f"bytes)")
+    snapshot_us = timeit.timeit(battle.snapshot,
+                                number=args.runs) / args.runs * 1e6
+    restore_us = timeit.timeit(lambda: Battle.restore(blob),
+                               number=args.runs) / args.runs * 1e6
+    print(f"snapshot: {snapshot_us:8.1f} us, restore: {restore_us:8.1f} us")
+
+    # The restored copies and the original must finish the same way from the
+    # same random draws
+    results = [play_out(Battle.restore(blob), args.seed) for _ in range(2)]
+    random.seed(args.seed)
+    client.run()
+    results.append((host[battle_id].victor, battle.turn_number,
+                    [oeo.current_hp for oeo in battle.oeo.values()]))
+    if any(result != results[0] for result in results):
+        sys.exit(f"Restored battles diverged: {results}")
+    print(f"restored battles agree: {results[0][0]} won on turn "
+          f"{results[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
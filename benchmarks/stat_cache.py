@@ -0,0 +1,47 @@
+"""
+Per-turn cost of reading derived stats with and without the Oeo stat cache
+
+Usage: python -m benchmarks.stat_cache [--oeo N] [--turns N]
+"""
+import argparse
+import timeit
+from core import Oeo
+
+
+def _uncached_turn(oeos):
+    # The access pattern of a battle turn with the stats recalculated on
+    # every read, as Oeo did before the computed-stat cache was added
+    for _ in range(3):
+        sorted(oeos, key=lambda o: o._calculate_stat("speed"), reverse=True)
+    for o in oeos:
+        o._calculate_stat("attack")
+        o._calculate_stat("defence")
+        o._calculate_hp_stat()
+
+
+def _cached_turn(oeos):
+    for _ in range(3):
+        sorted(oeos, key=lambda o: o.speed, reverse=True)
+    for o in oeos:
+        o.attack
+        o.defence
+        o.full_hp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--oeo", type=int, default=12,
+                        help="number of oeo in the battle")
+    parser.add_argument("--turns", type=int, default=20000,
+                        help="number of turns to time")
+    args = parser.parse_args()
+
+    oeos = [Oeo.create("Chikaphu", "", 50, 0) for _ in range(args.oeo)]
+    for name, turn in [("uncached", _uncached_turn), ("cached", _cached_turn)]:
+        seconds = timeit.timeit(lambda: turn(oeos), number=args.turns)
+        print(f"{name:>8}: {seconds / args.turns * 1e6:8.2f} us/turn "
+              f"({args.oeo} oeo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Time to save and load many oeo as one JSON file per oeo or in an OeoStore
+
+Usage: python -m benchmarks.store [--count N]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from core import Oeo, OeoStore
+
+
+def _json_files(oeos, tmp):
+    dir_path = Path(tmp) / "oeo"
+    dir_path.mkdir()
+    start = time.perf_counter()
+    for oeo in oeos:
+        oeo.save(dir_path)
+    saved = time.perf_counter()
+    loaded = [Oeo.load(path) for path in dir_path.glob("*.json")]
+    return saved - start, time.perf_counter() - saved, len(loaded)
+
+
+def _store(oeos, tmp):
+    with OeoStore(Path(tmp) / "oeo.db") as store:
+        start = time.perf_counter()
+        store.save_many(oeos)
+        saved = time.perf_counter()
+        loaded = list(store.iter_oeo())
+    return saved - start, time.perf_counter() - saved, len(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=10000,
+                        help="number of oeo to save and load")
+    args = parser.parse_args()
+
+    random.seed(0)
+    oeos = [Oeo.create("Chikaphu", "", random.randint(1, 100), 0)
+            for _ in range(args.count)]
+    for name, run in [("JSON files", _json_files), ("OeoStore", _store)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            save, load, count = run(oeos, tmp)
+        print(f"{name:>10}: save {save:7.3f}s, load {load:7.3f}s "
+              f"({count} oeo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,39 @@
-from .oeo import Oeo
-from .element import Element
-from .stats import Stats
-from .move import Move, MoveCategory
-from .item import Item
+"""
+The oeo data model
+
+The exports are imported on first use so that importing core, or one of
+its submodules, does not pay for the modules that are not needed.
+"""
+import importlib
+
+_exports = {"Oeo": ".oeo", "Element": ".element", "Stats": ".stats",
+            "Move": ".move", "MoveCategory": ".move", "MoveCatalog": ".move",
+            "move_catalog": ".move", "Item": ".item",
+            "SpeciesBase": ".species", "SpeciesRegistry": ".species",
+            "species_registry": ".species", "Roster": ".roster",
+            "RosterOeo": ".roster", "OeoStore": ".store",
+            "RandomStream": ".rng"}
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name):
+    try:
+        module_name = _exports[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{name!r}") from None
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except AttributeError as e:
+        # Raised as is, "from package import name" would report it as the
+        # export not existing rather than the import failing
+        raise ImportError(f"Importing {module_name} for {name} failed: "
+                          f"{e}") from e
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
@@ -0,0 +1,159 @@
+"""
+Game data compiled into a single bundle file for a fast cold start
+
+The bundle holds the JSON data of data/oeo, data/moves and data/battle in
+one pickle, together with a hash of the source files it was built from.
+It is read with one read and used for as long as it matches the sources,
+otherwise the JSON files are read directly.
+
+Build it from the repository root using python -m core.gamedata
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Resolved from the package rather than the working directory
+data_root = Path(__file__).resolve().parent.parent / "data"
+bundle_path = data_root / "gamedata.bundle"
+categories = ("oeo", "moves", "battle")
+bundle_version = 1
+
+_bundle = None
+_bundle_checked = False
+
+
+def _source_files(root):
+    for category in categories:
+        for path in sorted((root / category).glob("*.json")):
+            yield category, path
+
+
+def _signature(root):
+    """
+    :return: the names, sizes and modification times of the source files, \
+             cheap to compare against a bundle without reading the files
+    """
+    signature = []
+    for category, path in _source_files(root):
+        stat = path.stat()
+        signature.append((category, path.name, stat.st_size,
+                          stat.st_mtime_ns))
+    return signature
+
+
+def _content_hash(root):
+    h = hashlib.sha256()
+    for category, path in _source_files(root):
+        h.update(f"{category}/{path.name}\0".encode("utf-8"))
+        h.update(path.read_bytes())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def compile_bundle(root=None, path=None):
+    """
+    Compile the game data under root into a bundle at path
+
+    :return: the content hash of the bundle
+    """
+    root = Path(root) if root is not None else data_root
+    path = Path(path) if path is not None else bundle_path
+    data = {category: {} for category in categories}
+    for category, source in _source_files(root):
+        with source.open(encoding="utf-8") as f:
+            data[category][source.stem] = json.load(f)
+    content_hash = _content_hash(root)
+    bundle = {"version": bundle_version, "content_hash": content_hash,
+              "signature": _signature(root), "data": data}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp, path)
+    logger.info(f"Compiled game data bundle {path} ({content_hash[:12]})")
+    return content_hash
+
+
+def load_bundle(path=None, root=None):
+    """
+    :return: dict of category:{name:data} from the bundle at path, or None \
+             if there is no bundle or it no longer matches the sources
+    """
+    path = Path(path) if path is not None else bundle_path
+    root = Path(root) if root is not None else data_root
+    try:
+        bundle = pickle.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable game data bundle {path}: {e}")
+        return None
+    if bundle.get("version") != bundle_version:
+        logger.warning(f"Ignoring game data bundle {path} with version "
+                       f"{bundle.get('version')}")
+        return None
+    if bundle["signature"] != _signature(root) and \
+            bundle["content_hash"] != _content_hash(root):
+        logger.warning(f"Game data bundle {path} is stale, reading the JSON "
+                       f"sources instead")
+        return None
+    return bundle["data"]
+
+
+def _get_bundle():
+    global _bundle, _bundle_checked
+    if not _bundle_checked:
+        if os.environ.get("OEO_NO_BUNDLE"):
+            _bundle = None
+        else:
+            _bundle = load_bundle()
+        _bundle_checked = True
+    return _bundle
+
+
+def invalidate():
+    """
+    Check for the bundle again on next use, e.g. after compiling it
+    """
+    global _bundle, _bundle_checked
+    _bundle, _bundle_checked = None, False
+
+
+def read_json(category, name, root=None):
+    """
+    :param category: "oeo", "moves" or "battle"
+    :param name: name of the JSON file without its suffix
+    :param root: directory holding the category, the package's data \
+                 directory if None, only which is bundled
+    :return: the data of name from the bundle, or from its JSON file
+    """
+    root = Path(root) if root is not None else data_root / category
+    if root.resolve() == data_root / category:
+        bundle = _get_bundle()
+        if bundle is not None and name in bundle[category]:
+            return bundle[category][name]
+    path = root / f"{name}.json"
+    if not path.exists():
+        raise Exception(f"{path} does not exist")
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_names(category, root=None):
+    """
+    :return: sorted names of the JSON files in category
+    """
+    root = Path(root) if root is not None else data_root / category
+    if root.resolve() == data_root / category:
+        bundle = _get_bundle()
+        if bundle is not None:
+            return sorted(bundle[category])
+    return [path.stem for path in sorted(root.glob("*.json"))]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    compile_bundle()
@@ -1,7 +1,7 @@
 import logging
-import json
 from pathlib import Path
 from enum import Enum, unique
+from . import gamedata
 from .element import Element
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,7 @@ class MoveCategory(Enum):
 
 
 class Move(object):
-    data_root = Path("./data/moves")
+    __slots__ = ("_name", "_element", "_category", "_power", "_accuracy", "_makes_contact", "_priority", "_stages")
 
     def __init__(self, name, element, category, power, accuracy, makes_contact, priority, stages):
         self._name = name
@@ -36,7 +36,7 @@ class Move(object):
         self._accuracy = accuracy
         self._makes_contact = makes_contact
         self._priority = priority
-        self._stages = stages
+        self._stages = tuple(stages)
 
     @property
     def name(self):
@@ -77,6 +77,7 @@ class Move(object):
 
     @classmethod
     def from_json_dict(cls, move_data):
+        move_name = move_data.get("name", "<unnamed>")
         try:
             move_name = move_data["name"]
             element = move_data["element"]
@@ -94,14 +95,124 @@ class Move(object):
 
     @staticmethod
     def load_moves(list_moves):
-        moves = {}
-        for move_name in list_moves:
-            m = Move.data_root / f"{move_name}.json"
-            if m.exists():
-                with m.open() as f:
-                    move = json.load(f, object_hook=Move.from_json_dict)
-                    if move:
-                        moves[move_name] = move
-            else:
-                raise Exception(f"{m} does not exist")
-        return moves
+        """
+        :return: dict of move name:Move for the moves in list_moves, \
+                 shared through move_catalog
+        """
+        return move_catalog.get_many(list_moves)
+
+
+class MoveCatalog(object):
+    """
+    Loads and validates move data once per process and shares the Move
+    objects between battles
+
+    Moves are immutable, so a catalog preloaded before worker processes are
+    forked is shared with them copy-on-write.
+    """
+    data_root = gamedata.data_root / "moves"
+    # Move files that document the move format rather than define a move
+    templates = frozenset({"Example"})
+    required_keys = ("name", "element", "category", "power", "accuracy", "makes_contact")
+    min_priority, max_priority = -7, 8
+
+    def __init__(self, data_root=None):
+        if data_root is not None:
+            self.data_root = Path(data_root)
+        self._moves = {}
+
+    def __contains__(self, move_name):
+        return move_name in self._moves
+
+    def __len__(self):
+        return len(self._moves)
+
+    def __getitem__(self, move_name):
+        return self.get(move_name)
+
+    def get(self, move_name):
+        """
+        :param move_name: name of the move
+        :return: the Move for move_name, loading it if necessary
+        """
+        try:
+            return self._moves[move_name]
+        except KeyError:
+            move = self._load(move_name)
+            self._moves[move_name] = move
+            return move
+
+    def get_many(self, move_names):
+        """
+        :return: dict of move name:Move for move_names
+        """
+        return {move_name: self.get(move_name) for move_name in move_names}
+
+    def preload(self):
+        """
+        Load every move in data_root into the catalog, from the game data
+        bundle when it is current (see core.gamedata)
+
+        :return: number of moves loaded
+        """
+        moves = [self._load(move_name) for move_name in gamedata.list_names("moves", self.data_root)
+                 if move_name not in self.templates]
+        count = 0
+        for move in moves:
+            if move.name not in self._moves:
+                self._moves[move.name] = move
+                count += 1
+        logger.debug(f"Preloaded {count} moves from {self.data_root}")
+        return count
+
+    def invalidate(self, move_name=None):
+        """
+        Drop cached moves so that they are re-read on next use
+        """
+        if move_name is None:
+            self._moves.clear()
+        else:
+            self._moves.pop(move_name, None)
+
+    def _load(self, move_name):
+        move_data = gamedata.read_json("moves", move_name, self.data_root)
+        return self.validate(move_name, move_data, self.data_root / f"{move_name}.json")
+
+    @classmethod
+    def validate(cls, move_name, move_data, path=None):
+        """
+        :param path: file move_data was read from, to report in errors
+        :return: the Move for move_data if it is a valid move called move_name
+        """
+        source = f"'{move_name}'" if path is None else f"'{move_name}' ({path})"
+        if not isinstance(move_data, dict):
+            logger.error(f"Move data for {source} is not a JSON object")
+            raise Exception(f"Move data for {source} is not a JSON object")
+        missing = [key for key in cls.required_keys if key not in move_data]
+        if missing:
+            logger.error(f"Move data for {source} is missing a value for {', '.join(missing)}")
+            raise Exception(f"Move data for {source} is missing a value for {', '.join(missing)}")
+        try:
+            move = Move.from_json_dict(move_data)
+        except Exception as e:
+            raise Exception(f"Move data for {source} is invalid: {e}") from e
+        problems = []
+        if move.name != move_name:
+            problems.append(f"name is '{move.name}'")
+        if not isinstance(move.power, int) or move.power < 0:
+            problems.append(f"power {move.power!r} is not an int >= 0")
+        if move.accuracy is not None and (not isinstance(move.accuracy, (int, float))
+                                          or not 0 <= move.accuracy <= 100):
+            problems.append(f"accuracy {move.accuracy!r} is not between 0 and 100")
+        if not isinstance(move.makes_contact, bool):
+            problems.append(f"makes_contact {move.makes_contact!r} is not a bool")
+        if not isinstance(move.priority, int) or not cls.min_priority <= move.priority <= cls.max_priority:
+            problems.append(f"priority {move.priority!r} is not an int from {cls.min_priority} to "
+                            f"{cls.max_priority}")
+        if problems:
+            logger.error(f"Move data for {source} is invalid: {', '.join(problems)}")
+            raise Exception(f"Move data for {source} is invalid: {', '.join(problems)}")
+        return move
+
+
+move_catalog = MoveCatalog()
@@ -1,11 +1,9 @@
 import json
 import logging
-import math
 import uuid
-from pathlib import Path
-from .element import Element
 from .item import Item
-from .stats import Stats
+from .stats import Stats, ComputedStats, calculate_hp_stat, calculate_stat
+from .species import species_registry
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +12,8 @@ class Oeo(object):
     """
     Defines an oeo
     """
-    data_root = Path("./data/oeo")
+    __slots__ = ("_oeo_id", "_name", "_species", "_level", "_xp", "_base", "_base_generation", "_ivs", "_evs",
+                 "_stat_cache", "_stat_cache_token", "_current_hp", "_moves", "_status_conditions", "_held_item")
 
     def __init__(self, oeo_id, name, species, level, xp, current_hp,
                  ivs, evs, moves, status_conditions, held_item):
@@ -38,11 +37,15 @@ class Oeo(object):
         self._level = level
         self._xp = xp
 
-        self._elements, self._base_stats = Oeo._load_oeo_base(self._species)
+        self._base = species_registry.get(self._species)
+        self._base_generation = species_registry.generation
 
         self._ivs = ivs
         self._evs = evs
 
+        self._stat_cache = None
+        self._stat_cache_token = None
+
         if current_hp is None:
             self._current_hp = self.full_hp
         else:
@@ -75,12 +78,30 @@ class Oeo(object):
 
     @property
     def elements(self):
-        return self._elements
+        return self._species_base.elements
+
+    @property
+    def _species_base(self):
+        # Refetch the shared base record if the registry has been invalidated
+        if self._base_generation != species_registry.generation:
+            self._base = species_registry.get(self._species)
+            self._base_generation = species_registry.generation
+        return self._base
+
+    @property
+    def _base_stats(self):
+        return self._species_base.base_stats
 
     @property
     def level(self):
         return self._level
 
+    @level.setter
+    def level(self, value):
+        assert isinstance(value, int), "level is not an int"
+        self._level = value
+        self._stat_cache = None
+
     @property
     def xp(self):
         return self._xp
@@ -107,27 +128,27 @@ class Oeo(object):
 
     @property
     def full_hp(self):
-        return self._calculate_hp_stat()
+        return self._computed_stats().hp
 
     @property
     def attack(self):
-        return self._calculate_stat("attack")
+        return self._computed_stats().attack
 
     @property
     def defence(self):
-        return self._calculate_stat("defence")
+        return self._computed_stats().defence
 
     @property
     def sp_attack(self):
-        return self._calculate_stat("sp_attack")
+        return self._computed_stats().sp_attack
 
     @property
     def sp_defence(self):
-        return self._calculate_stat("sp_defence")
+        return self._computed_stats().sp_defence
 
     @property
     def speed(self):
-        return self._calculate_stat("speed")
+        return self._computed_stats().speed
 
     @property
     def moves(self):
@@ -162,6 +183,7 @@ class Oeo(object):
     @ivs.setter
     def ivs(self, value):
         self._ivs = value
+        self._stat_cache = None
 
     @property
     def evs(self):
@@ -170,10 +192,11 @@ class Oeo(object):
     @evs.setter
     def evs(self, value):
         self._evs = value
+        self._stat_cache = None
 
     def __repr__(self):
         return "Oeo(ID:%r, Name:%r, Species:%r, Element(s):%r, Lvl:%r, XP:%r, HP:%r/%r, BaseStats:%r, IVs:%r, EVs:%r, " \
-               "Moves:%r, Conditions:%r, HeldItem:%r)" % (self._oeo_id, self._name, self._species, self._elements,
+               "Moves:%r, Conditions:%r, HeldItem:%r)" % (self._oeo_id, self._name, self._species, self.elements,
                                                           self._level, self._xp, self._current_hp, self.full_hp,
                                                           self._base_stats, self._ivs, self._evs,
                                                           self._moves, self._status_conditions, self._held_item)
@@ -183,35 +206,52 @@ class Oeo(object):
                 f"HP:{self._current_hp}/{self.full_hp}, Attack:{self.attack}, Defence:{self.defence}, Sp.Attack:{self.sp_attack}, " \
                 f"Sp.Defence:{self.sp_defence}, Speed:{self.speed}>"
 
+    def _computed_stats(self):
+        """
+        :return: ComputedStats for this oeo, recalculated only when the level, \
+                 ivs, evs or species base have changed since the last call
+        """
+        cache = self._stat_cache
+        if cache is not None and self._stat_cache_token == (self._ivs._version, self._evs._version,
+                                                            species_registry._generation):
+            return cache
+        self._stat_cache = ComputedStats(self._calculate_hp_stat(), self._calculate_stat("attack"),
+                                         self._calculate_stat("defence"), self._calculate_stat("sp_attack"),
+                                         self._calculate_stat("sp_defence"), self._calculate_stat("speed"))
+        self._stat_cache_token = (self._ivs._version, self._evs._version, species_registry._generation)
+        return self._stat_cache
+
     def _calculate_hp_stat(self):
         """
         Calculate full hp stat as ((IV[hp] + 2(BASE[hp]) + EV[hp]/4 + 100) x LEVEL)/100 + 10
         :return: full hp of this oeo
         """
-        full_hp = math.floor(((self._ivs.hp + 2*self._base_stats.hp + self._evs.hp/4 + 100) * self._level)/100 + 10)
-        return full_hp
+        return calculate_hp_stat(self._base_stats.hp, self._ivs.hp, self._evs.hp, self._level)
 
     def _calculate_stat(self, stat):
         """
         Calculate stat as (((IV[stat] + 2(BASE[stat]) + EV[stat]/4) x LEVEL)/100 + 5) x NATURE
         :return:
         """
-        base_stat = getattr(self._base_stats, stat)
-        iv = getattr(self._ivs, stat)
-        ev = getattr(self._evs, stat)
-        lvl = self._level
-        stat = math.floor(((iv + 2*base_stat + ev/4) * lvl)/100 + 5)
-        return stat
+        return calculate_stat(getattr(self._base_stats, stat), getattr(self._ivs, stat), getattr(self._evs, stat),
+                              self._level)
 
     def heal(self):
         self.current_hp = self.full_hp
 
     @classmethod
-    def create(cls, species, name, level, xp):
-        oeo_id = uuid.uuid4().hex[8:-8]
+    def create(cls, species, name, level, xp, rng=None):
+        """
+        :param rng: RandomStream or random.Random to draw the oeo_id and ivs from, a uuid4 and the random module if \
+                    None
+        """
+        if rng is None:
+            oeo_id = uuid.uuid4().hex[8:-8]
+        else:
+            oeo_id = f"{rng.getrandbits(64):016x}"
         name = name if name else ""
         current_hp = None
-        ivs = Stats.rand_ivs()
+        ivs = Stats.rand_ivs(rng)
         evs = Stats()
         moves = ["Maul"]
         status_conditions = None
@@ -220,10 +260,7 @@ class Oeo(object):
         return cls(oeo_id, name, species, level, xp, current_hp, ivs, evs, moves, status_conditions, held_item)
 
     @classmethod
-    def load(cls, path):
-        with path.open(mode="r", encoding="utf-8") as f:
-            j = json.load(f)
-
+    def from_json_dict(cls, j):
         oeo_id = j["oeo_id"]
         name = j["name"]
         species = j["species"]
@@ -239,32 +276,60 @@ class Oeo(object):
 
         return cls(oeo_id, name, species, level, xp, current_hp, ivs, evs, moves, status_conditions, held_item)
 
-    def save(self, dir_path):
-        path = dir_path / f"{self._oeo_id}.json"
+    def to_json_dict(self):
         o = {"oeo_id": self._oeo_id, "name": self._name, "species": self._species, "level": self._level, "xp": self._xp,
              "current_hp": self._current_hp, "ivs": self._ivs.to_dict(), "evs": self._evs.to_dict(),
              "moves": self._moves, "held_item": self._held_item}
         # todo: Remember to implement status conditions eventually xd
         # o["status_conditions"] = ...
+        return o
+
+    def state(self):
+        """
+        :return: tuple of the oeo's state, of builtin types only, for compact snapshots
+        """
+        # Items have no serialisable state yet, so one could not be restored as it was
+        assert self._held_item is None, f"{self._oeo_id} holds an item, which a snapshot can not restore"
+        return (self._oeo_id, self._name, self._species, self._level, self._xp, self._current_hp, tuple(self._ivs),
+                tuple(self._evs), tuple(self._moves), tuple(self._status_conditions), None)
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild an oeo from a tuple returned by state, skipping the argument checks of __init__
+        """
+        oeo_id, name, species, level, xp, current_hp, ivs, evs, moves, status_conditions, held_item = state
+        oeo = cls.__new__(cls)
+        oeo._oeo_id = oeo_id
+        oeo._name = name
+        oeo._species = species
+        oeo._level = level
+        oeo._xp = xp
+        oeo._base = species_registry.get(species)
+        oeo._base_generation = species_registry.generation
+        oeo._ivs = Stats.from_values(ivs)
+        oeo._evs = Stats.from_values(evs)
+        oeo._stat_cache = None
+        oeo._stat_cache_token = None
+        oeo._current_hp = current_hp
+        oeo._moves = list(moves)
+        oeo._status_conditions = list(status_conditions)
+        oeo._held_item = held_item
+        return oeo
+
+    @classmethod
+    def load(cls, path):
+        with path.open(mode="r", encoding="utf-8") as f:
+            j = json.load(f)
+        return cls.from_json_dict(j)
+
+    def save(self, dir_path):
+        path = dir_path / f"{self._oeo_id}.json"
+        o = self.to_json_dict()
         with path.open(mode="w", encoding="utf-8") as f:
             json.dump(o, f, sort_keys=True, indent=2, ensure_ascii=False)
 
     @staticmethod
     def _load_oeo_base(species):
-        o = Oeo.data_root / f"{species}.json"
-        if o.exists():
-            with o.open(encoding="utf-8") as f:
-                oeo_data = json.load(f)
-        else:
-            raise Exception(f"{o} does not exist")
-        try:
-            elements = []
-            elem = oeo_data["elements"]
-            for element in elem:
-                elements.append(Element[element])
-            base_stats = Stats.from_dict(oeo_data["base_stats"])
-        except KeyError as e:
-            logger.error(f"Oeo data for '{species}' is missing a value for {e}")
-            raise Exception(f"Oeo data for '{species}' is missing a value for {e}") from e
-        else:
-            return elements, base_stats
+        base = species_registry.get(species)
+        return base.elements, base.base_stats
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class RandomStream(object):
+    """
+    An independent, reproducible stream of random draws
+
+    Each stream has its own counter-based Philox generator, seeded from a NumPy SeedSequence. Streams made with
+    the same seed and spawn key always give the same draws, and streams with different spawn keys, e.g. one per
+    battle, are statistically independent, whichever process they are made in.
+
+    Uniform doubles are generated a block at a time, so most draws are an index into the block rather than a call
+    into the generator. Blocks start small, so that short-lived streams do not generate draws they never use, and
+    double up to block_size. A block is a list of Python floats, about 32 bytes a draw, so block_size is kept small
+    enough for a stream per hosted battle. The draws do not depend on the block sizes.
+    """
+    __slots__ = ("_seed_sequence", "_generator", "_block_size", "_block", "_index")
+    first_block_size = 64
+
+    def __init__(self, seed=None, spawn_key=(), block_size=256):
+        """
+        :param seed: int or SeedSequence, fresh entropy if None
+        :param spawn_key: tuple of ints identifying the stream among those with the same seed
+        :param block_size: number of doubles generated at a time
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self._seed_sequence = seed
+        else:
+            self._seed_sequence = np.random.SeedSequence(seed, spawn_key=tuple(spawn_key))
+        self._generator = np.random.Generator(np.random.Philox(self._seed_sequence))
+        self._block_size = block_size
+        self._block = []
+        self._index = 0
+
+    @property
+    def seed_sequence(self):
+        return self._seed_sequence
+
+    def spawn(self, n):
+        """
+        :return: list of n new streams independent of this one and of each other
+        """
+        return [RandomStream(seed_sequence, block_size=self._block_size)
+                for seed_sequence in self._seed_sequence.spawn(n)]
+
+    def _refill(self):
+        size = min(self._block_size, max(self.first_block_size, 2 * len(self._block)))
+        self._block = self._generator.random(size).tolist()
+        self._index = 0
+
+    def random(self):
+        """
+        :return: float in [0, 1)
+        """
+        if self._index == len(self._block):
+            self._refill()
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+    def randint(self, a, b):
+        """
+        :return: int in [a, b], including both end points as random.randint
+        """
+        index = self._index
+        if index == len(self._block):
+            self._refill()
+            index = 0
+        self._index = index + 1
+        return a + int(self._block[index] * (b - a + 1))
+
+    def randoms(self, n):
+        """
+        :return: numpy array of n floats in [0, 1), the same as n calls of random
+        """
+        values = np.empty(n)
+        filled = 0
+        while filled < n:
+            if self._index == len(self._block):
+                self._refill()
+            take = min(n - filled, len(self._block) - self._index)
+            values[filled:filled + take] = self._block[self._index:self._index + take]
+            self._index += take
+            filled += take
+        return values
+
+    def randints(self, a, b, n):
+        """
+        :return: numpy array of n ints in [a, b], the same as n calls of randint
+        """
+        return a + (self.randoms(n) * (b - a + 1)).astype(np.int64)
+
+    def getrandbits(self, k):
+        """
+        :return: int with k random bits, drawn 32 bits at a time
+        """
+        value = 0
+        for _ in range(-(-k // 32)):
+            value = value << 32 | int(self.random() * 2 ** 32)
+        return value >> (-k % 32)
+
+    def __repr__(self):
+        return f"RandomStream(entropy={self._seed_sequence.entropy}, spawn_key={self._seed_sequence.spawn_key})"
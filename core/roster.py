@@ -0,0 +1,240 @@
+from array import array
+from .oeo import Oeo
+from .stats import Stats, calculate_hp_stat, calculate_stat
+from .species import species_registry
+
+_stat_fields = Stats._fields
+
+
+class Roster(object):
+    """
+    Stores many oeo compactly as a struct of arrays
+
+    Levels, xp, hp, ivs and evs are held in contiguous typed arrays, one per
+    field (and one per stat for ivs and evs), while strings and move lists are
+    interned so that oeo of the same species or moveset share them. Indexing
+    the roster gives out RosterOeo views which behave like Oeo.
+    """
+    __slots__ = ("_ids", "_index", "_names", "_species", "_species_names",
+                 "_species_index", "_movesets", "_moveset_index",
+                 "_moveset_ids", "_level", "_xp", "_current_hp", "_ivs",
+                 "_evs", "_status_conditions", "_held_items")
+
+    def __init__(self, oeos=()):
+        self._ids = []
+        self._index = {}
+        self._names = []
+        self._species = array("H")
+        self._species_names = []
+        self._species_index = {}
+        self._movesets = array("H")
+        self._moveset_ids = []
+        self._moveset_index = {}
+        self._level = array("B")
+        self._xp = array("L")
+        self._current_hp = array("H")
+        self._ivs = tuple(array("B") for _ in _stat_fields)
+        self._evs = tuple(array("H") for _ in _stat_fields)
+        # Rarely set, so kept sparse: index -> value
+        self._status_conditions = {}
+        self._held_items = {}
+        for oeo in oeos:
+            self.append(oeo)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, oeo_id):
+        return oeo_id in self._index
+
+    def __iter__(self):
+        return (RosterOeo(self, i) for i in range(len(self._ids)))
+
+    def __getitem__(self, oeo_id):
+        """
+        :param oeo_id: oeo_id of an oeo in the roster
+        :return: RosterOeo view of the oeo
+        """
+        try:
+            return RosterOeo(self, self._index[oeo_id])
+        except KeyError:
+            raise KeyError(f"{oeo_id} is not in the roster") from None
+
+    @property
+    def oeo_ids(self):
+        return list(self._ids)
+
+    def append(self, oeo):
+        """
+        Add a copy of oeo's data to the roster
+
+        :return: RosterOeo view of the added oeo
+        """
+        if oeo.oeo_id in self._index:
+            raise Exception(f"{oeo.oeo_id} is already in the roster")
+        i = len(self._ids)
+        moveset = tuple(oeo.moves)
+        # Convert every value to its typed array's type before changing the
+        # roster, so that a value out of range leaves the roster as it was
+        columns = [self._species, self._movesets, self._level, self._xp,
+                   self._current_hp, *self._ivs, *self._evs]
+        values = [self._species_index.get(oeo.species,
+                                          len(self._species_names)),
+                  self._moveset_index.get(moveset, len(self._moveset_ids)),
+                  oeo.level, oeo.xp, oeo.current_hp,
+                  *(getattr(oeo.ivs, stat) for stat in _stat_fields),
+                  *(getattr(oeo.evs, stat) for stat in _stat_fields)]
+        try:
+            values = [array(column.typecode, [value])
+                      for column, value in zip(columns, values)]
+        except (OverflowError, TypeError) as e:
+            raise Exception(f"{oeo.oeo_id} can not be stored in the roster: "
+                            f"{e}") from e
+        self._ids.append(oeo.oeo_id)
+        self._index[oeo.oeo_id] = i
+        # Keep a single reference to the empty string for unnamed oeo
+        self._names.append(oeo.name if oeo.name else "")
+        self._intern(oeo.species, self._species_names, self._species_index)
+        self._intern(moveset, self._moveset_ids, self._moveset_index)
+        for column, value in zip(columns, values):
+            column.extend(value)
+        if oeo.status_conditions:
+            self._status_conditions[i] = list(oeo.status_conditions)
+        if oeo.held_item is not None:
+            self._held_items[i] = oeo.held_item
+        return RosterOeo(self, i)
+
+    def extend(self, oeos):
+        for oeo in oeos:
+            self.append(oeo)
+
+    @staticmethod
+    def _intern(value, values, index):
+        try:
+            return index[value]
+        except KeyError:
+            index[value] = len(values)
+            values.append(value)
+            return index[value]
+
+
+class RosterOeo(object):
+    """
+    A view of one oeo stored in a Roster, exposing the same properties as Oeo
+    """
+    __slots__ = ("_roster", "_i")
+
+    def __init__(self, roster, i):
+        self._roster = roster
+        self._i = i
+
+    @property
+    def oeo_id(self):
+        return self._roster._ids[self._i]
+
+    @property
+    def name(self):
+        return self._roster._names[self._i]
+
+    @name.setter
+    def name(self, value):
+        self._roster._names[self._i] = value
+
+    @property
+    def species(self):
+        return self._roster._species_names[self._roster._species[self._i]]
+
+    @property
+    def elements(self):
+        return species_registry.get(self.species).elements
+
+    @property
+    def level(self):
+        return self._roster._level[self._i]
+
+    @property
+    def xp(self):
+        return self._roster._xp[self._i]
+
+    @property
+    def conscious(self):
+        return self._roster._current_hp[self._i] > 0
+
+    @property
+    def current_hp(self):
+        return self._roster._current_hp[self._i]
+
+    @current_hp.setter
+    def current_hp(self, value):
+        self._roster._current_hp[self._i] = max(0, min(value, self.full_hp))
+
+    @property
+    def full_hp(self):
+        base = species_registry.get(self.species).base_stats
+        r, i = self._roster, self._i
+        return calculate_hp_stat(base.hp, r._ivs[0][i], r._evs[0][i],
+                                 r._level[i])
+
+    def _stat(self, index):
+        base = species_registry.get(self.species).base_stats
+        r, i = self._roster, self._i
+        return calculate_stat(base[index], r._ivs[index][i],
+                              r._evs[index][i], r._level[i])
+
+    @property
+    def attack(self):
+        return self._stat(1)
+
+    @property
+    def defence(self):
+        return self._stat(2)
+
+    @property
+    def sp_attack(self):
+        return self._stat(3)
+
+    @property
+    def sp_defence(self):
+        return self._stat(4)
+
+    @property
+    def speed(self):
+        return self._stat(5)
+
+    @property
+    def ivs(self):
+        return Stats(*(a[self._i] for a in self._roster._ivs))
+
+    @property
+    def evs(self):
+        return Stats(*(a[self._i] for a in self._roster._evs))
+
+    @property
+    def moves(self):
+        return list(self._roster._moveset_ids[self._roster._movesets[self._i]])
+
+    @property
+    def status_conditions(self):
+        return self._roster._status_conditions.get(self._i, [])
+
+    @property
+    def held_item(self):
+        return self._roster._held_items.get(self._i)
+
+    def to_oeo(self):
+        """
+        :return: a standalone Oeo with a copy of this oeo's data
+        """
+        return Oeo(self.oeo_id, self.name, self.species, self.level, self.xp,
+                   self.current_hp, self.ivs, self.evs, self.moves,
+                   list(self.status_conditions), self.held_item)
+
+    def __repr__(self):
+        return "RosterOeo(%r)" % self.oeo_id
+
+    def __str__(self):
+        return f"{self.name if self.name else self.oeo_id} the " \
+               f"{self.species} <Lvl:{self.level}, XP:{self.xp}, " \
+               f"HP:{self.current_hp}/{self.full_hp}, Attack:{self.attack}, " \
+               f"Defence:{self.defence}, Sp.Attack:{self.sp_attack}, " \
+               f"Sp.Defence:{self.sp_defence}, Speed:{self.speed}>"
@@ -0,0 +1,109 @@
+import logging
+from collections import namedtuple
+from pathlib import Path
+from . import gamedata
+from .element import Element
+
+logger = logging.getLogger(__name__)
+
+
+BaseStats = namedtuple("BaseStats",
+                       "hp attack defence sp_attack sp_defence speed")
+
+
+class SpeciesBase(namedtuple("SpeciesBase", "species elements base_stats")):
+    """
+    Immutable base record for a species, shared by every oeo of that species
+    """
+    __slots__ = ()
+
+
+class SpeciesRegistry(object):
+    """
+    Loads species base data once per process and shares it between oeo
+    """
+    data_root = gamedata.data_root / "oeo"
+
+    def __init__(self, data_root=None):
+        if data_root is not None:
+            self.data_root = Path(data_root)
+        self._species = {}
+        # Incremented whenever cached records are invalidated so that holders
+        # of a SpeciesBase can tell that they should fetch it again
+        self._generation = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def __contains__(self, species):
+        return species in self._species
+
+    def __len__(self):
+        return len(self._species)
+
+    def __getitem__(self, species):
+        return self.get(species)
+
+    def get(self, species):
+        """
+        :param species: name of the species
+        :return: the SpeciesBase for species, loading it if necessary
+        """
+        try:
+            return self._species[species]
+        except KeyError:
+            base = self._load(species)
+            self._species[species] = base
+            return base
+
+    def preload(self):
+        """
+        Load every species in data_root into the registry
+
+        :return: number of species loaded
+        """
+        count = 0
+        for species in gamedata.list_names("oeo", self.data_root):
+            if species not in self._species:
+                self._species[species] = self._load(species)
+                count += 1
+        logger.debug(f"Preloaded {count} species from {self.data_root}")
+        return count
+
+    def invalidate(self, species=None):
+        """
+        Drop cached species data so that it is re-read on next use
+
+        :param species: name of the species to invalidate, all species \
+                        are invalidated if None
+        """
+        if species is None:
+            self._species.clear()
+        else:
+            self._species.pop(species, None)
+        self._generation += 1
+
+    def _load(self, species):
+        oeo_data = gamedata.read_json("oeo", species, self.data_root)
+        return self.from_json_dict(species, oeo_data)
+
+    @staticmethod
+    def from_json_dict(species, oeo_data):
+        try:
+            elements = tuple(Element[element]
+                             for element in oeo_data["elements"])
+            bs = oeo_data["base_stats"]
+            base_stats = BaseStats(bs["hp"], bs["attack"], bs["defence"],
+                                   bs["sp_attack"], bs["sp_defence"],
+                                   bs["speed"])
+        except KeyError as e:
+            logger.error(f"Oeo data for '{species}' is missing a value "
+                         f"for {e}")
+            raise Exception(f"Oeo data for '{species}' is missing a value "
+                            f"for {e}") from e
+        else:
+            return SpeciesBase(species, elements, base_stats)
+
+
+species_registry = SpeciesRegistry()
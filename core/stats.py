@@ -1,8 +1,40 @@
-from random import randint
+import math
+from collections import namedtuple
+import random
 from namedlist import namedlist
 
 
+ComputedStats = namedtuple("ComputedStats", "hp attack defence sp_attack sp_defence speed")
+
+
+def calculate_hp_stat(base_hp, iv_hp, ev_hp, level):
+    """
+    Calculate full hp stat as ((IV[hp] + 2(BASE[hp]) + EV[hp]/4 + 100) x LEVEL)/100 + 10
+    """
+    return math.floor(((iv_hp + 2*base_hp + ev_hp/4 + 100) * level)/100 + 10)
+
+
+def calculate_stat(base_stat, iv, ev, level):
+    """
+    Calculate stat as (((IV[stat] + 2(BASE[stat]) + EV[stat]/4) x LEVEL)/100 + 5) x NATURE
+    """
+    return math.floor(((iv + 2*base_stat + ev/4) * level)/100 + 5)
+
+
 class Stats(namedlist("Stat", "hp attack defence sp_attack sp_defence speed", default=0)):
+    __slots__ = ("_version",)
+
+    def __setattr__(self, name, value):
+        # Count in-place modifications so that values derived from these stats
+        # can tell when they are stale
+        super().__setattr__(name, value)
+        if name != "_version":
+            super().__setattr__("_version", getattr(self, "_version", 0) + 1)
+
+    @property
+    def version(self):
+        return self._version
+
     def to_dict(self):
         d = {"hp": self.hp, "attack": self.attack, "defence": self.defence,
              "sp_attack": self.sp_attack, "sp_defence": self.sp_defence, "speed": self.speed}
@@ -19,7 +51,22 @@ class Stats(namedlist("Stat", "hp attack defence sp_attack sp_defence speed", de
         return cls(hp, attack, defence, sp_attack, sp_defence, speed)
 
     @classmethod
-    def rand_ivs(cls):
+    def from_values(cls, values):
+        """
+        Build Stats from a sequence of the six values in field order, without the per-field setattr of __init__
+        """
+        stats = cls.__new__(cls)
+        for field, value in zip(cls._fields, values):
+            object.__setattr__(stats, field, value)
+        object.__setattr__(stats, "_version", 0)
+        return stats
+
+    @classmethod
+    def rand_ivs(cls, rng=None):
+        """
+        :param rng: RandomStream or random.Random to draw from, the random module if None
+        """
+        randint = (rng if rng is not None else random).randint
         hp = randint(0, 31)
         attack, defence = randint(0, 31), randint(0, 31)
         sp_attack, sp_defence = randint(0, 31), randint(0, 31)
@@ -0,0 +1,215 @@
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from .oeo import Oeo
+from .roster import Roster
+from .stats import Stats
+
+logger = logging.getLogger(__name__)
+
+_stat_fields = Stats._fields
+_columns = ("oeo_id", "name", "species", "level", "xp", "current_hp") + \
+    tuple(f"iv_{stat}" for stat in _stat_fields) + \
+    tuple(f"ev_{stat}" for stat in _stat_fields) + ("moves", "held_item")
+
+_schema = """
+CREATE TABLE IF NOT EXISTS oeo (
+    oeo_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    species TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    current_hp INTEGER NOT NULL,
+    %s,
+    %s,
+    moves TEXT NOT NULL,
+    held_item TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS oeo_species_level ON oeo (species, level);
+CREATE INDEX IF NOT EXISTS oeo_level ON oeo (level);
+""" % (",\n    ".join(f"iv_{stat} INTEGER NOT NULL" for stat in _stat_fields),
+       ",\n    ".join(f"ev_{stat} INTEGER NOT NULL" for stat in _stat_fields))
+
+_insert = "INSERT OR REPLACE INTO oeo (%s) VALUES (%s)" % (
+    ", ".join(_columns), ", ".join("?" for _ in _columns))
+_select = "SELECT %s FROM oeo" % ", ".join(_columns)
+
+
+class OeoStore(object):
+    """
+    Persists many oeo in a single SQLite database file
+
+    Writes are batched into one transaction, oeo are only read when they are
+    asked for, and oeo can be found by species and level through an index.
+    The per-oeo JSON files written by Oeo.save can be imported and exported.
+    """
+    def __init__(self, path):
+        """
+        :param path: path of the database file, created if it does not exist
+        """
+        self._path = Path(path) if path != ":memory:" else path
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_schema)
+
+    @property
+    def path(self):
+        return self._path
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM oeo").fetchone()[0]
+
+    def __contains__(self, oeo_id):
+        return self._db.execute("SELECT 1 FROM oeo WHERE oeo_id = ?",
+                                (oeo_id,)).fetchone() is not None
+
+    def __getitem__(self, oeo_id):
+        oeo = self.get(oeo_id)
+        if oeo is None:
+            raise KeyError(f"{oeo_id} is not in the store")
+        return oeo
+
+    @property
+    def oeo_ids(self):
+        return [row[0] for row in
+                self._db.execute("SELECT oeo_id FROM oeo ORDER BY oeo_id")]
+
+    def save(self, oeo):
+        self.save_many([oeo])
+
+    def save_many(self, oeos):
+        """
+        Insert or replace oeo in a single transaction
+
+        :param oeos: iterable of Oeo or RosterOeo
+        :return: number of oeo saved
+        """
+        with self._db:
+            cursor = self._db.executemany(_insert,
+                                          (self._to_row(o) for o in oeos))
+        logger.debug(f"Saved {cursor.rowcount} oeo to {self._path}")
+        return cursor.rowcount
+
+    def delete(self, oeo_id):
+        with self._db:
+            self._db.execute("DELETE FROM oeo WHERE oeo_id = ?", (oeo_id,))
+
+    def get(self, oeo_id):
+        """
+        :return: the Oeo with oeo_id, or None if it is not in the store
+        """
+        row = self._db.execute(f"{_select} WHERE oeo_id = ?",
+                               (oeo_id,)).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def load_many(self, oeo_ids):
+        """
+        :return: dict of oeo_id:Oeo for the oeo_ids that are in the store
+        """
+        oeos = {}
+        oeo_ids = list(oeo_ids)
+        # Stay under SQLite's limit on the number of query parameters
+        for start in range(0, len(oeo_ids), 500):
+            chunk = oeo_ids[start:start + 500]
+            query = f"{_select} WHERE oeo_id IN " \
+                    f"({', '.join('?' for _ in chunk)})"
+            for row in self._db.execute(query, chunk):
+                oeos[row[0]] = self._from_row(row)
+        return oeos
+
+    def find(self, species=None, min_level=None, max_level=None):
+        """
+        :return: list of the oeo_id of the matching oeo, ordered by species, \
+                 level and oeo_id
+        """
+        conditions, parameters = [], []
+        if species is not None:
+            conditions.append("species = ?")
+            parameters.append(species)
+        if min_level is not None:
+            conditions.append("level >= ?")
+            parameters.append(min_level)
+        if max_level is not None:
+            conditions.append("level <= ?")
+            parameters.append(max_level)
+        query = "SELECT oeo_id FROM oeo"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY species, level, oeo_id"
+        return [row[0] for row in self._db.execute(query, parameters)]
+
+    def iter_oeo(self):
+        """
+        :return: generator of every Oeo in the store, read in batches
+        """
+        cursor = self._db.execute(f"{_select} ORDER BY oeo_id")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for row in rows:
+                yield self._from_row(row)
+
+    def to_roster(self, oeo_ids=None):
+        """
+        :param oeo_ids: oeo to load, every oeo in the store if None
+        :return: Roster of the oeo
+        """
+        if oeo_ids is None:
+            return Roster(self.iter_oeo())
+        oeos = self.load_many(oeo_ids)
+        return Roster(oeos[oeo_id] for oeo_id in oeo_ids if oeo_id in oeos)
+
+    def import_json(self, dir_path):
+        """
+        Import every {oeo_id}.json file written by Oeo.save in dir_path
+
+        :return: number of oeo imported
+        """
+        return self.save_many(Oeo.load(path) for path
+                              in sorted(Path(dir_path).glob("*.json")))
+
+    def export_json(self, dir_path, oeo_ids=None):
+        """
+        Write a {oeo_id}.json file in the format of Oeo.save for each oeo
+
+        :param oeo_ids: oeo to export, every oeo in the store if None
+        :return: number of oeo exported
+        """
+        dir_path = Path(dir_path)
+        if oeo_ids is None:
+            oeos = self.iter_oeo()
+        else:
+            oeos = self.load_many(oeo_ids).values()
+        count = 0
+        for oeo in oeos:
+            oeo.save(dir_path)
+            count += 1
+        return count
+
+    @staticmethod
+    def _to_row(oeo):
+        held_item = oeo.held_item
+        return (oeo.oeo_id, oeo.name, oeo.species, oeo.level, oeo.xp,
+                oeo.current_hp, *oeo.ivs, *oeo.evs,
+                json.dumps(oeo.moves, separators=(",", ":")),
+                json.dumps(held_item) if held_item is not None else None)
+
+    @staticmethod
+    def _from_row(row):
+        ivs = Stats(*row[6:12])
+        evs = Stats(*row[12:18])
+        held_item = json.loads(row[19]) if row[19] is not None else None
+        return Oeo(row[0], row[1], row[2], row[3], row[4], row[5], ivs, evs,
+                   json.loads(row[18]), None, held_item)
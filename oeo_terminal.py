@@ -7,7 +7,8 @@ from core import Oeo, Stats, Element, Move, Item
 from battlesim import Battle, Action
 
 logger = logging.getLogger(__name__)
-logging.config.fileConfig("logging_terminal.conf",
+logging.config.fileConfig(Path(__file__).resolve().parent /
+                          "logging_terminal.conf",
                           disable_existing_loggers=False)
 logger.debug(f"Started logging in {__file__}")
 
@@ -0,0 +1,4 @@
+"""
+Tests for the oeo simulation, run from the repository root using
+python -m pytest
+"""
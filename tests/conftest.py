@@ -0,0 +1,44 @@
+import random
+import pytest
+from battlesim.battle import Battle
+from battlesim.policy import RandomPolicy, attach_policies
+from battlesim.runner import build_team
+from core import RandomStream
+
+team_definitions = {team_id: {"max_fielded": 2,
+                              "oeo": [{"species": "Chikaphu",
+                                       "level": level, "moves": ["Maul"]}
+                                      for level in (40, 45, 50, 55)]}
+                    for team_id in ("X", "Y")}
+
+
+@pytest.fixture
+def teams():
+    """
+    :return: two team definitions of four oeo, two fielded at a time
+    """
+    return team_definitions
+
+
+@pytest.fixture
+def new_battle():
+    """
+    :return: function making a battle between the teams, with ivs drawn
+             from a stream seeded by seed, that draws from the same stream
+             unless given an rng and has random policies attached unless
+             policies is False
+    """
+    def new_battle(seed=0, battle_cls=Battle, policies=True, **kwargs):
+        rng = RandomStream(seed)
+        oeos = {team_id: build_team(team_id, team, rng)
+                for team_id, team in team_definitions.items()}
+        kwargs.setdefault("rng", rng)
+        battle = battle_cls({**oeos["X"], **oeos["Y"]}, "X", set(oeos["X"]),
+                            2, "Y", set(oeos["Y"]), 2, **kwargs)
+        if policies:
+            attach_policies(battle, {
+                team_id: RandomPolicy(battle, team_id,
+                                      random.Random(f"{seed}:{team_id}"))
+                for team_id in team_definitions})
+        return battle
+    return new_battle
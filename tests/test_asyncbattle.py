@@ -0,0 +1,59 @@
+import asyncio
+import io
+import random
+import pytest
+from battlesim.asyncbattle import AsyncBattle, LocalClient
+from battlesim.battlelog import BattleLogWriter
+from battlesim.policy import FirstMovePolicy, RandomPolicy
+
+
+def clients(battle, seed, cls=RandomPolicy, delay=0):
+    return {team_id: LocalClient(cls(battle, team_id,
+                                     random.Random(f"{seed}:{team_id}")),
+                                 delay)
+            for team_id in battle.teams}
+
+
+def log_of(run):
+    log = io.StringIO()
+    with BattleLogWriter(log) as writer:
+        victor = run(writer)
+    return victor, log.getvalue()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_async_battle_matches_battle(new_battle, seed):
+    expected = log_of(lambda writer: new_battle(seed,
+                                                battle_log=writer).run())
+
+    def run_async(writer):
+        battle = new_battle(seed, AsyncBattle, False, battle_log=writer)
+        return asyncio.run(battle.run_async(clients(battle, seed)))
+    assert log_of(run_async) == expected
+
+
+def test_many_battles_on_one_loop(new_battle):
+    battles = [new_battle(seed, AsyncBattle, False) for seed in range(10)]
+
+    async def run_all():
+        return await asyncio.gather(*(
+            battle.run_async(clients(battle, seed, delay=0.001))
+            for seed, battle in enumerate(battles)))
+    expected = [new_battle(seed).run() for seed in range(10)]
+    assert asyncio.run(run_all()) == expected
+
+
+def test_timed_out_decisions_use_the_default_policy(new_battle):
+    def run(writer, policy_cls, delay, timeout):
+        battle = new_battle(0, AsyncBattle, False, battle_log=writer)
+        return asyncio.run(battle.run_async(
+            clients(battle, 0, policy_cls, delay), timeout))
+    slow = log_of(lambda writer: run(writer, RandomPolicy, 0.05, 0.001))
+    first = log_of(lambda writer: run(writer, FirstMovePolicy, 0, None))
+    assert slow == first
+
+
+def test_every_team_needs_a_client(new_battle):
+    battle = new_battle(0, AsyncBattle, False)
+    with pytest.raises(Exception, match="No client"):
+        asyncio.run(battle.run_async({}))
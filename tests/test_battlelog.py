@@ -0,0 +1,57 @@
+import io
+import pytest
+from battlesim.battlelog import BattleLogWriter, BattleReplay, \
+    read_battle_log
+
+
+def logged_battle(new_battle, seed):
+    log = io.StringIO()
+    with BattleLogWriter(log) as writer:
+        battle = new_battle(seed, battle_log=writer)
+        victor = battle.run()
+    return battle, victor, log
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_rebuilds_the_end_of_the_battle(new_battle, seed):
+    battle, victor, log = logged_battle(new_battle, seed)
+    replay = BattleReplay(log)
+    state = replay.state_at()
+    assert state.victor == victor
+    assert state.turn_number == replay.final_turn() == battle.turn_number
+    assert {oeo_id: oeo.current_hp for oeo_id, oeo in state.oeo.items()} == \
+        {oeo_id: oeo.current_hp for oeo_id, oeo in battle.oeo.items()}
+    for team_id in replay.teams:
+        assert state.field[team_id].fielded == \
+            battle.field[team_id].fielded
+
+
+def test_replay_by_turn(new_battle):
+    battle, _, log = logged_battle(new_battle, 1)
+    replay = BattleReplay(log)
+    start = replay.state_at(0)
+    assert start.victor is None
+    assert all(oeo.current_hp == oeo.full_hp for oeo in start.oeo.values())
+    assert start.field["X"].fielded and start.field["Y"].fielded
+    assert all(record["turn"] == 1 for record in replay.events(1))
+    hp = sum(oeo.current_hp for oeo in start.oeo.values())
+    for turn in range(1, replay.final_turn() + 1):
+        state = replay.state_at(turn)
+        assert sum(oeo.current_hp for oeo in state.oeo.values()) <= hp
+        hp = sum(oeo.current_hp for oeo in state.oeo.values())
+
+
+def test_log_is_one_json_record_per_line(new_battle):
+    _, victor, log = logged_battle(new_battle, 2)
+    records = list(read_battle_log(io.StringIO(log.getvalue())))
+    assert records[0]["type"] == "battle"
+    assert records[-1] == {"type": "end", "turn": records[-1]["turn"],
+                           "victor": victor}
+    assert len(records) == log.getvalue().count("\n")
+
+
+def test_unsupported_logs_are_rejected():
+    with pytest.raises(Exception, match="battle record"):
+        BattleReplay(io.StringIO('{"type": "end"}\n'))
+    with pytest.raises(Exception, match="version"):
+        BattleReplay(io.StringIO('{"type": "battle", "version": 99}\n'))
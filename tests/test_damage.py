@@ -0,0 +1,37 @@
+import random
+import numpy as np
+import pytest
+from core.move import Move
+from core.oeo import Oeo
+from core.rng import RandomStream
+from battlesim.damage import (batch_arguments, calculate_standard_damage,
+                              calculate_standard_damage_batch)
+
+
+def make_hits(n):
+    rng = RandomStream(5)
+    moves = [Move("Maul", "Normal", "Physical", 35, 95, True, 0, ()),
+             Move("Spark", "Electric", "Special", 65, 100, False, 0, ()),
+             Move("Ember", "Fire", "Special", 40, 100, False, 0, ())]
+    return [(Oeo.create("Chikaphu", "", 5 + i % 50, 0, rng), moves[i % 3],
+             Oeo.create("Chikaphu", "", 50 - i % 40, 0, rng))
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("make_rng", [RandomStream, random.Random])
+def test_batch_matches_one_hit_at_a_time(make_rng):
+    hits = make_hits(300)
+    rng = make_rng(11)
+    expected = [calculate_standard_damage(user, move, target, rng=rng)
+                for user, move, target in hits]
+    damage = calculate_standard_damage_batch(**batch_arguments(hits),
+                                             rng=make_rng(11))
+    assert damage.tolist() == expected
+
+
+def test_batch_rejects_status_moves():
+    hits = make_hits(1)
+    args = batch_arguments(hits)
+    args["move_category"] = np.array([3])
+    with pytest.raises(Exception, match="neither Physical nor Special"):
+        calculate_standard_damage_batch(**args)
@@ -0,0 +1,69 @@
+import itertools
+from fractions import Fraction
+import pytest
+from core import move_catalog
+from core.oeo import Oeo
+from core.rng import RandomStream
+from battlesim.damage import calculate_standard_damage
+from battlesim.damagecalc import DamageDistribution, damage_distribution, \
+    ko_chances, ko_probability
+
+
+class FixedDraw(object):
+    """
+    Stands in for a random stream, always drawing value from randint
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def randint(self, a, b):
+        return self.value
+
+
+@pytest.fixture
+def hit():
+    rng = RandomStream(8)
+    return (Oeo.create("Chikaphu", "", 50, 0, rng), move_catalog.get("Maul"),
+            Oeo.create("Chikaphu", "", 45, 0, rng))
+
+
+def test_distribution_covers_every_draw(hit):
+    user, move, target = hit
+    distribution = damage_distribution(user, move, target)
+    rolls = [calculate_standard_damage(user, move, target,
+                                       rng=FixedDraw(value))
+             for value in range(85, 101)]
+    assert distribution.outcomes == 16
+    assert distribution.counts == {damage: rolls.count(damage)
+                                   for damage in set(rolls)}
+    assert (distribution.min, distribution.max) == (min(rolls), max(rolls))
+    assert distribution.mean == sum(rolls) / 16
+
+
+def test_ko_chances_match_every_sequence_of_draws():
+    distribution = DamageDistribution.from_rolls([3, 4, 4, 5])
+    hp = 11
+    chances = ko_chances(distribution, hp)
+    for hits, chance in enumerate(chances, 1):
+        sequences = list(itertools.product([3, 4, 4, 5], repeat=hits))
+        knocked_out = sum(1 for sequence in sequences if sum(sequence) >= hp)
+        assert chance == Fraction(knocked_out, len(sequences))
+    assert len(chances) == 4 and chances[-1] == 1
+
+
+def test_hits_add_independent_distributions():
+    distribution = DamageDistribution.from_rolls([1, 2])
+    assert distribution.hits(3).counts == {3: 1, 4: 3, 5: 3, 6: 1}
+    assert distribution.hits(3).at_least(5) == Fraction(1, 2)
+    with pytest.raises(ValueError):
+        distribution.hits(0)
+
+
+def test_ko_probability(hit):
+    user, move, target = hit
+    distribution = damage_distribution(user, move, target)
+    assert ko_probability(user, move, target, hp=distribution.max) == \
+        distribution.probability(distribution.max)
+    assert ko_probability(user, move, target, hp=distribution.min) == 1
+    assert ko_probability(user, move, target, hits=100) == 1
+    assert ko_chances(distribution, 0) == [1]
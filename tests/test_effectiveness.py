@@ -0,0 +1,42 @@
+import json
+import pytest
+from core import gamedata
+from core.element import Element
+from battlesim.effectiveness import EffectivenessTable
+
+
+@pytest.fixture(scope="module")
+def effectiveness_map():
+    return gamedata.read_json("battle", "element_effectiveness")
+
+
+def single(effectiveness_map, move_element, target_element):
+    return effectiveness_map[move_element.name].get(target_element.name, 1)
+
+
+def test_table_matches_the_game_data(effectiveness_map):
+    table = EffectivenessTable.from_json_dict(effectiveness_map)
+    for move_element in Element:
+        for a in Element:
+            assert table.effectiveness(move_element, [a]) == \
+                single(effectiveness_map, move_element, a)
+            for b in Element:
+                assert table.effectiveness(move_element, [a, b]) == \
+                    single(effectiveness_map, move_element, a) * \
+                    single(effectiveness_map, move_element, b)
+                assert table.dual[move_element.value, a.value, b.value] == \
+                    table.effectiveness(move_element, (a, b))
+
+
+def test_unknown_elements_are_rejected(effectiveness_map):
+    effectiveness_map = json.loads(json.dumps(effectiveness_map))
+    effectiveness_map["Normal"]["Wood"] = 2
+    with pytest.raises(Exception, match="Wood"):
+        EffectivenessTable.from_json_dict(effectiveness_map)
+
+
+def test_missing_rows_are_rejected(effectiveness_map):
+    effectiveness_map = dict(effectiveness_map)
+    del effectiveness_map["Dark"]
+    with pytest.raises(Exception, match="missing rows"):
+        EffectivenessTable.from_json_dict(effectiveness_map)
@@ -0,0 +1,43 @@
+import pytest
+from battlesim.field import Field
+
+
+def test_deploy_and_withdraw_keep_the_indexes_in_step():
+    field = Field("X", 3, "Y", 2)
+    x, y = field["X"], field["Y"]
+    assert x.is_empty() and x.empty_positions == (0, 1, 2)
+    field.deploy("X", "x0", 2)
+    field.deploy("X", "x1", 0)
+    field.deploy("Y", "y0", 1)
+    assert x.fielded == ("x1", "x0")
+    assert x.empty_positions == (1,) and x.empty_mask == 0b010
+    assert "x0" in field and "x0" in x and "x0" not in y
+    assert field.locate("y0") == ("Y", 1)
+    assert set(field.fielded) == {"x0", "x1", "y0"}
+
+    field.withdraw("X", "x0")
+    assert x.fielded == ("x1",) and x.empty_positions == (1, 2)
+    assert "x0" not in field and field.locate("x0") is None
+    field.withdraw("X", "x1")
+    assert x.is_empty() and not y.is_empty()
+
+
+def test_deploying_over_an_oeo_replaces_it():
+    field = Field("X", 1, "Y", 1)
+    field.deploy("X", "x0", 0)
+    field.deploy("X", "x1", 0)
+    assert field["X"].fielded == ("x1",)
+    assert "x0" not in field
+
+
+def test_invalid_changes_are_rejected():
+    field = Field("X", 2, "Y", 2)
+    field.deploy("X", "x0", 0)
+    with pytest.raises(Exception, match="already on the field"):
+        field.deploy("Y", "x0", 0)
+    with pytest.raises(IndexError):
+        field.deploy("X", "x1", 2)
+    with pytest.raises(ValueError):
+        field.withdraw("Y", "x0")
+    with pytest.raises(Exception, match="not on field"):
+        field.deploy("Z", "z0", 0)
@@ -0,0 +1,49 @@
+import json
+import os
+import shutil
+import pytest
+from core import gamedata
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "data"
+    for category in gamedata.categories:
+        shutil.copytree(gamedata.data_root / category, root / category)
+    return root
+
+
+def test_bundle_holds_the_json_data(root, tmp_path):
+    path = tmp_path / "gamedata.bundle"
+    gamedata.compile_bundle(root, path)
+    data = gamedata.load_bundle(path, root)
+    for category in gamedata.categories:
+        assert sorted(data[category]) == \
+            gamedata.list_names(category, root / category)
+        for name, value in data[category].items():
+            assert value == json.loads(
+                (root / category / f"{name}.json").read_text("utf-8"))
+
+
+def test_touched_sources_keep_the_bundle(root, tmp_path):
+    path = tmp_path / "gamedata.bundle"
+    gamedata.compile_bundle(root, path)
+    source = root / "oeo" / "Chikaphu.json"
+    os.utime(source, ns=(0, 0))
+    assert gamedata.load_bundle(path, root) is not None
+
+
+def test_changed_sources_make_the_bundle_stale(root, tmp_path):
+    path = tmp_path / "gamedata.bundle"
+    gamedata.compile_bundle(root, path)
+    source = root / "moves" / "Maul.json"
+    source.write_text(source.read_text("utf-8").replace("35", "40"),
+                      encoding="utf-8")
+    assert gamedata.load_bundle(path, root) is None
+
+
+def test_missing_or_unreadable_bundle(root, tmp_path):
+    path = tmp_path / "gamedata.bundle"
+    assert gamedata.load_bundle(path, root) is None
+    path.write_bytes(b"not a pickle")
+    assert gamedata.load_bundle(path, root) is None
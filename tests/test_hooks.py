@@ -0,0 +1,50 @@
+import pytest
+from battlesim.hooks import Hook, Validation
+
+
+def test_hook_returns_the_first_handlers_result():
+    calls = []
+    hook = Hook("decision")
+
+    def first(x):
+        calls.append(("first", x))
+        return x + 1
+
+    def second(x):
+        calls.append(("second", x))
+        return x + 2
+    hook += first
+    hook += second
+    assert len(hook) == 2
+    assert hook(1) == 2
+    assert calls == [("first", 1), ("second", 1)]
+    hook -= first
+    assert hook(1) == 3
+
+
+def test_hook_without_handlers_raises():
+    with pytest.raises(Exception, match="No handler for decision"):
+        Hook("decision")()
+
+
+def test_validation_levels():
+    assert Validation.Full.enabled
+    assert not Validation.Off.enabled
+    assert Validation.Debug.enabled == __debug__
+
+
+def test_invalid_decisions_are_caught_unless_validation_is_off(new_battle):
+    def deploy_twice(team_id, non_fielded_team, empty_positions):
+        return {position: non_fielded_team[0]
+                for position in empty_positions}
+
+    battle = new_battle(policies=False)
+    battle.event_choose_deployments += deploy_twice
+    with pytest.raises(Exception, match="more than one field position"):
+        battle.run()
+
+    battle = new_battle(policies=False, validation=Validation.Off)
+    battle.event_choose_deployments += deploy_twice
+    # Unchecked, the second deployment fails on the field itself
+    with pytest.raises(Exception, match="already on the field"):
+        battle.run()
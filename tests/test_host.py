@@ -0,0 +1,98 @@
+import asyncio
+import json
+import pytest
+from battlesim.host import BattleHost, PolicyClient, battle_memory, serve
+from battlesim.policy import FirstMovePolicy, attach_policies
+from core import RandomStream
+
+
+def test_hosted_battles_match_battle(new_battle, teams):
+    host = BattleHost()
+    battle_ids = [host.create(teams, rng=RandomStream(seed))
+                  for seed in range(5)]
+    assert PolicyClient(host, FirstMovePolicy).run() > 0
+    for seed, battle_id in enumerate(battle_ids):
+        battle = new_battle(seed, policies=False)
+        attach_policies(battle, {team_id: FirstMovePolicy(battle, team_id)
+                                 for team_id in teams})
+        assert host[battle_id].victor == battle.run()
+        assert host[battle_id].battle.turn_number == battle.turn_number
+    assert host.stats()["finished"] == 5
+    host.remove(battle_ids[0])
+    assert battle_ids[0] not in host and len(host) == 4
+
+
+@pytest.mark.parametrize("change, error", [
+    ({"oeo": [{"species": "Chikaphu", "level": 5, "moves": ["Maul"]}] * 7},
+     "1 to 6 oeo"),
+    ({"max_fielded": 4}, "max_fielded must be 1 to 3"),
+    ({"oeo": [{"species": "Chikaphu", "level": 5, "moves": ["Maul"] * 5}]},
+     "1 to 4 moves"),
+])
+def test_create_checks_the_teams(teams, change, error):
+    host = BattleHost()
+    with pytest.raises(Exception, match=error):
+        host.create({"X": {**teams["X"], **change}, "Y": teams["Y"]})
+    assert len(host) == 0
+
+
+def test_create_checks_for_room(teams):
+    host = BattleHost(max_battles=1)
+    host.create(teams)
+    with pytest.raises(Exception, match="full"):
+        host.create(teams)
+    # The teams are not even looked at
+    with pytest.raises(Exception, match="full"):
+        host.create(None)
+
+
+def test_invalid_decisions_are_rejected(teams):
+    host = BattleHost()
+    battle_id = host.create(teams, rng=RandomStream(0))
+    request = host.pending(battle_id)
+    decision_type, team_id, (benched, empty_positions) = request
+    assert decision_type == "choose_deployments"
+    with pytest.raises(Exception, match="Invalid decision"):
+        host.submit(battle_id, team_id, {empty_positions[0]: "Z0"})
+    with pytest.raises(Exception, match="waiting for"):
+        host.submit(battle_id, "Z", {})
+    assert host.pending(battle_id) == request
+
+
+def test_battles_that_outgrow_the_memory_limit_are_ended(new_battle,
+                                                        teams):
+    memory = battle_memory(new_battle(0, policies=False))
+    with pytest.raises(Exception, match="out of memory"):
+        BattleHost(max_memory=memory // 2).create(teams)
+    host = BattleHost(max_memory=memory + 1)
+    host.remeasure_turns = 1
+    battle_id = host.create(teams, rng=RandomStream(0))
+    admitted = host.memory
+    PolicyClient(host, FirstMovePolicy).run()
+    hosted = host[battle_id]
+    assert hosted.victor is None
+    assert "out of memory" in str(hosted.error)
+    assert host.memory > admitted
+
+
+def test_serve(teams):
+    async def session():
+        server = await serve(BattleHost(), port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for request in [{"op": "create", "teams": teams, "seed": 1},
+                        {"op": "stats"}, {"op": "nope"}]:
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+        server.close()
+        await server.wait_closed()
+        return responses
+    created, stats, unknown = asyncio.run(session())
+    assert created["ok"] and created["pending"]["decision"] == \
+        "choose_deployments"
+    assert stats["battles"] == 1
+    assert not unknown["ok"] and "Unknown op" in unknown["error"]
@@ -0,0 +1,32 @@
+import importlib
+import pytest
+from benchmarks.import_time import deferred, import_time, thresholds
+
+
+@pytest.mark.parametrize("module", sorted(thresholds))
+def test_import_time_within_threshold(module):
+    # The fastest of a few runs, as other load on the machine only slows
+    # an import down
+    us = min(import_time(module)[0] for _ in range(3))
+    assert us <= thresholds[module]
+
+
+@pytest.mark.parametrize("module", sorted(deferred))
+def test_deferred_modules_not_imported(module):
+    _, imported = import_time(module)
+    assert not imported.intersection(deferred[module])
+
+
+@pytest.mark.parametrize("package, export", [("core", "Item"),
+                                             ("battlesim", "Action")])
+def test_failed_import_is_not_reported_as_missing_export(monkeypatch,
+                                                         package, export):
+    module = importlib.import_module(package)
+
+    def import_module(name, package=None):
+        raise AttributeError("module 'collections' has no attribute "
+                             "'Mapping'")
+    monkeypatch.delitem(vars(module), export, raising=False)
+    monkeypatch.setattr(module.importlib, "import_module", import_module)
+    with pytest.raises(ImportError, match="Mapping"):
+        exec(f"from {package} import {export}", {})
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from benchmarks.lockstep import compare, scenarios
+from battlesim.lockstep import LockstepBattles
+from battlesim.runner import run_battles, run_lockstep
+from core import RandomStream
+
+teams = scenarios["2v2"]
+
+
+@pytest.mark.parametrize("policy", ["first", "random"])
+def test_outcomes_follow_those_of_battle(policy):
+    policy_names = {team_id: policy for team_id in teams}
+    battle = run_battles(teams, policy_names, 600, 0, seed=1)
+    lockstep = run_lockstep(teams, policy_names, 20000, seed=1)
+    for statistic, z in compare(battle, lockstep, list(teams)):
+        # Four standard errors, a false alarm in about 1 in 16000
+        assert abs(z) <= 4, statistic
+
+
+def test_battles_end_consistently():
+    policy_names = {team_id: "random" for team_id in teams}
+    lockstep = LockstepBattles(teams, policy_names, 500, RandomStream(2))
+    victors = lockstep.run()
+    assert lockstep.running == 0 and None not in victors
+    hp, full_hp = lockstep.hp, lockstep.full_hp
+    assert np.all((0 <= hp) & (hp <= full_hp))
+    # The oeo of team A are the first three columns
+    a_conscious = (hp[:, :3] > 0).any(axis=1)
+    b_conscious = (hp[:, 3:] > 0).any(axis=1)
+    assert all(victor == ("X" if a else "Y" if b else "DRAW")
+               for victor, a, b in zip(victors, a_conscious, b_conscious))
+    damage = lockstep.damage_dealt()
+    assert np.array_equal(damage["X"], (full_hp - hp)[:, 3:].sum(axis=1))
+
+    again = LockstepBattles(teams, policy_names, 500, RandomStream(2))
+    assert again.run() == victors
+    assert np.array_equal(again.turns, lockstep.turns)
+
+
+def test_only_scripted_policies():
+    with pytest.raises(Exception, match="no policies named"):
+        LockstepBattles(teams, {"X": "search", "Y": "first"}, 10)
@@ -0,0 +1,53 @@
+import logging
+import random
+import pytest
+from benchmarks.matchup import check_ranges, make_data, same, write_move, \
+    write_species
+from battlesim.matchup import load_matchup_table
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "data"
+    make_data(root, 12, 8, random.Random(0))
+    return root
+
+
+def computed(caplog):
+    messages = [record.getMessage() for record in caplog.records
+                if record.getMessage().startswith("Computed")]
+    return int(messages[-1].split()[1])
+
+
+def test_changes_only_recompute_their_matchups(root, tmp_path, caplog):
+    caplog.set_level(logging.INFO, "battlesim.matchup")
+    path = tmp_path / "matchups.cache"
+    load_matchup_table(root, path)
+    assert computed(caplog) == 12 * 8 * 12
+
+    caplog.clear()
+    load_matchup_table(root, path)
+    assert not caplog.records
+
+    rng = random.Random(1)
+    write_move(root, "Move0003", rng)
+    write_species(root, "Species0012", rng)
+    table = load_matchup_table(root, path)
+    # The new species against every species and move, and the changed
+    # move between the other species
+    assert computed(caplog) == 13 * 8 * 13 - 12 * 7 * 12
+    assert same(table, load_matchup_table(root, tmp_path / "full.cache"))
+    assert check_ranges(table, root, 200, random.Random(2)) == 0
+
+
+def test_invalid_files_are_left_out(root, tmp_path, caplog):
+    (root / "moves" / "Move0001.json").write_text("{}")
+    table = load_matchup_table(root, tmp_path / "matchups.cache")
+    assert "Move0001" not in table.moves and len(table.moves) == 7
+    assert "Leaving moves/Move0001 out" in caplog.text
+
+
+def test_unknown_levels_are_rejected(root, tmp_path):
+    table = load_matchup_table(root, tmp_path / "matchups.cache")
+    with pytest.raises(Exception, match="reference levels"):
+        table.damage_range("Species0000", "Move0000", "Species0001", 7)
@@ -0,0 +1,82 @@
+import io
+import json
+import time
+import pytest
+from battlesim.battlelog import BattleLogWriter
+from battlesim.metrics import BattleMetrics, JsonLinesSink, MemorySink, \
+    MetricsSink, PrometheusSink
+from battlesim.runner import default_teams, run_battles
+
+
+def test_instrumented_battle_is_unchanged(new_battle):
+    logs = []
+    for metrics in (None, BattleMetrics()):
+        log = io.StringIO()
+        with BattleLogWriter(log) as writer:
+            battle = new_battle(3, battle_log=writer, metrics=metrics)
+            start = time.perf_counter()
+            battle.run()
+            seconds = time.perf_counter() - start
+        logs.append(log.getvalue())
+    assert logs[0] == logs[1]
+    assert metrics.counts["battles"] == 1
+    assert metrics.counts["turns"] == battle.turn_number
+    assert metrics.seconds["battle_log"] > 0
+    # Phases are timed exclusively, so they add up to no more than run
+    assert sum(metrics.seconds.values()) <= seconds
+
+
+def test_nested_phases_are_timed_exclusively(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("battlesim.metrics.clock", lambda: now[0])
+    metrics = BattleMetrics()
+    metrics.enter("actions")
+    now[0] += 1
+    metrics.enter("battle_log")
+    now[0] += 2
+    metrics.exit()
+    now[0] += 4
+    metrics.exit()
+    assert metrics.seconds["actions"] == 5
+    assert metrics.seconds["battle_log"] == 2
+
+
+def test_worker_metrics_are_merged():
+    policy_names = {team_id: "random" for team_id in default_teams}
+    in_process, pooled = BattleMetrics(), BattleMetrics()
+    run_battles(default_teams, policy_names, 20, 0, 4, metrics=in_process)
+    run_battles(default_teams, policy_names, 20, 2, 4, metrics=pooled)
+    assert pooled.counts == in_process.counts
+    assert {decision_type: histogram.count for decision_type, histogram
+            in pooled.latency.items()} == \
+        {decision_type: histogram.count for decision_type, histogram
+         in in_process.latency.items()}
+    merged = BattleMetrics.from_dict(json.loads(json.dumps(
+        pooled.to_dict())))
+    merged.merge(in_process)
+    assert merged.counts["battles"] == 40
+
+
+def test_sinks(tmp_path):
+    policy_names = {team_id: "random" for team_id in default_teams}
+    metrics = BattleMetrics()
+    run_battles(default_teams, policy_names, 5, 0, metrics=metrics)
+    memory = MemorySink()
+    metrics.export(memory)
+    assert memory.exports == [metrics.to_dict()]
+
+    jsonl = JsonLinesSink(tmp_path / "metrics.jsonl")
+    metrics.export(jsonl)
+    metrics.export(jsonl)
+    lines = (tmp_path / "metrics.jsonl").read_text("utf-8").splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["counts"] == metrics.counts
+
+    prometheus = PrometheusSink(tmp_path / "oeo.prom")
+    metrics.export(prometheus)
+    text = (tmp_path / "oeo.prom").read_text("utf-8")
+    assert 'oeo_battle_phase_seconds_total{phase="battle_log"}' in text
+    assert "oeo_battle_battles_total 5" in text
+
+    with pytest.raises(TypeError, match="abstract"):
+        MetricsSink()
@@ -0,0 +1,46 @@
+import json
+import pytest
+from core.move import MoveCatalog, move_catalog
+
+maul = {"name": "Maul", "element": "Normal", "category": "Physical",
+        "power": 35, "accuracy": 95, "makes_contact": True}
+
+
+def write_move(root, name, move_data):
+    (root / f"{name}.json").write_text(json.dumps(move_data),
+                                       encoding="utf-8")
+
+
+def test_moves_are_shared():
+    assert move_catalog.get("Maul") is move_catalog.get("Maul")
+    assert move_catalog.get_many(["Maul"]) == {"Maul": move_catalog["Maul"]}
+
+
+def test_preload_skips_templates(tmp_path):
+    write_move(tmp_path, "Maul", maul)
+    write_move(tmp_path, "Example", {"name": "Example"})
+    catalog = MoveCatalog(tmp_path)
+    assert catalog.preload() == 1
+    assert "Maul" in catalog and "Example" not in catalog
+    assert catalog.preload() == 0
+
+
+@pytest.mark.parametrize("change, problem", [
+    ({"name": "Bite"}, "name is 'Bite'"),
+    ({"power": -1}, "power -1"),
+    ({"accuracy": 101}, "accuracy 101"),
+    ({"makes_contact": 1}, "makes_contact 1"),
+    ({"priority": 9}, "priority 9"),
+    ({"element": "Wood"}, "not a valid Element"),
+])
+def test_invalid_moves_are_rejected(tmp_path, change, problem):
+    write_move(tmp_path, "Maul", {**maul, **change})
+    with pytest.raises(Exception, match=problem):
+        MoveCatalog(tmp_path).get("Maul")
+
+
+def test_missing_values_are_reported():
+    move_data = dict(maul)
+    del move_data["power"]
+    with pytest.raises(Exception, match="missing a value for power"):
+        MoveCatalog.validate("Maul", move_data)
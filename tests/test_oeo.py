@@ -0,0 +1,54 @@
+import pytest
+from core.item import Item
+from core.oeo import Oeo
+from core.rng import RandomStream
+from core.species import species_registry
+from core.stats import Stats
+
+
+def make_oeo():
+    return Oeo("id", "name", "Chikaphu", 50, 0, None,
+               Stats(10, 10, 10, 10, 10, 10), Stats(), ["Maul"], None, None)
+
+
+def test_stats_follow_in_place_iv_and_ev_changes():
+    oeo = make_oeo()
+    attack = oeo.attack
+    oeo.ivs.attack += 20
+    assert oeo.attack == attack + 10
+    oeo.evs.attack = 252
+    assert oeo.attack == attack + 10 + 31
+
+
+def test_stats_follow_level_and_replaced_ivs():
+    oeo = make_oeo()
+    full_hp = oeo.full_hp
+    oeo.level = 100
+    assert oeo.full_hp > full_hp
+    oeo.ivs = Stats(31, 31, 31, 31, 31, 31)
+    fresh = Oeo("id", "name", "Chikaphu", 100, 0, None,
+                Stats(31, 31, 31, 31, 31, 31), Stats(), ["Maul"], None, None)
+    assert (oeo.full_hp, oeo.speed) == (fresh.full_hp, fresh.speed)
+
+
+def test_stats_follow_invalidated_species():
+    oeo = make_oeo()
+    base = oeo._species_base
+    species_registry.invalidate("Chikaphu")
+    assert oeo._species_base is not base
+    assert oeo._species_base == base
+
+
+def test_state_round_trip():
+    oeo = Oeo.create("Chikaphu", "name", 30, 100, RandomStream(1))
+    oeo.current_hp -= 5
+    restored = Oeo.from_state(oeo.state())
+    assert restored.state() == oeo.state()
+    assert str(restored) == str(oeo)
+
+
+def test_state_refuses_a_held_item():
+    oeo = make_oeo()
+    oeo.held_item = Item()
+    with pytest.raises(AssertionError):
+        oeo.state()
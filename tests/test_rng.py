@@ -0,0 +1,58 @@
+import io
+import numpy as np
+import pytest
+from battlesim.battlelog import BattleLogWriter
+from core.rng import RandomStream
+
+
+def test_draws_do_not_depend_on_the_block_size():
+    draws = [RandomStream(1, block_size=size).randoms(1000)
+             for size in (64, 100, 256, 4096)]
+    for other in draws[1:]:
+        assert np.array_equal(other, draws[0])
+
+
+def test_scalar_and_array_draws_agree():
+    a, b = RandomStream(2), RandomStream(2)
+    assert [a.random() for _ in range(300)] == b.randoms(300).tolist()
+    assert [a.randint(1, 6) for _ in range(300)] == \
+        b.randints(1, 6, 300).tolist()
+
+
+def test_randint_covers_both_end_points():
+    values = RandomStream(3).randints(85, 100, 10000)
+    assert values.min() == 85 and values.max() == 100
+
+
+def test_spawn_keys_give_independent_streams():
+    first = RandomStream(4, spawn_key=(0,)).randoms(100)
+    assert np.array_equal(RandomStream(4, spawn_key=(0,)).randoms(100),
+                          first)
+    assert not np.array_equal(RandomStream(4, spawn_key=(1,)).randoms(100),
+                              first)
+    children = RandomStream(4).spawn(2)
+    assert not np.array_equal(children[0].randoms(100),
+                              children[1].randoms(100))
+
+
+@pytest.mark.parametrize("k", [1, 32, 33, 64])
+def test_getrandbits(k):
+    values = [RandomStream(5).getrandbits(k) for _ in range(2)]
+    assert values[0] == values[1] and 0 <= values[0] < 2 ** k
+
+
+def test_blocks_stay_small():
+    rng = RandomStream(6)
+    for _ in range(10000):
+        rng.random()
+    assert len(rng._block) <= 256
+
+
+def test_same_seed_same_battle(new_battle):
+    logs = []
+    for _ in range(2):
+        log = io.StringIO()
+        with BattleLogWriter(log) as writer:
+            new_battle(7, battle_log=writer).run()
+        logs.append(log.getvalue())
+    assert logs[0] == logs[1]
@@ -0,0 +1,54 @@
+import pytest
+from core.move import Move
+from core.oeo import Oeo
+from core.rng import RandomStream
+from core.roster import Roster
+from core.stats import Stats
+
+
+def make_oeos(n):
+    rng = RandomStream(3)
+    return [Oeo.create("Chikaphu", f"oeo {i}", 5 + i, 10 * i, rng)
+            for i in range(n)]
+
+
+def test_roster_oeo_match_the_oeo_added():
+    oeos = make_oeos(5)
+    roster = Roster(oeos)
+    assert len(roster) == 5
+    assert roster.oeo_ids == [oeo.oeo_id for oeo in oeos]
+    for oeo, roster_oeo in zip(oeos, roster):
+        assert str(roster_oeo) == str(oeo)
+        assert roster_oeo.to_oeo().state() == oeo.state()
+
+
+def test_roster_interns_species_and_movesets():
+    roster = Roster(make_oeos(5))
+    assert len(roster._species_names) == 1
+    assert len(roster._moveset_ids) == 1
+
+
+def test_out_of_range_oeo_leaves_roster_unchanged():
+    roster = Roster(make_oeos(2))
+    oeo = Oeo("big", "", "Chikaphu", 5, 0, None, Stats(), Stats(hp=70000),
+              ["Maul"], None, None)
+    with pytest.raises(Exception, match="can not be stored"):
+        roster.append(oeo)
+    assert "big" not in roster
+    assert len(roster) == 2
+    assert all(len(column) == 2 for column in roster._evs)
+
+
+def test_current_hp_is_clamped():
+    roster = Roster(make_oeos(1))
+    oeo = next(iter(roster))
+    oeo.current_hp = 10000
+    assert oeo.current_hp == oeo.full_hp
+    oeo.current_hp = -1
+    assert not oeo.conscious
+
+
+@pytest.mark.parametrize("cls", [Oeo, Stats, Move])
+def test_no_instance_dict(cls):
+    # namedlist gives Stats a __dict__ property, so check for the slot
+    assert cls.__dictoffset__ == 0
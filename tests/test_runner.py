@@ -0,0 +1,35 @@
+import logging
+import pytest
+from battlesim.policy import Policy
+from battlesim.runner import default_teams, run_battles
+
+policy_names = {team_id: "random" for team_id in default_teams}
+
+
+def outcomes(results):
+    return [(r.index, r.victor, r.turns, r.damage_dealt)
+            for r in results.results]
+
+
+def test_outcomes_do_not_depend_on_the_workers():
+    in_process = run_battles(default_teams, policy_names, 40, 0, seed=7)
+    pooled = run_battles(default_teams, policy_names, 40, 2, seed=7)
+    assert in_process.battles == 40
+    assert outcomes(pooled) == outcomes(in_process)
+    assert outcomes(run_battles(default_teams, policy_names, 40, 0,
+                                seed=8)) != outcomes(in_process)
+
+
+def test_in_process_battles_leave_logging_alone(tmp_path):
+    root = logging.getLogger()
+    level = root.level
+    run_battles(default_teams, policy_names, 2, 0, log_level=logging.DEBUG)
+    assert root.level == level
+    with pytest.raises(Exception, match="log_file"):
+        run_battles(default_teams, policy_names, 2, 0,
+                    log_file=tmp_path / "sim.log")
+
+
+def test_policy_is_abstract():
+    with pytest.raises(TypeError, match="abstract"):
+        Policy(None, "X")
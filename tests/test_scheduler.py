@@ -0,0 +1,43 @@
+from battlesim.scheduler import EventScheduler
+
+
+class Event(object):
+    # Not orderable, so the scheduler must never compare two events
+    def __init__(self, name):
+        self.name = name
+
+
+def drain(scheduler):
+    names = []
+    while scheduler:
+        event, _ = scheduler.pop()
+        names.append(event.name)
+    return names
+
+
+def test_events_are_ordered_by_turn_stage_and_speed_rank():
+    scheduler = EventScheduler()
+    scheduler.push(Event("turn 2"), 2)
+    scheduler.push(Event("slow"), 1, 1, 2)
+    scheduler.push(Event("fast"), 1, 1, 0)
+    scheduler.push(Event("stage 0"), 1, 0, 5)
+    assert [event.name for event, _ in scheduler] == \
+        ["stage 0", "fast", "slow", "turn 2"]
+    assert scheduler.peek().name == "stage 0"
+    assert drain(scheduler) == ["stage 0", "fast", "slow", "turn 2"]
+
+
+def test_equal_keys_are_processed_in_scheduling_order():
+    scheduler = EventScheduler()
+    for i in range(10):
+        scheduler.push(Event(i), 1, 1, 1)
+    assert drain(scheduler) == list(range(10))
+
+
+def test_restored_scheduler_continues_the_sequence():
+    scheduler = EventScheduler()
+    scheduler.push(Event("a"), 1)
+    restored = EventScheduler.from_state(*scheduler.state())
+    scheduler.push(Event("b"), 1)
+    restored.push(Event("b"), 1)
+    assert drain(restored) == drain(scheduler) == ["a", "b"]
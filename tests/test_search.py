@@ -0,0 +1,70 @@
+import random
+from core import move_catalog
+from battlesim.damage import calculate_expected_standard_damage
+from battlesim.policy import RandomPolicy, SearchPolicy, attach_policies
+from battlesim.search import BattleModel, Lookahead
+
+
+def deployed_battle(new_battle):
+    battle = new_battle(policies=False)
+    for team_id, team in battle.teams.items():
+        for position, oeo_id in enumerate(sorted(team)[:2]):
+            battle.field.deploy(team_id, oeo_id, position)
+    return battle
+
+
+def test_model_steps_by_the_expected_damage(new_battle):
+    battle = deployed_battle(new_battle)
+    model = BattleModel(battle, "X")
+    oeos = list(battle.oeo.values())
+    maul = move_catalog.get("Maul")
+    for (i, m, j), damage in model.damage.items():
+        assert damage == calculate_expected_standard_damage(
+            oeos[i], maul, oeos[j])
+
+    state = model.state(battle)
+    assert [len(side) for side in state[1]] == [2, 2]
+    actions = model.actions(state, 0)[0] + model.actions(state, 1)[0]
+    hps = list(state[0])
+    for i, m, j in actions:
+        hps[j] -= model.damage[i, m, j]
+    assert model.step(state, actions)[0] == tuple(hps)
+    assert model.outcome(state) is None
+    assert model.evaluate(state) == 0
+
+
+def test_search_does_not_depend_on_the_time(new_battle):
+    battle = deployed_battle(new_battle)
+    model = BattleModel(battle, "X")
+    state = model.state(battle)
+    results = []
+    for _ in range(2):
+        lookahead = Lookahead(model, float("inf"), max_depth=3)
+        results.append((lookahead.best_actions(state), lookahead.depth,
+                        lookahead.nodes))
+    assert results[0] == results[1]
+    assert results[0][1] == 3
+
+
+def test_search_policy_leaves_the_battle_alone(new_battle):
+    battle = new_battle(policies=False)
+    policies = {"X": SearchPolicy(battle, "X", time_budget=0.001,
+                                  max_depth=2),
+                "Y": RandomPolicy(battle, "Y", random.Random(0))}
+    attach_policies(battle, policies)
+    steps = battle._steps()
+    request = next(steps)
+    decisions = 0
+    try:
+        while True:
+            if request[1] == "X":
+                blob = battle.snapshot()
+                decision = battle._decide(*request)
+                assert battle.snapshot() == blob
+                decisions += 1
+            else:
+                decision = battle._decide(*request)
+            request = steps.send(decision)
+    except StopIteration as stop:
+        assert stop.value in ("X", "Y", "DRAW")
+    assert decisions > 1
@@ -0,0 +1,41 @@
+import logging
+import logging.handlers
+from battlesim.simlogging import start_queue_logging
+
+
+def test_queue_logging_delivers_records_once_stopped():
+    logger = logging.getLogger("tests.simlogging")
+    logger.propagate = False
+    handler = logging.handlers.BufferingHandler(100)
+    handler.setLevel(logging.INFO)
+    listener = start_queue_logging([handler], logging.DEBUG, logger)
+    try:
+        logger.debug("dropped by the handler's level")
+        logger.info("kept %d", 1)
+        listener.stop()
+        assert [record.getMessage() for record in handler.buffer] == \
+            ["kept 1"]
+        # The exit handlers stop the listener again
+        listener.stop()
+    finally:
+        for h in list(logger.handlers):
+            logger.removeHandler(h)
+
+
+def test_damage_does_not_format_debug_records_when_disabled(monkeypatch):
+    from core.move import move_catalog
+    from core.oeo import Oeo
+    from battlesim import damage
+
+    def debug(*args, **kwargs):
+        raise AssertionError("debug called with DEBUG disabled")
+    monkeypatch.setattr(damage.logger, "debug", debug)
+    user = Oeo.create("Chikaphu", "", 20, 0)
+    target = Oeo.create("Chikaphu", "", 20, 0)
+    level = damage.logger.level
+    damage.logger.setLevel(logging.INFO)
+    try:
+        assert damage.calculate_standard_damage(
+            user, move_catalog.get("Maul"), target) > 0
+    finally:
+        damage.logger.setLevel(level)
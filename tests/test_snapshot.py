@@ -0,0 +1,68 @@
+import random
+import pytest
+from battlesim.battle import Battle
+from battlesim.policy import FirstMovePolicy, attach_policies
+
+
+def first_move_policies(battle):
+    attach_policies(battle, {team_id: FirstMovePolicy(battle, team_id)
+                             for team_id in battle.teams})
+    return battle
+
+
+def run_to_turn(battle, turn):
+    """
+    Run battle until it requests a decision in turn
+
+    :return: the battle loop, suspended at that request, and the request
+    """
+    steps = battle._steps()
+    request = next(steps)
+    while battle.turn_number < turn:
+        request = steps.send(battle._decide(*request))
+    return steps, request
+
+
+def finish(steps, battle, request):
+    try:
+        while True:
+            request = steps.send(battle._decide(*request))
+    except StopIteration as stop:
+        return stop.value
+
+
+def outcome(battle, victor):
+    return victor, battle.turn_number, \
+        {oeo_id: oeo.current_hp for oeo_id, oeo in battle.oeo.items()}
+
+
+@pytest.mark.parametrize("turn", [0, 1, 3])
+def test_restored_battle_plays_out_the_same(new_battle, turn):
+    battle = first_move_policies(new_battle(policies=False,
+                                            rng=random.Random(5)))
+    steps, request = run_to_turn(battle, turn)
+    blob = battle.snapshot()
+    rng = random.Random()
+    rng.setstate(battle._rng.getstate())
+
+    restored = first_move_policies(Battle.restore(blob, rng=rng))
+    assert restored.snapshot() == blob
+    expected = outcome(battle, finish(steps, battle, request))
+    assert outcome(restored, restored.run()) == expected
+
+
+def test_clone_is_independent(new_battle):
+    battle = new_battle()
+    run_to_turn(battle, 2)
+    blob = battle.snapshot()
+    clone = first_move_policies(battle.clone(random.Random(1)))
+    clone.run()
+    assert battle.snapshot() == blob
+    assert clone.snapshot() != blob
+
+
+def test_unsupported_snapshots_are_rejected(new_battle, monkeypatch):
+    blob = new_battle().snapshot()
+    monkeypatch.setattr(Battle, "snapshot_version", 99)
+    with pytest.raises(Exception, match="snapshot version"):
+        Battle.restore(blob)
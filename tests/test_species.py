@@ -0,0 +1,30 @@
+import json
+from core.oeo import Oeo
+from core.species import SpeciesRegistry, species_registry
+
+
+def test_oeo_of_a_species_share_its_base_data():
+    a = Oeo.create("Chikaphu", "a", 5, 0)
+    b = Oeo.create("Chikaphu", "b", 50, 0)
+    assert a._species_base is b._species_base
+    assert a._species_base is species_registry.get("Chikaphu")
+
+
+def test_invalidated_species_are_read_again(tmp_path):
+    data = {"base_stats": {"hp": 10, "attack": 20, "defence": 30,
+                           "sp_attack": 40, "sp_defence": 50, "speed": 60},
+            "elements": ["Fire"]}
+    path = tmp_path / "Testmon.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    registry = SpeciesRegistry(tmp_path)
+    assert registry.preload() == 1
+    assert registry["Testmon"].base_stats.speed == 60
+
+    data["base_stats"]["speed"] = 99
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert registry["Testmon"].base_stats.speed == 60
+    generation = registry.generation
+    registry.invalidate("Testmon")
+    assert registry.generation == generation + 1
+    assert "Testmon" not in registry
+    assert registry["Testmon"].base_stats.speed == 99
@@ -0,0 +1,43 @@
+import random
+from core.oeo import Oeo
+from core.rng import RandomStream
+from battlesim.speed import SpeedRanking
+
+
+def make_oeos(n, seed=0):
+    rng = RandomStream(seed)
+    return {f"o{i}": Oeo.create("Chikaphu", "", 1 + int(rng.random() * 60),
+                                0, rng)
+            for i in range(n)}
+
+
+def expected_order(oeos):
+    # Fastest first, ties in the order the oeo were given
+    return [oeo_id for _, oeo_id in sorted(
+        ((-oeo.speed, i), oeo_id) for i, (oeo_id, oeo)
+        in enumerate(oeos.items()))]
+
+
+def test_ranking_matches_a_full_sort():
+    oeos = make_oeos(40)
+    ranking = SpeedRanking(oeos)
+    order = expected_order(oeos)
+    assert list(ranking) == order
+    assert [ranking.rank(oeo_id) for oeo_id in order] == list(range(40))
+    assert ranking.order(reversed(order)) == order
+
+
+def test_refresh_follows_changed_speeds():
+    oeos = make_oeos(40, 1)
+    ranking = SpeedRanking(oeos)
+    assert ranking.refresh() == 0
+    rng = random.Random(2)
+    for _ in range(20):
+        changed = rng.sample(sorted(oeos), 3)
+        for oeo_id in changed:
+            oeos[oeo_id].level = rng.randint(1, 100)
+        ranking.refresh()
+        order = expected_order(oeos)
+        assert list(ranking) == order
+        assert all(ranking.rank(oeo_id) == rank
+                   for rank, oeo_id in enumerate(order))
@@ -0,0 +1,44 @@
+import pytest
+from core.oeo import Oeo
+from core.rng import RandomStream
+from core.store import OeoStore
+
+
+@pytest.fixture
+def oeos():
+    rng = RandomStream(4)
+    return [Oeo.create("Chikaphu", f"oeo {i}", 1 + i, i, rng)
+            for i in range(1200)]
+
+
+def test_saved_oeo_load_as_they_were(tmp_path, oeos):
+    with OeoStore(tmp_path / "oeo.db") as store:
+        assert store.save_many(oeos) == len(oeos)
+    with OeoStore(tmp_path / "oeo.db") as store:
+        assert len(store) == len(oeos)
+        loaded = store.load_many(oeo.oeo_id for oeo in oeos)
+        assert [loaded[oeo.oeo_id].state() for oeo in oeos] == \
+            [oeo.state() for oeo in oeos]
+        assert store[oeos[0].oeo_id].state() == oeos[0].state()
+        assert store.get("missing") is None
+
+
+def test_find_and_delete(oeos):
+    with OeoStore(":memory:") as store:
+        store.save_many(oeos[:20])
+        assert store.find("Chikaphu", 5, 7) == \
+            [oeo.oeo_id for oeo in oeos[4:7]]
+        store.delete(oeos[4].oeo_id)
+        assert oeos[4].oeo_id not in store
+        assert len(store.find(max_level=7)) == 6
+
+
+def test_json_export_and_import(tmp_path, oeos):
+    with OeoStore(":memory:") as store:
+        store.save_many(oeos[:10])
+        assert store.export_json(tmp_path) == 10
+        roster = store.to_roster()
+    with OeoStore(":memory:") as store:
+        assert store.import_json(tmp_path) == 10
+        assert [str(oeo) for oeo in store.iter_oeo()] == \
+            [str(oeo) for oeo in roster]